@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import AUTH_VERSION_TTL, auth_version_key
+
+User = get_user_model()
+
+# User fields carried in the access token and used to build a lightweight user.
+TOKEN_USER_FIELDS = ("username", "is_staff", "is_superuser")
+
+
+def set_user_claims(token, user):
+    """Embed roles, identity flags and the current auth version in a token."""
+    token["roles"] = user.get_roles()
+    token["auth_version"] = user.auth_version
+    for field in TOKEN_USER_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def get_cached_auth_version(user_id):
+    return cache.get(auth_version_key(user_id))
+
+
+def remember_auth_version(user_id, version):
+    cache.set(auth_version_key(user_id), version, AUTH_VERSION_TTL)
+
+
+def build_token_user(validated_token):
+    """
+    Build a User instance from token claims without a database query.
+    Fields not in the token are deferred and load together, in one query,
+    on the first access to any of them.
+    """
+    claims = {
+        "id": User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM]),
+        "is_active": True,
+        "auth_version": validated_token["auth_version"],
+    }
+    for field in TOKEN_USER_FIELDS:
+        claims[field] = validated_token.get(field, False)
+
+    field_names = []
+    values = []
+    for field in User._meta.concrete_fields:
+        if field.attname in claims:
+            field_names.append(field.attname)
+            values.append(claims[field.attname])
+
+    user = User.from_db(router.db_for_read(User), field_names, values)
+    user._role_cache = frozenset(validated_token.get("roles", []))
+    user._load_deferred_together = True
+    return user
+
+
+class RoleClaimJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the role claims in the access token.
+
+    The user row is only loaded when the auth version is not in the shared
+    cache; tokens carrying an older auth version are rejected.
+    """
+
+    def get_user(self, validated_token):
+        token_version = validated_token.get("auth_version")
+        if token_version is None:
+            # Token issued before role claims existed
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        current_version = get_cached_auth_version(user_id)
+        if current_version is None:
+            user = super().get_user(validated_token)
+            current_version = user.auth_version
+            remember_auth_version(user.pk, current_version)
+        else:
+            user = None
+
+        if current_version != token_version:
+            raise AuthenticationFailed(
+                _("Token has been revoked."), code="token_revoked"
+            )
+
+        if user is None:
+            return build_token_user(validated_token)
+        user._role_cache = frozenset(validated_token.get("roles", []))
+        return user
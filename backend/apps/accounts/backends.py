@@ -1,9 +1,62 @@
+import hashlib
+import re
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from django.core.cache import cache
+
+from .password_pool import verify_password
 
 User = get_user_model()
 
+# Identifiers that matched no user are remembered briefly so repeated
+# attempts (typos, credential stuffing) don't hit the database.
+UNKNOWN_IDENTIFIER_TTL = 30
+
+# Persian and Arabic-Indic digits -> ASCII
+_DIGITS = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+_SEPARATORS = re.compile(r"[\s\-()]")
+_NATIONAL_ID = re.compile(r"^\d{10}$")
+
+
+def unknown_identifier_key(identifier):
+    digest = hashlib.sha1(identifier.encode()).hexdigest()
+    return f"accounts:unknown_identifier:{digest}"
+
+
+def forget_unknown_identifiers(*identifiers):
+    """Drop negative cache entries, e.g. after a user is created."""
+    keys = {
+        unknown_identifier_key(value)
+        for identifier in identifiers
+        if identifier
+        for value in (identifier, normalize_identifier(identifier)[1])
+    }
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def normalize_identifier(identifier):
+    """
+    Classify a login identifier and return (field, normalized value):
+    10 digits -> national_id, contains "@" -> email,
+    starts with 09 -> phone, anything else -> username.
+    """
+    value = identifier.strip()
+    if "@" in value:
+        return "email", User.objects.normalize_email(value)
+
+    digits = _SEPARATORS.sub("", value.translate(_DIGITS))
+    if digits.startswith("+98"):
+        digits = "0" + digits[3:]
+    elif digits.startswith("0098"):
+        digits = "0" + digits[4:]
+    if _NATIONAL_ID.match(digits):
+        return "national_id", digits
+    if digits.startswith("09") and digits[1:].isdigit():
+        return "phone", digits
+    return "username", value
+
 
 class MultiFieldAuthBackend(ModelBackend):
     """
@@ -12,27 +65,51 @@ class MultiFieldAuthBackend(ModelBackend):
     - email
     - phone
     - national_id
+
+    The identifier is classified first so each login is a single
+    equality lookup on one unique index.
     """
 
-    def authenticate(self, request, username=None, password=None, **kwargs):
+    def authenticate(self, request, username=None, password=None, use_pool=False, **kwargs):
+        """
+        With use_pool=True the hash is verified in the password pool
+        (see apps.accounts.password_pool), which may raise PasswordPoolBusy.
+        """
         identifier = username or kwargs.get("identifier")
-        
+
         if identifier is None:
             return None
 
-        try:
-            user = User.objects.get(
-                Q(username=identifier) |
-                Q(email=identifier) |
-                Q(phone=identifier) |
-                Q(national_id=identifier)
-            )
-        except User.DoesNotExist:
-            return None
-        except User.MultipleObjectsReturned:
+        user = self.get_user_by_identifier(identifier)
+        if user is None:
             return None
 
-        if user.check_password(password) and self.user_can_authenticate(user):
+        if use_pool:
+            password_ok = verify_password(user, password)
+        else:
+            password_ok = user.check_password(password)
+        if password_ok and self.user_can_authenticate(user):
             return user
-        
+
         return None
+
+    def get_user_by_identifier(self, identifier):
+        key = unknown_identifier_key(identifier)
+        if cache.get(key):
+            return None
+
+        field, normalized = normalize_identifier(identifier)
+        # Exact value first, then the normalized form (e.g. +98 / Persian digits)
+        candidates = [identifier] if normalized == identifier else [identifier, normalized]
+        users = list(User.objects.filter(**{f"{field}__in": candidates})[:2])
+        if not users and field != "username":
+            # Usernames may look like emails or numbers
+            users = list(User.objects.filter(username=identifier))
+
+        if not users:
+            cache.set(key, True, UNKNOWN_IDENTIFIER_TTL)
+            return None
+        for user in users:
+            if getattr(user, field) == identifier:
+                return user
+        return users[0]
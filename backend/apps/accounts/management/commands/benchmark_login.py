@@ -0,0 +1,131 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import override_settings
+
+from apps.accounts.backends import MultiFieldAuthBackend
+
+User = get_user_model()
+
+PASSWORD = "bench-pass-123"
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+class LegacyMultiFieldAuthBackend(ModelBackend):
+    """The previous OR-across-all-fields lookup, kept for comparison."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        identifier = username or kwargs.get("identifier")
+        if identifier is None:
+            return None
+        try:
+            user = User.objects.get(
+                Q(username=identifier) |
+                Q(email=identifier) |
+                Q(phone=identifier) |
+                Q(national_id=identifier)
+            )
+        except (User.DoesNotExist, User.MultipleObjectsReturned):
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare login throughput of the legacy OR-query backend and "
+        "MultiFieldAuthBackend. Benchmark users are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500_000)
+        parser.add_argument("--logins", type=int, default=5_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument(
+            "--unknown-ratio", type=float, default=0.1,
+            help="Share of logins using identifiers that match no user",
+        )
+        parser.add_argument(
+            "--real-hasher", action="store_true",
+            help="Use the configured password hasher instead of a fast one",
+        )
+
+    def handle(self, *args, **options):
+        hashers = None if options["real_hasher"] else FAST_HASHERS
+        with override_settings(**({"PASSWORD_HASHERS": hashers} if hashers else {})):
+            with transaction.atomic():
+                self._seed(options["users"], options["batch_size"])
+                identifiers = self._sample(
+                    options["users"], options["logins"], options["unknown_ratio"]
+                )
+                for label, backend in (
+                    ("legacy", LegacyMultiFieldAuthBackend()),
+                    ("routed", MultiFieldAuthBackend()),
+                ):
+                    cache.clear()
+                    self._run(label, backend, identifiers)
+                transaction.set_rollback(True)
+
+    def _seed(self, count, batch_size):
+        self.stdout.write(f"Seeding {count} users...")
+        password = make_password(PASSWORD)
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            User.objects.bulk_create(
+                [
+                    User(
+                        username=f"bench_{i}",
+                        email=f"bench_{i}@bench.local",
+                        phone=f"099{i:08d}",
+                        national_id=f"9{i:09d}",
+                        password=password,
+                    )
+                    for i in range(offset, min(offset + batch_size, count))
+                ],
+                batch_size=batch_size,
+            )
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {User._meta.db_table}")
+        self.stdout.write(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+    def _sample(self, count, logins, unknown_ratio):
+        rng = random.Random(42)
+        identifiers = []
+        for _ in range(logins):
+            i = rng.randrange(count)
+            if rng.random() < unknown_ratio:
+                identifiers.append(f"nobody_{i}")
+                continue
+            identifiers.append(rng.choice([
+                f"bench_{i}",
+                f"bench_{i}@bench.local",
+                f"099{i:08d}",
+                f"9{i:09d}",
+            ]))
+        return identifiers
+
+    def _run(self, label, backend, identifiers):
+        latencies = []
+        started = time.perf_counter()
+        for identifier in identifiers:
+            t0 = time.perf_counter()
+            backend.authenticate(None, username=identifier, password=PASSWORD)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"{label:>7}: {len(identifiers) / elapsed:,.0f} logins/s, "
+            f"p50 {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {p99 * 1000:.2f} ms"
+        )
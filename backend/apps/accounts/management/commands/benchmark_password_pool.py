@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+from apps.accounts.password_pool import PasswordPool, PasswordPoolBusy
+
+PASSWORD = "bench-pass-123"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verification throughput and p99 latency, inline "
+        "versus the login password pool, at several request concurrencies."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,4,16,64")
+        parser.add_argument("--logins", type=int, default=200)
+        parser.add_argument(
+            "--pool-size", type=int,
+            default=max(settings.PASSWORD_POOL_SIZE, 2),
+        )
+        parser.add_argument(
+            "--queue-size", type=int, default=settings.PASSWORD_POOL_QUEUE_SIZE
+        )
+
+    def handle(self, *args, **options):
+        encoded = make_password(PASSWORD)
+        pool = PasswordPool(
+            options["pool_size"], options["queue_size"], settings.PASSWORD_POOL_TIMEOUT
+        )
+        try:
+            # Spawn and warm the worker processes before measuring
+            for future in [pool.submit(check_password, PASSWORD, encoded)
+                           for _ in range(options["pool_size"])]:
+                future.result()
+
+            levels = [int(level) for level in options["concurrency"].split(",")]
+            for concurrency in levels:
+                self._run("inline", concurrency, options["logins"],
+                          lambda: check_password(PASSWORD, encoded))
+                self._run("pool", concurrency, options["logins"],
+                          lambda: pool.check(PASSWORD, encoded))
+        finally:
+            pool.shutdown()
+
+    def _run(self, label, concurrency, logins, verify):
+        def one_login(_):
+            t0 = time.perf_counter()
+            try:
+                verify()
+            except PasswordPoolBusy:
+                return time.perf_counter() - t0, False
+            return time.perf_counter() - t0, True
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(one_login, range(logins)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, ok in results if ok)
+        rejected = sum(1 for _, ok in results if not ok)
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+        self.stdout.write(
+            f"{label:>6} c={concurrency:<3}: {len(latencies) / elapsed:,.1f} logins/s, "
+            f"p99 {p99 * 1000:.0f} ms, rejected (503) {rejected}"
+        )
@@ -0,0 +1,258 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.db.models import JSONField
+
+from apps.accounts.backends import forget_unknown_identifiers
+from apps.accounts.models import DefaultRoles, auth_version_key, invalidate_role_cache
+
+User = get_user_model()
+
+UNIQUE_FIELDS = ("username", "email", "phone", "national_id")
+REQUIRED_FIELDS = UNIQUE_FIELDS + ("first_name", "last_name")
+NATIONAL_ID_RE = re.compile(r"^\d{10}$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import users from CSV or NDJSON. Columns: username, email, phone, "
+        "national_id, first_name, last_name, password (optional), roles "
+        "(optional, ';'-separated). Each batch is committed separately and the "
+        "progress is recorded, so a failed import can simply be re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"])
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1,
+            help="Processes used to hash passwords",
+        )
+        parser.add_argument("--default-role", default=DefaultRoles.BASE_USER)
+        parser.add_argument(
+            "--state-file",
+            help="Progress file used to resume (default: <path>.import-state)",
+        )
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Ignore saved progress and start from the first row",
+        )
+        parser.add_argument(
+            "--no-copy", action="store_true",
+            help="Use bulk_create even on PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        state_file = options["state_file"] or f"{path}.import-state"
+        self.batch_size = options["batch_size"]
+        self.default_role = options["default_role"]
+        self.use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+
+        state = {"rows_done": 0, "created": 0, "rejected": 0}
+        if not options["restart"] and os.path.exists(state_file):
+            with open(state_file) as fh:
+                state = json.load(fh)
+            self.stdout.write(f"Resuming after row {state['rows_done']}")
+
+        self.groups = dict(Group.objects.values_list("name", "id"))
+        self.taken = self._preload_identifiers()
+        started = time.perf_counter()
+        processed = 0
+
+        self.workers = max(options["workers"], 1)
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+        with executor, open(path, newline="", encoding="utf-8") as fh:
+            rows = islice(self._read(fh, fmt), state["rows_done"], None)
+            line = state["rows_done"]
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                users, roles = self._validate(batch, line, state)
+                created = self._load(users, roles, executor)
+
+                line += len(batch)
+                processed += len(batch)
+                state["rows_done"] = line
+                state["created"] += created
+                with open(state_file, "w") as out:
+                    json.dump(state, out)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"  {line} rows, {state['created']} created, "
+                    f"{state['rejected']} rejected ({processed / elapsed:,.0f} rows/s)"
+                )
+
+        elapsed = time.perf_counter() - started
+        if os.path.exists(state_file):
+            os.remove(state_file)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {state['created']} users, rejected {state['rejected']} rows "
+            f"in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:,.0f} rows/s)."
+        ))
+
+    def _read(self, fh, fmt):
+        if fmt == "csv":
+            yield from csv.DictReader(fh)
+            return
+        for raw in fh:
+            if raw.strip():
+                yield json.loads(raw)
+
+    def _preload_identifiers(self):
+        """One set of (field, value) pairs for every existing unique identifier."""
+        taken = set()
+        for values in User.objects.values_list(*UNIQUE_FIELDS).iterator(chunk_size=10_000):
+            taken.update(zip(UNIQUE_FIELDS, values))
+        return taken
+
+    def _reject(self, line, reason, state):
+        state["rejected"] += 1
+        self.stderr.write(f"  row {line}: {reason}")
+
+    def _validate(self, batch, first_line, state):
+        """Return unsaved users (password still in plain text) and their role ids."""
+        users, roles = [], []
+        for offset, row in enumerate(batch, start=1):
+            line = first_line + offset
+            data = {key: str(row.get(key) or "").strip() for key in REQUIRED_FIELDS}
+            missing = [key for key in REQUIRED_FIELDS if not data[key]]
+            if missing:
+                self._reject(line, f"missing {', '.join(missing)}", state)
+                continue
+            data["email"] = User.objects.normalize_email(data["email"])
+            try:
+                validate_email(data["email"])
+                User.username_validator(data["username"])
+            except ValidationError as e:
+                self._reject(line, e.messages[0], state)
+                continue
+            if not NATIONAL_ID_RE.match(data["national_id"]):
+                self._reject(line, "national_id must be 10 digits", state)
+                continue
+            if len(data["phone"]) > User._meta.get_field("phone").max_length:
+                self._reject(line, "phone is too long", state)
+                continue
+            duplicate = next(
+                (field for field in UNIQUE_FIELDS if (field, data[field]) in self.taken), None
+            )
+            if duplicate:
+                self._reject(line, f"{duplicate} '{data[duplicate]}' already exists", state)
+                continue
+
+            role_names = row.get("roles") or self.default_role
+            if isinstance(role_names, str):
+                role_names = [name.strip() for name in role_names.split(";") if name.strip()]
+            unknown = [name for name in role_names if name not in self.groups]
+            if unknown:
+                self._reject(line, f"unknown role(s): {', '.join(unknown)}", state)
+                continue
+
+            self.taken.update((field, data[field]) for field in UNIQUE_FIELDS)
+            user = User(**data)
+            user.password = row.get("password") or None
+            users.append(user)
+            roles.append([self.groups[name] for name in role_names])
+        return users, roles
+
+    def _load(self, users, roles, executor):
+        if not users:
+            return 0
+        passwords = [user.password for user in users]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        for user, encoded in zip(users, executor.map(make_password, passwords, chunksize=chunksize)):
+            user.password = encoded
+
+        with transaction.atomic():
+            if self.use_copy:
+                self._copy(users)
+                ids = dict(
+                    User.objects.filter(username__in=[u.username for u in users])
+                    .values_list("username", "id")
+                )
+                for user in users:
+                    user.pk = ids[user.username]
+            else:
+                User.objects.bulk_create(users, batch_size=self.batch_size)
+
+            Membership = User.groups.through
+            Membership.objects.bulk_create(
+                [
+                    Membership(user_id=user.pk, group_id=group_id)
+                    for user, group_ids in zip(users, roles)
+                    for group_id in group_ids
+                ],
+                batch_size=self.batch_size,
+            )
+
+        # bulk inserts skip the post_save handlers that reset these caches
+        for user in users:
+            invalidate_role_cache(user.pk)
+        cache.delete_many([auth_version_key(user.pk) for user in users])
+        forget_unknown_identifiers(
+            *(getattr(user, field) for user in users for field in UNIQUE_FIELDS)
+        )
+        return len(users)
+
+    def _copy(self, users):
+        """Stream the batch into PostgreSQL with COPY ... FROM STDIN."""
+        fields = [field for field in User._meta.concrete_fields if not field.primary_key]
+        buffer = io.StringIO()
+        for user in users:
+            buffer.write("\t".join(_copy_value(_db_value(field, user)) for field in fields))
+            buffer.write("\n")
+        buffer.seek(0)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f"COPY {connection.ops.quote_name(User._meta.db_table)} ({columns}) FROM STDIN",
+                buffer,
+            )
+
+
+def _db_value(field, user):
+    """The value bulk_create would insert (auto_now and defaults applied)."""
+    value = field.pre_save(user, add=True)
+    if isinstance(field, JSONField):
+        # COPY takes jsonb as plain JSON text, not the driver's adapter
+        return None if value is None else json.dumps(value, cls=field.encoder)
+    return field.get_db_prep_save(value, connection)
+
+
+def _copy_value(value):
+    """Encode a value for COPY's text format."""
+    if value is None:
+        return r"\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
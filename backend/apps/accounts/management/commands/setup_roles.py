@@ -2,6 +2,9 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 
+from apps.accounts.models import Capability
+from apps.accounts.policy import DEFAULT_GRANTS
+
 
 class Command(BaseCommand):
     help = "Setup default roles (groups) and permissions for the police system"
@@ -40,13 +43,17 @@ class Command(BaseCommand):
         self._assign_admin_permissions()
         self._assign_police_permissions()
         self._assign_judiciary_permissions()
+        self._assign_capability_permissions()
         
         self.stdout.write(self.style.SUCCESS("\nRole setup complete!"))
 
     def _assign_admin_permissions(self):
-        """Give Administrator all permissions."""
+        """Give Administrator all permissions (capabilities are granted separately)."""
         admin_group = Group.objects.get(name="Administrator")
-        all_permissions = Permission.objects.all()
+        all_permissions = Permission.objects.exclude(
+            content_type__app_label="accounts",
+            codename__in=Capability.values,
+        )
         admin_group.permissions.set(all_permissions)
         self.stdout.write("  Assigned all permissions to Administrator")
 
@@ -70,3 +77,20 @@ class Command(BaseCommand):
         )
         judge_group.permissions.set(judge_perms)
         self.stdout.write("  Assigned judiciary permissions to Judge")
+
+    def _assign_capability_permissions(self):
+        """Mirror the default policy grants onto role permissions."""
+        capability_perms = {
+            perm.codename: perm
+            for perm in Permission.objects.filter(
+                content_type__app_label="accounts",
+                codename__in=Capability.values,
+            )
+        }
+        for capability, roles in DEFAULT_GRANTS.items():
+            perm = capability_perms.get(capability.value)
+            if perm is None:
+                continue
+            for group in Group.objects.filter(name__in=roles):
+                group.permissions.add(perm)
+        self.stdout.write("  Assigned capability permissions to roles")
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'permissions': [('view_all_cases', 'Can view all cases'), ('approve_cases', 'Can approve crime scene cases'), ('report_crime_scene', 'Can register crime scenes'), ('send_to_trial', 'Can send cases to trial'), ('view_full_report', 'Can view full trial reports'), ('view_tip_queue', 'Can see tips awaiting officer review'), ('review_tips_as_officer', 'Can review tips as officer'), ('review_tips_as_detective', 'Can review tips as detective'), ('process_rewards', 'Can look up and pay out rewards'), ('police_staff', 'Counts as police staff')], 'verbose_name': 'User', 'verbose_name_plural': 'Users'},
+        ),
+    ]
@@ -1,10 +1,67 @@
+import time
 import uuid
 
 from django.contrib.auth.models import AbstractUser, Group, Permission, UserManager
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
 from apps.common.models import TimeStampedModel
 
+# Shared role cache: entries are keyed by user id and the global groups version,
+# so renaming/deleting a group invalidates every cached role set at once.
+ROLE_CACHE_TTL = 300
+GROUPS_VERSION_KEY = "accounts:groups_version"
+
+
+def get_groups_version():
+    """Return the current groups version, initialising it if missing."""
+    version = cache.get(GROUPS_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted key never revives older entries.
+        cache.add(GROUPS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(GROUPS_VERSION_KEY)
+    return version
+
+
+def bump_groups_version():
+    """Invalidate all cached role sets (e.g. after a group rename or delete)."""
+    try:
+        cache.incr(GROUPS_VERSION_KEY)
+    except ValueError:
+        get_groups_version()
+
+
+def role_cache_key(user_id):
+    return f"accounts:roles:{user_id}:{get_groups_version()}"
+
+
+def invalidate_role_cache(user_id):
+    """Drop the shared cached role set for a single user."""
+    cache.delete(role_cache_key(user_id))
+
+
+# Per-user auth version embedded in access tokens; bumping it revokes them.
+AUTH_VERSION_TTL = 60
+
+
+def auth_version_key(user_id):
+    return f"accounts:auth_version:{user_id}"
+
+
+def bump_auth_version(*user_ids):
+    """Revoke outstanding access tokens of the given users."""
+    if not user_ids:
+        return
+    User.objects.filter(pk__in=user_ids).update(
+        auth_version=F("auth_version") + 1, updated_at=timezone.now()
+    )
+    keys = [auth_version_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Drop anything re-cached from a not-yet-committed read as well.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
 
 class CustomUserManager(UserManager):
     """Auto-generate phone/national_id if not provided (useful for tests)."""
@@ -24,6 +81,25 @@ class CustomUserManager(UserManager):
         return super().create_superuser(username, email, password, **extra_fields)
 
 
+class Capability(models.TextChoices):
+    """
+    Authorization capabilities evaluated by apps.accounts.policy.
+    Values are permission codenames on the User model, so a role created
+    at runtime can be granted a capability through its permissions.
+    """
+    
+    VIEW_ALL_CASES = "view_all_cases", "Can view all cases"
+    APPROVE_CASES = "approve_cases", "Can approve crime scene cases"
+    REPORT_CRIME_SCENE = "report_crime_scene", "Can register crime scenes"
+    SEND_TO_TRIAL = "send_to_trial", "Can send cases to trial"
+    VIEW_FULL_REPORT = "view_full_report", "Can view full trial reports"
+    VIEW_TIP_QUEUE = "view_tip_queue", "Can see tips awaiting officer review"
+    REVIEW_TIPS_AS_OFFICER = "review_tips_as_officer", "Can review tips as officer"
+    REVIEW_TIPS_AS_DETECTIVE = "review_tips_as_detective", "Can review tips as detective"
+    PROCESS_REWARDS = "process_rewards", "Can look up and pay out rewards"
+    POLICE_STAFF = "police_staff", "Counts as police staff"
+
+
 class User(AbstractUser):
     """
     Custom User model with unique identifiers for multi-field authentication.
@@ -42,6 +118,8 @@ class User(AbstractUser):
     
     # Profile fields
     avatar = models.ImageField(upload_to="avatars/", null=True, blank=True)
+    # Thumbnail names, see apps.common.thumbnails
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Complaint tracking for 3-strike rule
     invalid_complaints_count = models.PositiveSmallIntegerField(default=0)
@@ -51,27 +129,74 @@ class User(AbstractUser):
     is_suspect = models.BooleanField(default=False)
     is_criminal = models.BooleanField(default=False)
     
+    # Bumped on role/status changes to reject access tokens issued before
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+    # Validator for conditional GETs of anything embedding the user
+    updated_at = models.DateTimeField(auto_now=True)
+    
     REQUIRED_FIELDS = ["email", "first_name", "last_name"]
 
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        permissions = Capability.choices
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.username})"
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # A user built from token claims (apps.accounts.authentication) has
+        # most fields deferred: load all of them on the first access rather
+        # than one query per field.
+        if fields is not None and getattr(self, "_load_deferred_together", False):
+            deferred = self.get_deferred_fields()
+            if set(fields) <= deferred:
+                fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+    def get_role_set(self) -> frozenset:
+        """
+        Return the set of role names for this user.
+        Cached on the instance (request lifetime) and in the shared cache.
+        """
+        roles = getattr(self, "_role_cache", None)
+        if roles is None:
+            roles = self._load_roles()
+            self._role_cache = roles
+        return roles
+
+    def _load_roles(self) -> frozenset:
+        prefetched = getattr(self, "_prefetched_objects_cache", {}).get("groups")
+        if prefetched is not None:
+            return frozenset(group.name for group in prefetched)
+        if self.pk is None:
+            return frozenset()
+        key = role_cache_key(self.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = frozenset(self.groups.values_list("name", flat=True))
+            cache.set(key, roles, ROLE_CACHE_TTL)
+        return roles
+
+    def clear_role_cache(self):
+        """Forget cached roles so the next check reloads them."""
+        self.__dict__.pop("_role_cache", None)
+        if self.pk is not None:
+            invalidate_role_cache(self.pk)
+
     def get_roles(self):
         """Return list of role names (groups) for this user."""
-        return list(self.groups.values_list("name", flat=True))
+        return sorted(self.get_role_set())
 
     def has_role(self, role_name: str) -> bool:
         """Check if user has a specific role."""
-        return self.groups.filter(name=role_name).exists()
+        return role_name in self.get_role_set()
 
     def add_role(self, role_name: str):
         """Add a role to this user."""
         group, _ = Group.objects.get_or_create(name=role_name)
         self.groups.add(group)
+        self.clear_role_cache()
 
     def remove_role(self, role_name: str):
         """Remove a role from this user."""
@@ -80,6 +205,7 @@ class User(AbstractUser):
             self.groups.remove(group)
         except Group.DoesNotExist:
             pass
+        self.clear_role_cache()
 
 
 class DefaultRoles:
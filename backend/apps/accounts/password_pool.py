@@ -0,0 +1,197 @@
+"""
+Bounded process pool for password verification on login.
+
+PBKDF2 verification is CPU bound and holds the GIL, so under a login burst
+every request thread in a worker queues behind it. With PASSWORD_POOL_SIZE
+set, hashes are verified in separate processes; request threads only wait
+on a future. At most PASSWORD_POOL_SIZE + PASSWORD_POOL_QUEUE_SIZE checks
+may be in flight per worker, beyond that logins fail fast with
+PasswordPoolBusy (rendered as 503 by LoginView).
+
+Hashes using outdated hasher parameters are upgraded in the background.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the verification queue is full or a check timed out."""
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _check(password, encoded):
+    return check_password(password, encoded)
+
+
+def _hash(password):
+    return make_password(password)
+
+
+class PasswordPool:
+    def __init__(self, size, queue_size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size + queue_size)
+        self._executor = ProcessPoolExecutor(
+            max_workers=size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy("Password verification queue is full.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._pending_lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+    def check(self, password, encoded):
+        future = self.submit(_check, password, encoded)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordPoolBusy("Password verification timed out.")
+
+    def rehash(self, user_id, password, old_encoded):
+        """Re-encode with the current hasher and store it, off the request path."""
+        try:
+            future = self.submit(_hash, password)
+        except PasswordPoolBusy:
+            return  # Retried on a later login
+
+        def save(f):
+            if f.exception() is None:
+                # Callbacks may run on a request thread; keep its DB connection out of it.
+                threading.Thread(
+                    target=_save_rehash,
+                    args=(user_id, old_encoded, f.result()),
+                    daemon=True,
+                ).start()
+
+        future.add_done_callback(save)
+
+    def wait(self):
+        """Block until all submitted hashing work has finished."""
+        while True:
+            with self._pending_lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            for future in pending:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _save_rehash(user_id, old_encoded, new_encoded):
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    try:
+        # Only replace the hash we verified; a concurrent password change wins.
+        User.objects.filter(pk=user_id, password=old_encoded).update(password=new_encoded)
+    except Exception:
+        logger.exception("Background password rehash failed for user %s", user_id)
+    finally:
+        connection.close()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return this process' pool, or None when verification runs inline."""
+    global _pool, _pool_pid
+    size = getattr(settings, "PASSWORD_POOL_SIZE", 0)
+    if size <= 0:
+        return None
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = PasswordPool(
+                size,
+                getattr(settings, "PASSWORD_POOL_QUEUE_SIZE", 32),
+                getattr(settings, "PASSWORD_POOL_TIMEOUT", 10),
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+def _must_update(encoded):
+    """Same upgrade rule as django.contrib.auth.hashers.check_password."""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher("default")
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def verify_password(user, password):
+    """
+    Check `password` against the user's stored hash.
+
+    Uses the pool when configured, otherwise User.check_password (which
+    rehashes inline). Raises PasswordPoolBusy when the pool is saturated.
+    """
+    pool = get_pool()
+    if pool is None:
+        return user.check_password(password)
+
+    encoded = user.password
+    if password is None or not encoded:
+        return False
+    if not pool.check(password, encoded):
+        return False
+    if _must_update(encoded):
+        pool.rehash(user.pk, password, encoded)
+    return True
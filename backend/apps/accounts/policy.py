@@ -0,0 +1,173 @@
+"""
+Role -> capability authorization policy.
+
+The matrix is compiled into integer bitsets: every role gets a bit, every
+capability a mask of the roles that hold it. A user's role set is folded
+into a single mask once, so an authorization check is one AND.
+
+Defaults are seeded from DefaultRoles. Once a role holds any capability
+permission (mirrored by `manage.py setup_roles`, or set through
+RoleViewSet), those permissions are its whole grant set, so grants can be
+revoked as well as added; changes are picked up when the groups version
+changes. A role with no capability permissions keeps the defaults.
+"""
+import time
+
+from django.contrib.auth.models import Permission
+from rest_framework.permissions import BasePermission
+
+from .models import Capability, DefaultRoles, get_groups_version
+
+# How often (seconds) a process re-reads the groups version to detect
+# role/permission changes made by other workers.
+POLICY_RECHECK_SECONDS = 1.0
+
+_OFFICER_RANKS = [
+    DefaultRoles.POLICE_OFFICER,
+    DefaultRoles.PATROL_OFFICER,
+    DefaultRoles.CHIEF,
+    DefaultRoles.CAPTAIN,
+    DefaultRoles.SERGEANT,
+]
+
+DEFAULT_GRANTS = {
+    Capability.VIEW_ALL_CASES: [DefaultRoles.JUDGE, DefaultRoles.CAPTAIN, DefaultRoles.CHIEF],
+    Capability.APPROVE_CASES: [DefaultRoles.CHIEF, DefaultRoles.CAPTAIN, DefaultRoles.SERGEANT],
+    Capability.REPORT_CRIME_SCENE: [
+        DefaultRoles.CHIEF,
+        DefaultRoles.CAPTAIN,
+        DefaultRoles.SERGEANT,
+        DefaultRoles.DETECTIVE,
+        DefaultRoles.POLICE_OFFICER,
+        DefaultRoles.PATROL_OFFICER,
+    ],
+    Capability.SEND_TO_TRIAL: [DefaultRoles.CAPTAIN, DefaultRoles.CHIEF],
+    Capability.VIEW_FULL_REPORT: [DefaultRoles.JUDGE, DefaultRoles.CAPTAIN, DefaultRoles.CHIEF],
+    Capability.VIEW_TIP_QUEUE: _OFFICER_RANKS,
+    Capability.REVIEW_TIPS_AS_OFFICER: _OFFICER_RANKS + [DefaultRoles.ADMINISTRATOR],
+    Capability.REVIEW_TIPS_AS_DETECTIVE: [DefaultRoles.DETECTIVE, DefaultRoles.ADMINISTRATOR],
+    Capability.PROCESS_REWARDS: _OFFICER_RANKS + [DefaultRoles.ADMINISTRATOR],
+    Capability.POLICE_STAFF: DefaultRoles.get_police_ranks(),
+}
+
+
+class Policy:
+    """Immutable compiled role -> capability matrix."""
+
+    def __init__(self, grants, version=None):
+        self.version = version
+        self.role_bits = {}
+        self.capability_masks = {}
+        for capability, roles in grants.items():
+            mask = 0
+            for role in roles:
+                if role not in self.role_bits:
+                    self.role_bits[role] = 1 << len(self.role_bits)
+                mask |= self.role_bits[role]
+            self.capability_masks[capability] = mask
+
+    def role_mask(self, roles):
+        """Fold a set of role names into a bitset; unknown roles add nothing."""
+        mask = 0
+        for role in roles:
+            mask |= self.role_bits.get(role, 0)
+        return mask
+
+    def allows(self, mask, capability):
+        return bool(mask & self.capability_masks.get(capability, 0))
+
+    def roles_with(self, capability):
+        """Role names holding a capability (e.g. for queryset filters)."""
+        mask = self.capability_masks.get(capability, 0)
+        return sorted(role for role, bit in self.role_bits.items() if bit & mask)
+
+
+def load_policy(version=None):
+    """
+    Compile the grants: a role's capability permissions when it has any,
+    otherwise its DEFAULT_GRANTS.
+    """
+    rows = list(
+        Permission.objects.filter(
+            content_type__app_label="accounts",
+            codename__in=Capability.values,
+            group__isnull=False,
+        ).values_list("codename", "group__name")
+    )
+    stored = {group_name for _, group_name in rows}
+    grants = {
+        capability: {role for role in roles if role not in stored}
+        for capability, roles in DEFAULT_GRANTS.items()
+    }
+    for codename, group_name in rows:
+        grants.setdefault(Capability(codename), set()).add(group_name)
+    return Policy(grants, version)
+
+
+_policy = Policy(DEFAULT_GRANTS)
+_checked_at = 0.0
+
+
+def get_policy():
+    """
+    Return the current policy, recompiling it when the groups version moved.
+    The version is only re-read every POLICY_RECHECK_SECONDS.
+    """
+    global _policy, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < POLICY_RECHECK_SECONDS:
+        return _policy
+    version = get_groups_version()
+    if version != _policy.version:
+        _policy = load_policy(version)
+    _checked_at = now
+    return _policy
+
+
+def reset_policy():
+    """Force the next get_policy() call to re-check the groups version."""
+    global _checked_at
+    _checked_at = 0.0
+
+
+def role_mask(user):
+    """Return the user's role bitset, memoized on the instance."""
+    policy = get_policy()
+    roles = user.get_role_set()
+    cached = getattr(user, "_role_mask", None)
+    if cached is not None and cached[0] is policy and cached[1] is roles:
+        return cached[2]
+    mask = policy.role_mask(roles)
+    user._role_mask = (policy, roles, mask)
+    return mask
+
+
+def has_capability(user, capability):
+    if not user or not user.is_authenticated:
+        return False
+    return get_policy().allows(role_mask(user), capability)
+
+
+class CapabilityPermission(BasePermission):
+    """DRF permission granting access to users holding `capability`."""
+
+    capability = None
+    allow_staff = True
+    message = {"error": "You do not have permission to perform this action."}
+
+    def has_permission(self, request, view):
+        user = request.user
+        if self.allow_staff and user and user.is_staff:
+            return True
+        return has_capability(user, self.capability)
+
+
+def capability_required(capability, message=None, allow_staff=True):
+    """
+    Build a permission class for a single capability, e.g.
+    @action(..., permission_classes=[IsAuthenticated, capability_required(...)]).
+    """
+    attrs = {"capability": capability, "allow_staff": allow_staff}
+    if message:
+        attrs["message"] = {"error": message}
+    return type(f"Requires_{capability}", (CapabilityPermission,), attrs)
@@ -1,8 +1,19 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
 from django.contrib.auth.password_validation import validate_password
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.common.thumbnails import ThumbnailField
+
+from .authentication import set_user_claims
+from .models import bump_auth_version
 
 User = get_user_model()
 
@@ -35,12 +46,13 @@ class UserSerializer(serializers.ModelSerializer):
     
     roles = serializers.SerializerMethodField()
     password = serializers.CharField(write_only=True, required=False)
+    avatar_thumb = ThumbnailField(source="avatar_variants")
 
     class Meta:
         model = User
         fields = [
             "id", "username", "email", "phone", "national_id",
-            "first_name", "last_name", "avatar", "roles",
+            "first_name", "last_name", "avatar", "avatar_thumb", "roles",
             "is_active", "is_staff", "date_joined", "password",
             "is_suspect", "is_criminal", "is_blocked_from_complaints",
         ]
@@ -62,11 +74,17 @@ class UserSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
+        revoke_tokens = bool(password) or any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in ("is_active", "is_staff")
+        )
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         if password:
             instance.set_password(password)
         instance.save()
+        if revoke_tokens:
+            bump_auth_version(instance.pk)
         return instance
 
 
@@ -123,6 +141,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     
     username_field = "identifier"
 
+    @classmethod
+    def get_token(cls, user):
+        return set_user_claims(super().get_token(user), user)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields["identifier"] = serializers.CharField()
@@ -137,7 +159,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         user = backend.authenticate(
             request=self.context.get("request"),
             username=identifier,
-            password=password
+            password=password,
+            use_pool=True,
         )
 
         if user is None:
@@ -155,6 +178,47 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         }
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh that re-issues role claims from the database. A refresh
+    token from before the user's last auth version bump (role, password,
+    is_active or is_staff change) is rejected like its access tokens.
+    """
+
+    default_error_messages = {
+        "token_revoked": _("Token has been revoked."),
+    }
+
+    def validate(self, attrs):
+        # As TokenRefreshSerializer.validate, checking the auth version
+        # before the old refresh token is blacklisted
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        if refresh.get("auth_version") != user.auth_version:
+            raise AuthenticationFailed(self.error_messages["token_revoked"], "token_revoked")
+
+        data = {"access": str(set_user_claims(refresh.access_token, user))}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # token_blacklist is not installed
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(set_user_claims(refresh, user))
+        return data
+
+
 class AssignRoleSerializer(serializers.Serializer):
     """Serializer for assigning roles to users."""
     
@@ -0,0 +1,94 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.common import thumbnails
+from .backends import forget_unknown_identifiers
+from .models import (
+    User,
+    auth_version_key,
+    bump_auth_version,
+    bump_groups_version,
+    invalidate_role_cache,
+)
+from .policy import reset_policy
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate cached role sets and revoke outstanding access tokens
+    (which embed the roles) when group membership changes.
+    """
+    if reverse and action == "pre_clear":
+        # group.user_set.clear() doesn't report which users were affected
+        instance._cleared_user_ids = list(instance.user_set.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        # user.groups.add/remove/set/clear
+        if action != "post_clear" and not pk_set:
+            return
+        instance.clear_role_cache()
+        user_ids = [instance.pk]
+    elif action == "post_clear":
+        user_ids = instance.__dict__.pop("_cleared_user_ids", [])
+    else:
+        # group.user_set.add/remove
+        user_ids = list(pk_set)
+
+    for user_id in user_ids:
+        invalidate_role_cache(user_id)
+    bump_auth_version(*user_ids)
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    """A new row never inherits a stale cache entry for a reused id."""
+    if created:
+        invalidate_role_cache(instance.pk)
+        cache.delete(auth_version_key(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def user_identifiers_saved(sender, instance, **kwargs):
+    """New or changed identifiers must not stay in the login negative cache."""
+    forget_unknown_identifiers(
+        instance.username, instance.email, instance.phone, instance.national_id
+    )
+
+
+@receiver(pre_save, sender=User)
+def keep_avatar_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        thumbnails.keep_variants(instance, "avatar", "avatar_variants", update_fields)
+
+
+@receiver(post_save, sender=User)
+def make_avatar_thumbnails(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        thumbnails.schedule(instance, "avatar", "avatar_variants", created=created)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        bump_groups_version()
+        reset_policy()
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump_groups_version()
+    reset_policy()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    """Recompile the authorization policy when a role's grants change."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_groups_version()
+        reset_policy()
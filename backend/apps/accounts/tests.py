@@ -1,11 +1,31 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.management import call_command
 from django.core.exceptions import ValidationError
-from rest_framework.test import APITestCase, APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from PIL import Image
+from rest_framework.test import APIRequestFactory, APITestCase, APIClient
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-from .models import DefaultRoles
+from .authentication import RoleClaimJWTAuthentication
+from .backends import MultiFieldAuthBackend, normalize_identifier
+from .password_pool import PasswordPool, shutdown_pool, verify_password
+from .models import Capability, DefaultRoles
+from .serializers import UserSerializer
+from .policy import get_policy, has_capability, reset_policy
 
 User = get_user_model()
 
@@ -118,6 +138,66 @@ class UserRoleManagementTestCase(TestCase):
         self.assertFalse(self.user.has_role("Captain"))
 
 
+class RoleCacheTestCase(TestCase):
+    """Test request-scoped and shared role caching."""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="cached",
+            email="cached@example.com",
+            password="pass123"
+        )
+        self.user.add_role("Sergeant")
+    
+    def test_repeated_checks_query_once(self):
+        """Many role checks on one instance cost a single query."""
+        cache.clear()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            for role in ["Police Officer", "Patrol Officer", "Chief", "Captain", "Sergeant"]:
+                user.has_role(role)
+            user.get_roles()
+    
+    def test_shared_cache_used_by_new_instance(self):
+        """A fresh instance of the same user reads roles from the shared cache."""
+        User.objects.get(pk=self.user.pk).get_roles()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_role("Sergeant"))
+    
+    def test_add_and_remove_role_invalidate(self):
+        """add_role/remove_role are visible immediately, also to other instances."""
+        self.assertFalse(self.user.has_role("Captain"))
+        self.user.add_role("Captain")
+        self.assertTrue(self.user.has_role("Captain"))
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_role("Captain"))
+        self.user.remove_role("Sergeant")
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_role("Sergeant"))
+    
+    def test_groups_set_invalidates(self):
+        """Direct m2m changes (e.g. assign_roles) invalidate the shared cache."""
+        User.objects.get(pk=self.user.pk).get_roles()
+        judge = Group.objects.create(name="Judge")
+        self.user.groups.set([judge])
+        self.assertEqual(User.objects.get(pk=self.user.pk).get_roles(), ["Judge"])
+    
+    def test_reverse_membership_change_invalidates(self):
+        """Adding users from the group side invalidates their cached roles."""
+        User.objects.get(pk=self.user.pk).get_roles()
+        chief = Group.objects.create(name="Chief")
+        chief.user_set.add(self.user)
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_role("Chief"))
+    
+    def test_group_rename_invalidates(self):
+        """Renaming a group invalidates every cached role set."""
+        User.objects.get(pk=self.user.pk).get_roles()
+        group = Group.objects.get(name="Sergeant")
+        group.name = "Staff Sergeant"
+        group.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).get_roles(), ["Staff Sergeant"])
+
+
 class UserMultiFieldAuthenticationTestCase(APITestCase):
     """Test login with different field types."""
     
@@ -200,6 +280,416 @@ class UserMultiFieldAuthenticationTestCase(APITestCase):
         self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_400_BAD_REQUEST])
 
 
+class IdentifierRoutingTestCase(TestCase):
+    """Test identifier classification in MultiFieldAuthBackend."""
+
+    def setUp(self):
+        cache.clear()
+        self.backend = MultiFieldAuthBackend()
+        self.user = User.objects.create_user(
+            username="routeuser",
+            email="route@example.com",
+            phone="09123456789",
+            national_id="1234567890",
+            password="testpass123"
+        )
+
+    def test_classification(self):
+        self.assertEqual(normalize_identifier("1234567890"), ("national_id", "1234567890"))
+        self.assertEqual(normalize_identifier("a@Example.com"), ("email", "a@example.com"))
+        self.assertEqual(normalize_identifier("+98 912 345 6789"), ("phone", "09123456789"))
+        self.assertEqual(normalize_identifier("۰۹۱۲۳۴۵۶۷۸۹"), ("phone", "09123456789"))
+        self.assertEqual(normalize_identifier("routeuser"), ("username", "routeuser"))
+
+    def test_each_identifier_is_one_query(self):
+        for identifier in ("routeuser", "route@example.com", "09123456789", "1234567890"):
+            with self.assertNumQueries(1):
+                user = self.backend.get_user_by_identifier(identifier)
+            self.assertEqual(user, self.user)
+
+    def test_normalized_fallback(self):
+        user = self.backend.authenticate(
+            None, username="+989123456789", password="testpass123"
+        )
+        self.assertEqual(user, self.user)
+
+    def test_numeric_username_falls_back_to_username(self):
+        other = User.objects.create_user(
+            username="0912000", email="num@example.com", password="testpass123"
+        )
+        self.assertEqual(self.backend.get_user_by_identifier("0912000"), other)
+
+    def test_unknown_identifier_is_negatively_cached(self):
+        self.assertIsNone(self.backend.get_user_by_identifier("ghost"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.backend.get_user_by_identifier("ghost"))
+
+        ghost = User.objects.create_user(
+            username="ghost", email="ghost@example.com", password="testpass123"
+        )
+        self.assertEqual(self.backend.get_user_by_identifier("ghost"), ghost)
+
+
+class PasswordPoolTestCase(APITestCase):
+    """Test login password verification through the process pool."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="pooluser", email="pool@example.com", password="testpass123"
+        )
+
+    def tearDown(self):
+        shutdown_pool()
+
+    def test_full_queue_returns_503(self):
+        pool = PasswordPool(1, 0, timeout=5)
+        pool._slots.acquire()  # Occupy the only slot
+        with mock.patch("apps.accounts.password_pool.get_pool", return_value=pool):
+            response = self.client.post('/api/v1/auth/login/', {
+                'identifier': 'pooluser',
+                'password': 'testpass123'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('error', response.data)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @override_settings(PASSWORD_POOL_SIZE=1)
+    def test_verifies_and_rehashes_in_background(self):
+        from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+
+        hasher = PBKDF2PasswordHasher()
+        old_encoded = hasher.encode("testpass123", hasher.salt(), iterations=1000)
+        self.user.password = old_encoded
+
+        saved = threading.Event()
+        calls = []
+
+        def record(*args):
+            calls.append(args)
+            saved.set()
+
+        with mock.patch("apps.accounts.password_pool._save_rehash", side_effect=record):
+            self.assertFalse(verify_password(self.user, "wrong"))
+            self.assertTrue(verify_password(self.user, "testpass123"))
+            self.assertTrue(saved.wait(timeout=30))
+
+        user_id, encoded, new_encoded = calls[0]
+        self.assertEqual((user_id, encoded), (self.user.pk, old_encoded))
+        self.assertTrue(check_password("testpass123", new_encoded))
+        self.assertFalse(hasher.must_update(new_encoded))
+
+
+class RoleClaimTokenTestCase(APITestCase):
+    """Test role claims and auth-version revocation in JWT access tokens."""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="officer",
+            email="officer@example.com",
+            password="testpass123"
+        )
+        self.user.add_role("Police Officer")
+        self.admin = User.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="testpass123",
+            is_staff=True,
+        )
+        self.captain_group = Group.objects.create(name="Captain")
+    
+    def _login(self):
+        response = self.client.post('/api/v1/auth/login/', {
+            'identifier': 'officer',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def _authenticate(self, access):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return RoleClaimJWTAuthentication().authenticate(request)
+    
+    def test_access_token_carries_roles_and_version(self):
+        """Login embeds roles and the auth version in the access token."""
+        token = AccessToken(self._login()['access'])
+        self.assertEqual(token['roles'], ['Police Officer'])
+        self.assertEqual(token['auth_version'], User.objects.get(pk=self.user.pk).auth_version)
+    
+    def test_authentication_skips_database_when_version_cached(self):
+        """With a cached auth version the user is built from claims alone."""
+        access = self._login()['access']
+        self._authenticate(access)
+        with self.assertNumQueries(0):
+            user, _ = self._authenticate(access)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertTrue(user.has_role('Police Officer'))
+            self.assertFalse(user.is_staff)
+    
+    def test_token_user_loads_deferred_fields_in_one_query(self):
+        access = self._login()['access']
+        self._authenticate(access)
+        user, _ = self._authenticate(access)
+        with self.assertNumQueries(1):
+            data = UserSerializer(user).data
+        self.assertEqual(data['email'], 'officer@example.com')
+        self.assertFalse(data['is_staff'])
+
+    def test_role_change_revokes_token(self):
+        """assign_roles bumps the auth version so the old token is rejected."""
+        access = self._login()['access']
+        self._authenticate(access)
+        
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            f'/api/v1/auth/users/{self.user.pk}/assign_roles/',
+            {'role_ids': [self.captain_group.pk]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.get('/api/v1/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_refresh_reissues_current_roles(self):
+        """Refreshing yields a token with the roles as they are now."""
+        tokens = self._login()
+        # Renaming a role does not revoke tokens
+        group = Group.objects.get(name='Police Officer')
+        group.name = 'Patrol Officer'
+        group.save()
+
+        response = self.client.post('/api/v1/auth/token/refresh/', {
+            'refresh': tokens['refresh']
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = response.data['access']
+        self.assertEqual(AccessToken(access)['roles'], ['Patrol Officer'])
+        self.assertEqual(RefreshToken(response.data['refresh'])['roles'], ['Patrol Officer'])
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        response = self.client.get('/api/v1/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'officer@example.com')
+
+    def _refresh(self, refresh):
+        return self.client.post('/api/v1/auth/token/refresh/', {'refresh': refresh}, format='json')
+
+    def test_refresh_rejected_after_role_change(self):
+        """A refresh token from before assign_roles cannot mint access tokens."""
+        refresh = self._login()['refresh']
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            f'/api/v1/auth/users/{self.user.pk}/assign_roles/',
+            {'role_ids': [self.captain_group.pk]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+
+        response = self._refresh(refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+    def test_refresh_rejected_after_password_change(self):
+        refresh = self._login()['refresh']
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.patch(
+            f'/api/v1/auth/users/{self.user.pk}/', {'password': 'newpass456'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+
+        self.assertEqual(self._refresh(refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        refresh = self.client.post('/api/v1/auth/login/', {
+            'identifier': 'officer',
+            'password': 'newpass456'
+        }, format='json').data['refresh']
+        self.assertEqual(self._refresh(refresh).status_code, status.HTTP_200_OK)
+
+
+class PolicyTestCase(APITestCase):
+    """Test the compiled role/capability policy."""
+
+    def setUp(self):
+        cache.clear()
+        reset_policy()
+        self.sergeant = User.objects.create_user(
+            username="sgt", email="sgt@example.com", password="pass123"
+        )
+        self.sergeant.add_role(DefaultRoles.SERGEANT)
+        self.cadet = User.objects.create_user(
+            username="cadet", email="cadet@example.com", password="pass123"
+        )
+        self.cadet.add_role(DefaultRoles.CADET)
+
+    def test_default_grants(self):
+        self.assertTrue(has_capability(self.sergeant, Capability.APPROVE_CASES))
+        self.assertFalse(has_capability(self.sergeant, Capability.SEND_TO_TRIAL))
+        self.assertFalse(has_capability(self.cadet, Capability.REPORT_CRIME_SCENE))
+        self.assertTrue(has_capability(self.cadet, Capability.POLICE_STAFF))
+        self.assertIn(
+            DefaultRoles.CADET, get_policy().roles_with(Capability.POLICE_STAFF)
+        )
+
+    def test_warm_check_runs_no_queries(self):
+        has_capability(self.sergeant, Capability.APPROVE_CASES)
+        with self.assertNumQueries(0):
+            for capability in Capability:
+                has_capability(self.sergeant, capability)
+
+    def test_role_created_at_runtime_takes_effect(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass123"
+        )
+        self.client.force_authenticate(user=admin)
+        perm = Permission.objects.get(
+            content_type__app_label="accounts", codename=Capability.APPROVE_CASES
+        )
+        response = self.client.post(
+            "/api/v1/auth/roles/",
+            {"name": "Forensic Lead", "permission_ids": [perm.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.create_user(
+            username="forensic", email="forensic@example.com", password="pass123"
+        )
+        user.add_role("Forensic Lead")
+        self.assertTrue(has_capability(user, Capability.APPROVE_CASES))
+
+        response = self.client.patch(
+            f"/api/v1/auth/roles/{response.data['id']}/",
+            {"permission_ids": []},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user = User.objects.get(pk=user.pk)
+        self.assertFalse(has_capability(user, Capability.APPROVE_CASES))
+
+    def test_default_grant_can_be_revoked(self):
+        call_command("setup_roles", stdout=StringIO())
+        sergeant = Group.objects.get(name=DefaultRoles.SERGEANT)
+        self.assertTrue(has_capability(self.sergeant, Capability.APPROVE_CASES))
+
+        sergeant.permissions.remove(Permission.objects.get(
+            content_type__app_label="accounts", codename=Capability.APPROVE_CASES
+        ))
+        user = User.objects.get(pk=self.sergeant.pk)
+        self.assertFalse(has_capability(user, Capability.APPROVE_CASES))
+        self.assertTrue(has_capability(user, Capability.REPORT_CRIME_SCENE))
+        # The rest of the mirrored grants are untouched
+        self.assertTrue(has_capability(self.cadet, Capability.POLICE_STAFF))
+
+
+class ImportUsersCommandTestCase(TestCase):
+    """Test the bulk import_users management command."""
+
+    HEADER = "username,email,phone,national_id,first_name,last_name,password,roles\n"
+
+    def setUp(self):
+        Group.objects.create(name=DefaultRoles.BASE_USER)
+        Group.objects.create(name=DefaultRoles.DETECTIVE)
+        User.objects.create_user(
+            username="existing", email="existing@example.com",
+            phone="09100000000", national_id="1000000000", password="pass123"
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        return path
+
+    def _import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, workers=1, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv_with_roles_and_duplicates(self):
+        path = self._write("users.csv", self.HEADER + (
+            "off1,off1@example.com,09111111111,2000000001,A,One,secret123,Detective\n"
+            "off2,off2@example.com,09111111112,2000000002,B,Two,,\n"
+            "dup,existing@example.com,09111111113,2000000003,C,Three,x,\n"
+            "dup2,dup2@example.com,09111111114,2000000001,D,Four,x,\n"
+            "bad,bad@example.com,09111111115,123,E,Five,x,\n"
+        ))
+        out, err = self._import(path, batch_size=2)
+
+        self.assertIn("Imported 2 users, rejected 3 rows", out)
+        self.assertIn("email 'existing@example.com' already exists", err)
+        self.assertIn("national_id '2000000001' already exists", err)
+        off1 = User.objects.get(username="off1")
+        self.assertTrue(off1.check_password("secret123"))
+        self.assertEqual(off1.get_roles(), [DefaultRoles.DETECTIVE])
+        off2 = User.objects.get(username="off2")
+        self.assertFalse(off2.has_usable_password())
+        self.assertEqual(off2.get_roles(), [DefaultRoles.BASE_USER])
+        self.assertFalse(os.path.exists(path + ".import-state"))
+
+    def test_import_ndjson_resumes_from_saved_progress(self):
+        rows = [
+            {"username": f"u{i}", "email": f"u{i}@example.com", "phone": f"0912000000{i}",
+             "national_id": f"300000000{i}", "first_name": "F", "last_name": "L",
+             "password": "pw12345"}
+            for i in range(4)
+        ]
+        path = self._write("users.ndjson", "\n".join(json.dumps(row) for row in rows))
+        with open(path + ".import-state", "w") as fh:
+            json.dump({"rows_done": 2, "created": 2, "rejected": 0}, fh)
+
+        out, _ = self._import(path)
+
+        self.assertIn("Resuming after row 2", out)
+        self.assertEqual(
+            sorted(User.objects.filter(username__startswith="u").values_list("username", flat=True)),
+            ["u2", "u3"],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "COPY is only used on PostgreSQL")
+    def test_import_with_copy(self):
+        path = self._write("users.csv", self.HEADER + (
+            "copy1,copy1@example.com,09131111111,4000000001,Tab\\there,One,secret123,Detective\n"
+            "copy2,copy2@example.com,09131111112,4000000002,B,Two,,\n"
+        ))
+        out, _ = self._import(path)
+
+        self.assertIn("Imported 2 users", out)
+        copy1 = User.objects.get(username="copy1")
+        self.assertEqual(copy1.first_name, "Tab\\there")
+        self.assertTrue(copy1.check_password("secret123"))
+        self.assertIsNotNone(copy1.updated_at)
+        self.assertEqual(copy1.avatar_variants, {})
+        self.assertEqual(copy1.get_roles(), [DefaultRoles.DETECTIVE])
+
+
+class AvatarThumbnailTestCase(TestCase):
+    def test_avatar_thumb(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        out = io.BytesIO()
+        Image.new("RGB", (600, 600), "navy").save(out, "JPEG")
+        with override_settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks(execute=True):
+                user = User.objects.create_user(
+                    username="pictured", email="pictured@example.com", password="pass123",
+                    avatar=SimpleUploadedFile("me.jpg", out.getvalue(), content_type="image/jpeg"),
+                )
+            self.assertIsNone(UserSerializer(user).data["avatar_thumb"])
+            user = User.objects.get(pk=user.pk)
+            self.assertRegex(
+                UserSerializer(user).data["avatar_thumb"],
+                r"avatars/me\.[0-9a-f]{16}\.160w\.webp$",
+            )
+
+
 class UserRegistrationTestCase(APITestCase):
     """Test user registration flow."""
     
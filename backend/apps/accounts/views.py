@@ -6,6 +6,9 @@ from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from apps.common.conditional import ConditionalGetMixin
+
+from .password_pool import PasswordPoolBusy
 from .serializers import (
     AssignRoleSerializer,
     CustomTokenObtainPairSerializer,
@@ -42,6 +45,16 @@ class LoginView(TokenObtainPairView):
     
     serializer_class = CustomTokenObtainPairSerializer
 
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except PasswordPoolBusy:
+            return Response(
+                {"error": "Too many login attempts in progress. Please retry shortly."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+
 
 class ProfileView(generics.RetrieveUpdateAPIView):
     """Get or update current user's profile."""
@@ -50,10 +63,11 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user may be built from token claims with most fields deferred
+        return User.objects.get(pk=self.request.user.pk)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Admin user management."""
     
     queryset = User.objects.all()
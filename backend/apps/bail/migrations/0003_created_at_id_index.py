@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bail', '0002_add_zibal_track_id'),
+        ('suspects', '0003_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bail',
+            index=models.Index(fields=['created_at', 'id'], name='bail_bail_created_02656c_idx'),
+        ),
+    ]
@@ -47,6 +47,9 @@ class Bail(TimeStampedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+        ]
         verbose_name = "Bail"
         verbose_name_plural = "Bails"
 
@@ -8,6 +8,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.pagination import OptInKeysetPagination
+
 from .models import Bail, BailStatus
 from .serializers import (
     BailCreateSerializer,
@@ -21,15 +24,17 @@ from .zibal_client import payment_start_url, request_payment, verify_payment
 BAIL_RETURN_URL_CACHE_TTL = 3600
 
 
-class BailViewSet(viewsets.ModelViewSet):
+class BailViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Bails: list (public), retrieve (public), create (Sergeant only).
     initiate_payment: POST with return_url -> Zibal request, returns payment_url (redirect to Zibal).
     confirm_payment: GET -> returns current bail status (payment is confirmed in Zibal callback).
     """
     permission_classes = [AllowAny]
+    pagination_class = OptInKeysetPagination
     filterset_fields = ["status", "suspect"]
     ordering_fields = ["created_at", "amount"]
+    conditional_related = {"list": ["suspect", "created_by"], "retrieve": ["suspect", "created_by"]}
 
     def get_queryset(self):
         return Bail.objects.select_related("suspect", "created_by").all()
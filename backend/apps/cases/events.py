@@ -0,0 +1,153 @@
+"""
+Live case events (detective board changes, new evidence) for SSE streams.
+
+Events are rows in the CaseEvent table, written in the same transaction as
+the change they describe and trimmed to the newest CASE_EVENT_LOG_SIZE per
+case. Clients resume with Last-Event-ID from that log.
+
+Once an event commits, the in-process broker wakes the streams of that case
+in this process. Streams also poll the log every CASE_EVENT_POLL_SECONDS,
+which picks up events written by other processes (the WSGI workers); a
+shared pub/sub such as Redis would only shorten that delay.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Subquery
+
+from .models import CaseEvent
+
+# Namespace for the per-case advisory lock (PostgreSQL)
+EVENT_LOCK_NAMESPACE = 4242
+BATCH_SIZE = 100
+
+
+class LocalBroker:
+    """Wakes the SSE streams of this process when a case has new events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, case_id):
+        wake = asyncio.Event()
+        subscription = (asyncio.get_running_loop(), wake)
+        with self._lock:
+            self._subscribers[case_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, case_id, subscription):
+        with self._lock:
+            self._subscribers[case_id].discard(subscription)
+            if not self._subscribers[case_id]:
+                del self._subscribers[case_id]
+
+    def publish(self, case_id):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(case_id, ()))
+        for loop, wake in subscriptions:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # the stream's loop is closed
+
+
+broker = LocalBroker()
+
+
+def publish_case_event(case_id, kind, payload):
+    """Log an event for `case_id`; streams see it once the transaction commits."""
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # Serialize event inserts per case until commit, so ids become
+            # visible in increasing order and a stream never skips one.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s, %s)", [EVENT_LOCK_NAMESPACE, case_id]
+                )
+        event = CaseEvent.objects.create(case_id=case_id, kind=kind, payload=payload)
+        boundary = (
+            CaseEvent.objects.filter(case_id=case_id)
+            .order_by("-id")
+            .values("id")[settings.CASE_EVENT_LOG_SIZE:settings.CASE_EVENT_LOG_SIZE + 1]
+        )
+        CaseEvent.objects.filter(case_id=case_id, id__lte=Subquery(boundary)).delete()
+    transaction.on_commit(lambda: broker.publish(case_id))
+    return event
+
+
+def format_event(event_id, kind, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    return f"id: {event_id}\nevent: {kind}\ndata: {payload}\n\n"
+
+
+def _events_after(case_id, last_event_id):
+    return list(
+        CaseEvent.objects.filter(case_id=case_id, id__gt=last_event_id)
+        .order_by("id")
+        .values_list("id", "kind", "payload")[:BATCH_SIZE]
+    )
+
+
+def _resume_point(case_id, last_event_id):
+    """
+    Return (last id to stream after, whether events may have been trimmed).
+    A fresh connection starts after the newest event.
+    """
+    log = CaseEvent.objects.filter(case_id=case_id)
+    if last_event_id is None:
+        newest = log.order_by("-id").values_list("id", flat=True).first()
+        return newest or 0, False
+    oldest = log.order_by("id").values_list("id", flat=True).first()
+    trimmed = (
+        oldest is not None
+        and last_event_id < oldest
+        and log.count() >= settings.CASE_EVENT_LOG_SIZE
+    )
+    return last_event_id, trimmed
+
+
+async def case_event_stream(case_id, last_event_id=None):
+    """Yield SSE frames for `case_id` until CASE_EVENT_STREAM_SECONDS elapse."""
+    yield f"retry: {settings.CASE_EVENT_RETRY_MS}\n\n"
+    last_event_id, trimmed = await sync_to_async(_resume_point)(case_id, last_event_id)
+    if trimmed:
+        # Too far behind for the bounded log: the client must reload the board
+        yield format_event(last_event_id, "reset", {})
+
+    loop_time = time.monotonic
+    deadline = loop_time() + settings.CASE_EVENT_STREAM_SECONDS
+    last_write = loop_time()
+    subscription = broker.subscribe(case_id)
+    wake = subscription[1]
+    try:
+        while True:
+            events = await sync_to_async(_events_after)(case_id, last_event_id)
+            for event_id, kind, payload in events:
+                yield format_event(event_id, kind, payload)
+                last_event_id = event_id
+                last_write = loop_time()
+            if len(events) == BATCH_SIZE:
+                continue
+
+            remaining = deadline - loop_time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(
+                    wake.wait(), timeout=min(settings.CASE_EVENT_POLL_SECONDS, remaining)
+                )
+                wake.clear()
+            except asyncio.TimeoutError:
+                if loop_time() - last_write >= settings.CASE_EVENT_HEARTBEAT_SECONDS:
+                    yield ": keepalive\n\n"
+                    last_write = loop_time()
+    finally:
+        broker.unsubscribe(case_id, subscription)
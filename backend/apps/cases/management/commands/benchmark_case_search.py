@@ -0,0 +1,92 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.cases.models import Case
+from apps.cases.views import CaseViewSet
+from apps.common.search import FullTextSearchFilter
+
+User = get_user_model()
+
+WORDS = (
+    "robbery burglary assault fraud homicide arson vandalism smuggling kidnapping "
+    "forgery bribery theft warehouse harbor station alley downtown suburb market "
+    "garage jewelry vehicle weapon witness motive alibi ledger shipment bridge "
+    "دزدی سرقت قتل کلاهبرداری خیابان بازار انبار شاهد اسلحه خودرو"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare case search latency with SearchFilter (ILIKE over "
+        "search_fields) and the full-text search backend. Benchmark data is "
+        "rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cases", type=int, default=1_000_000)
+        parser.add_argument("--samples", type=int, default=30)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(11)
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                "Full-text search needs PostgreSQL; only the ILIKE search is measured."
+            ))
+        with transaction.atomic():
+            self._seed(options["cases"], options["batch_size"])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            backends = {"ilike": SearchFilter()}
+            if connection.vendor == "postgresql":
+                backends["full_text"] = FullTextSearchFilter()
+            terms = [
+                " ".join(self.rng.sample(WORDS, self.rng.choice([1, 1, 2])))
+                for _ in range(options["samples"])
+            ]
+            for label, backend in backends.items():
+                timings = sorted(self._measure(backend, term) for term in terms)
+                self.stdout.write(
+                    f"{label:>9}: mean {statistics.mean(timings) * 1000:.1f} ms, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f} ms "
+                    f"(first page + count)"
+                )
+            transaction.set_rollback(True)
+
+    def _measure(self, backend, term):
+        request = Request(APIRequestFactory().get("/api/v1/cases/", {"search": term}))
+        started = time.perf_counter()
+        queryset = backend.filter_queryset(request, Case.objects.all(), CaseViewSet)
+        list(queryset[:20])
+        queryset.count()
+        return time.perf_counter() - started
+
+    def _seed(self, count, batch_size):
+        self.stdout.write(f"Seeding {count} cases...")
+        creator = User.objects.create(
+            username="searchbench", email="searchbench@bench.local",
+            phone="09700000000", national_id="7000000000",
+        )
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            Case.objects.bulk_create([
+                Case(
+                    case_number=f"SEARCH-{i:08d}",
+                    title=" ".join(self.rng.choices(WORDS, k=4)),
+                    summary=" ".join(self.rng.choices(WORDS, k=30)),
+                    crime_scene_location=" ".join(self.rng.choices(WORDS, k=2)),
+                    created_by=creator,
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+        self.stdout.write(f"  seeded {count} cases in {time.perf_counter() - started:.1f}s")
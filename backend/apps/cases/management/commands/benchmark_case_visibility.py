@@ -0,0 +1,156 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+
+from apps.accounts.models import Capability
+from apps.accounts.policy import has_capability
+from apps.cases.models import Case, CaseStatus, rebuild_case_access
+
+User = get_user_model()
+
+BENCH_ROLES = ["Detective", "Sergeant", "Police Officer", "Patrol Officer", "Cadet"]
+
+
+def legacy_case_queryset(user):
+    """The previous OR/JOIN/DISTINCT visibility query, kept for comparison."""
+    user_roles = user.get_roles()
+    q = (
+        models.Q(created_by=user) |
+        models.Q(lead_detective=user) |
+        models.Q(officers=user) |
+        models.Q(approved_by=user)
+    )
+    if has_capability(user, Capability.APPROVE_CASES):
+        q |= models.Q(status=CaseStatus.PENDING_APPROVAL)
+    if "Sergeant" in user_roles:
+        q |= models.Q(status=CaseStatus.SUSPECT_IDENTIFIED)
+        q |= models.Q(status=CaseStatus.INTERROGATION)
+    if "Captain" in user_roles:
+        q |= models.Q(status=CaseStatus.PENDING_CAPTAIN)
+        q |= models.Q(status=CaseStatus.INTERROGATION)
+    if "Chief" in user_roles:
+        q |= models.Q(status=CaseStatus.PENDING_CHIEF)
+    if "Judge" in user_roles:
+        q |= models.Q(status=CaseStatus.TRIAL)
+    if "Detective" in user_roles:
+        q |= models.Q(status=CaseStatus.CREATED)
+        q |= (models.Q(status=CaseStatus.INVESTIGATION) & models.Q(lead_detective=user))
+        q |= (models.Q(status=CaseStatus.SUSPECT_IDENTIFIED) & models.Q(lead_detective=user))
+        q |= (models.Q(status=CaseStatus.INTERROGATION) & models.Q(lead_detective=user))
+    return Case.objects.filter(q).distinct()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the legacy case visibility query with the CaseAccess "
+        "semi-join. Benchmark data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cases", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--samples", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(7)
+        with transaction.atomic():
+            users = self._seed_users(options["users"])
+            self._seed_cases(options["cases"], users, options["batch_size"])
+
+            started = time.perf_counter()
+            rows = rebuild_case_access(batch_size=options["batch_size"])
+            self.stdout.write(
+                f"  rebuilt {rows} access rows in {time.perf_counter() - started:.1f}s"
+            )
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            sample = [
+                User.objects.get(pk=user.pk)
+                for user in self.rng.sample(users, min(options["samples"], len(users)))
+            ]
+            mismatches = 0
+            timings = {"legacy": [], "case_access": []}
+            for user in sample:
+                legacy_ids, legacy_time = self._measure(legacy_case_queryset(user))
+                new_ids, new_time = self._measure(Case.objects.visible_to(user))
+                timings["legacy"].append(legacy_time)
+                timings["case_access"].append(new_time)
+                mismatches += legacy_ids != new_ids
+
+            for label, values in timings.items():
+                values.sort()
+                self.stdout.write(
+                    f"{label:>11}: mean {statistics.mean(values) * 1000:.1f} ms, "
+                    f"p95 {values[int(len(values) * 0.95) - 1] * 1000:.1f} ms "
+                    f"(first page + count)"
+                )
+            self.stdout.write(f"  result mismatches: {mismatches}")
+            transaction.set_rollback(True)
+
+    def _measure(self, queryset):
+        """Time a list page (first 25 rows) plus the total count."""
+        started = time.perf_counter()
+        ids = [case.pk for case in queryset[:25]]
+        count = queryset.count()
+        return (tuple(ids), count), time.perf_counter() - started
+
+    def _seed_users(self, count):
+        self.stdout.write(f"Seeding {count} users and cases...")
+        users = User.objects.bulk_create([
+            User(
+                username=f"casebench_{i}",
+                email=f"casebench_{i}@bench.local",
+                phone=f"098{i:08d}",
+                national_id=f"8{i:09d}",
+            )
+            for i in range(count)
+        ])
+        if users[0].pk is None:
+            users = list(User.objects.filter(username__startswith="casebench_"))
+        groups = {name: Group.objects.get_or_create(name=name)[0] for name in BENCH_ROLES}
+        Membership = User.groups.through
+        Membership.objects.bulk_create([
+            Membership(user_id=user.pk, group_id=groups[self.rng.choice(BENCH_ROLES)].pk)
+            for user in users
+        ])
+        return users
+
+    def _seed_cases(self, count, users, batch_size):
+        statuses = CaseStatus.values
+        user_ids = [user.pk for user in users]
+        Officers = Case.officers.through
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            cases = Case.objects.bulk_create([
+                Case(
+                    case_number=f"BENCH-{i:08d}",
+                    title=f"Benchmark case {i}",
+                    status=self.rng.choice(statuses),
+                    created_by_id=self.rng.choice(user_ids),
+                    lead_detective_id=self.rng.choice(user_ids) if self.rng.random() < 0.7 else None,
+                    approved_by_id=self.rng.choice(user_ids) if self.rng.random() < 0.3 else None,
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+            if cases[0].pk is None:
+                cases = list(Case.objects.filter(
+                    case_number__gte=f"BENCH-{offset:08d}",
+                    case_number__lt=f"BENCH-{offset + batch_size:08d}",
+                ))
+            Officers.objects.bulk_create(
+                [
+                    Officers(case_id=case.pk, user_id=user_id)
+                    for case in cases
+                    for user_id in self.rng.sample(user_ids, self.rng.randint(1, 2))
+                ],
+                ignore_conflicts=True,
+            )
+        self.stdout.write(f"  seeded {count} cases in {time.perf_counter() - started:.1f}s")
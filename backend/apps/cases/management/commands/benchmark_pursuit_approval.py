@@ -0,0 +1,98 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.cases.models import Case, CaseStatus
+from apps.suspects.models import CaseSuspect, Suspect, SuspectStatus
+
+User = get_user_model()
+
+
+def legacy_approve_suspects_for_pursuit(case):
+    """The previous per-suspect transitions and saves, kept for comparison."""
+    for link in case.suspect_links.select_related("suspect", "suspect__user").all():
+        suspect = link.suspect
+        if suspect.status == SuspectStatus.IDENTIFIED:
+            suspect.authorize_pursuit()
+            suspect.save()
+        elif suspect.status == SuspectStatus.UNDER_INVESTIGATION:
+            suspect.mark_wanted()
+            suspect.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-suspect pursuit approval with the set-based version on "
+        "one case. Benchmark data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--suspects", type=int, default=200)
+        parser.add_argument("--samples", type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            case = self._seed(options["suspects"])
+            for label, approve in (
+                ("per-suspect", legacy_approve_suspects_for_pursuit),
+                ("set-based", lambda case: case.approve_suspects_for_pursuit()),
+            ):
+                timings, queries = [], 0
+                for _ in range(options["samples"]):
+                    self._reset(case)
+                    with CaptureQueriesContext(connection) as ctx:
+                        started = time.perf_counter()
+                        approve(Case.objects.get(pk=case.pk))
+                        timings.append(time.perf_counter() - started)
+                    queries = len(ctx.captured_queries)
+                    pursued = Suspect.objects.filter(
+                        case_links__case=case, status=SuspectStatus.UNDER_PURSUIT
+                    ).count()
+                    assert pursued == options["suspects"], pursued
+                self.stdout.write(
+                    f"{label:>11}: mean {statistics.mean(timings) * 1000:.1f} ms, "
+                    f"max {max(timings) * 1000:.1f} ms, {queries} queries"
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, count):
+        self.stdout.write(f"Seeding a case with {count} suspects...")
+        creator = User.objects.create(
+            username="pursuitbench", email="pursuitbench@bench.local",
+            phone="09600000000", national_id="6000000000",
+        )
+        case = Case.objects.create(
+            case_number="PURSUIT-BENCH", title="Pursuit benchmark", created_by=creator,
+            status=CaseStatus.SUSPECT_IDENTIFIED,
+        )
+        users = User.objects.bulk_create([
+            User(
+                username=f"pursuitbench{i}", email=f"pursuitbench{i}@bench.local",
+                phone=f"0961{i:07d}", national_id=f"61{i:08d}",
+            )
+            for i in range(count)
+        ])
+        suspects = Suspect.objects.bulk_create([
+            Suspect(full_name=f"Suspect {i}", user=user) for i, user in enumerate(users)
+        ])
+        CaseSuspect.objects.bulk_create([
+            CaseSuspect(case=case, suspect=suspect) for suspect in suspects
+        ])
+        return case
+
+    def _reset(self, case):
+        """Half the suspects identified, half under investigation, as before approval."""
+        suspects = Suspect.objects.filter(case_links__case=case)
+        ids = sorted(suspects.values_list("pk", flat=True))
+        half = len(ids) // 2
+        Suspect.objects.filter(pk__in=ids[:half]).update(
+            status=SuspectStatus.IDENTIFIED, wanted_since=None
+        )
+        Suspect.objects.filter(pk__in=ids[half:]).update(
+            status=SuspectStatus.UNDER_INVESTIGATION, wanted_since=None
+        )
+        User.objects.filter(suspect_profile__in=ids).update(is_suspect=False)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.cases.models import rebuild_case_access
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized CaseAccess table from case creators, lead "
+        "detectives, approvers and officers (e.g. after bulk updates that "
+        "bypass signals)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            created = rebuild_case_access(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {created} case access rows in {time.perf_counter() - started:.1f}s."
+        ))
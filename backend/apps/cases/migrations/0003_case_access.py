@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_case_access(apps, schema_editor):
+    from apps.cases.models import rebuild_case_access
+
+    rebuild_case_access(
+        case_model=apps.get_model("cases", "Case"),
+        access_model=apps.get_model("cases", "CaseAccess"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0002_alter_crimescenewitness_national_id'),
+        ('complaints', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.CharField(choices=[('creator', 'Created the case'), ('lead_detective', 'Lead detective'), ('officer', 'Assigned officer'), ('approver', 'Approved the case')], max_length=20)),
+            ],
+            options={
+                'verbose_name_plural': 'Case access entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='case',
+            index=models.Index(fields=['status', '-created_at'], name='cases_case_status_f8be30_idx'),
+        ),
+        migrations.AddField(
+            model_name='caseaccess',
+            name='case',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_entries', to='cases.case'),
+        ),
+        migrations.AddField(
+            model_name='caseaccess',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='case_access', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='caseaccess',
+            unique_together={('user', 'case', 'reason')},
+        ),
+        migrations.RunPython(populate_case_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:04
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.common.search import drop_search_trigger, install_search_trigger
+
+
+TABLE = "cases_case"
+WEIGHTS = {
+    "case_number": "A",
+    "title": "A",
+    "summary": "B",
+    "crime_scene_location": "C",
+}
+
+
+def install_trigger(apps, schema_editor):
+    install_search_trigger(schema_editor, TABLE, WEIGHTS)
+
+
+def drop_trigger(apps, schema_editor):
+    drop_search_trigger(schema_editor, TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='case',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_trigger, drop_trigger),
+    ]
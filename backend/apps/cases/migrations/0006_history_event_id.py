@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0005_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casehistory',
+            name='event_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='casehistory',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_boards_to_table(apps, schema_editor):
+    Case = apps.get_model("cases", "Case")
+    DetectiveBoard = apps.get_model("cases", "DetectiveBoard")
+    boards = (
+        DetectiveBoard(case_id=pk, data=data)
+        for pk, data in Case.objects.exclude(detective_board={}).values_list(
+            "pk", "detective_board"
+        ).iterator()
+        if data
+    )
+    DetectiveBoard.objects.bulk_create(boards, batch_size=1000)
+
+
+def move_boards_to_cases(apps, schema_editor):
+    Case = apps.get_model("cases", "Case")
+    DetectiveBoard = apps.get_model("cases", "DetectiveBoard")
+    for board in DetectiveBoard.objects.iterator():
+        Case.objects.filter(pk=board.case_id).update(detective_board=board.data)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0006_history_event_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectiveBoard',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('case', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='board', serialize=False, to='cases.case')),
+                ('data', models.JSONField(blank=True, default=dict, help_text='Detective board layout data (positions, connections)')),
+                ('revision', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(move_boards_to_table, move_boards_to_cases),
+        migrations.RemoveField(
+            model_name='case',
+            name='detective_board',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0007_detective_board_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaseEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('board_patch', 'Board patched'), ('board_replace', 'Board replaced'), ('evidence_added', 'Evidence added')], max_length=30)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='cases.case')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['case', 'id'], name='cases_casee_case_id_0fbd4e_idx')],
+            },
+        ),
+    ]
@@ -1,10 +1,13 @@
 import uuid
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django_fsm import FSMField, transition
 
+from apps.common import audit
 from apps.common.models import TimeStampedModel, CrimeSeverity
-from apps.suspects.models import SuspectStatus
+from apps.suspects.models import Suspect, SuspectStatus
 
 
 class CaseStatus(models.TextChoices):
@@ -29,6 +32,73 @@ class CaseOrigin(models.TextChoices):
     CRIME_SCENE = "crime_scene", "From Crime Scene Report"
 
 
+# Statuses a role can see on cases it is not personally attached to.
+# Personal visibility (creator, lead detective, officer, approver) is
+# materialized in CaseAccess.
+ROLE_VISIBLE_STATUSES = {
+    "Sergeant": [CaseStatus.SUSPECT_IDENTIFIED, CaseStatus.INTERROGATION],
+    "Captain": [CaseStatus.PENDING_CAPTAIN, CaseStatus.INTERROGATION],
+    "Chief": [CaseStatus.PENDING_CHIEF],
+    "Judge": [CaseStatus.TRIAL],
+    "Detective": [CaseStatus.CREATED],
+}
+
+
+class CaseQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Cases a non-staff user may see: those they're attached to (via
+        CaseAccess) plus the statuses their roles review.
+        """
+        from apps.accounts.models import Capability
+        from apps.accounts.policy import has_capability
+
+        roles = user.get_role_set()
+        statuses = set()
+        for role in roles:
+            statuses.update(ROLE_VISIBLE_STATUSES.get(role, ()))
+        if has_capability(user, Capability.APPROVE_CASES):
+            statuses.add(CaseStatus.PENDING_APPROVAL)
+
+        q = models.Q(pk__in=CaseAccess.objects.filter(user=user).values("case_id"))
+        if statuses:
+            q |= models.Q(status__in=sorted(statuses))
+        return self.filter(q)
+
+    def start_interrogations(self, changed_by, notes="All suspects arrested"):
+        """
+        Move the cases of this queryset that are SUSPECT_IDENTIFIED and have
+        every suspect arrested to INTERROGATION: one grouped query finds
+        them, one UPDATE moves them and their history rows are recorded in
+        bulk. Returns the ids of the cases moved.
+        """
+        ready = list(
+            Case.objects.filter(pk__in=self.values("pk"), status=CaseStatus.SUSPECT_IDENTIFIED)
+            .annotate(not_arrested=models.Count(
+                "suspect_links",
+                filter=~models.Q(suspect_links__suspect__status=SuspectStatus.ARRESTED),
+            ))
+            .filter(not_arrested=0)
+            .values_list("pk", flat=True)
+        )
+        if not ready:
+            return []
+        Case.objects.filter(pk__in=ready, status=CaseStatus.SUSPECT_IDENTIFIED).update(
+            status=CaseStatus.INTERROGATION, updated_at=timezone.now()
+        )
+        audit.record(*(
+            CaseHistory(
+                case_id=pk,
+                from_status=CaseStatus.SUSPECT_IDENTIFIED,
+                to_status=CaseStatus.INTERROGATION,
+                changed_by=changed_by,
+                notes=notes,
+            )
+            for pk in ready
+        ))
+        return ready
+
+
 class Case(TimeStampedModel):
     """
     Case model with state machine for investigation workflow.
@@ -99,16 +169,17 @@ class Case(TimeStampedModel):
     # Crime scene details (for crime scene origin)
     crime_scene_time = models.DateTimeField(null=True, blank=True)
     crime_scene_location = models.CharField(max_length=255, blank=True)
-    
-    # Detective Board data (stored as JSON for flexibility)
-    detective_board = models.JSONField(
-        default=dict,
-        blank=True,
-        help_text="Detective board layout data (positions, connections)"
-    )
+    # Maintained by a database trigger, see apps.common.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CaseQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "-created_at"]),
+            models.Index(fields=["created_at", "id"]),
+        ]
         permissions = [
             ("can_create_from_crime_scene", "Can create case from crime scene"),
             ("can_approve_case", "Can approve cases"),
@@ -124,6 +195,7 @@ class Case(TimeStampedModel):
         if not self.case_number:
             self.case_number = self._generate_case_number()
         super().save(*args, **kwargs)
+        self.clear_readiness()
 
     def _generate_case_number(self):
         """Generate unique case number: CASE-YYYYMMDD-XXXX"""
@@ -133,37 +205,75 @@ class Case(TimeStampedModel):
         return f"CASE-{date_str}-{short_uuid}"
 
     # Helper methods for transition conditions
+    def readiness(self):
+        """
+        Every transition precondition from one aggregate over the case's
+        suspects and trial. Memoized until the case is saved (or
+        clear_readiness() is called), so conditions checked by django-fsm and
+        again inside a transition share a single query.
+        """
+        if getattr(self, "_readiness", None) is not None:
+            return self._readiness
+        suspect = "suspect_links__suspect__"
+        counts = Case.objects.filter(pk=self.pk).aggregate(
+            suspects=models.Count("suspect_links"),
+            missing_scores=models.Count("suspect_links", filter=(
+                models.Q(**{f"{suspect}detective_guilt_score__isnull": True})
+                | models.Q(**{f"{suspect}sergeant_guilt_score__isnull": True})
+            )),
+            missing_captain=models.Count(
+                "suspect_links", filter=models.Q(**{f"{suspect}captain_decision": ""})
+            ),
+            missing_chief=models.Count(
+                "suspect_links", filter=models.Q(**{f"{suspect}chief_decision": ""})
+            ),
+            not_arrested=models.Count(
+                "suspect_links", filter=~models.Q(**{f"{suspect}status": SuspectStatus.ARRESTED})
+            ),
+            clearable=models.Count("suspect_links", filter=models.Q(**{
+                f"{suspect}status__in": [
+                    SuspectStatus.IDENTIFIED, SuspectStatus.UNDER_INVESTIGATION,
+                ]
+            })),
+            verdicts=models.Count("trial", filter=models.Q(trial__verdict__isnull=False)),
+        )
+        has_suspects = counts["suspects"] > 0
+        self._readiness = {
+            "suspect_count": counts["suspects"],
+            "has_suspects": has_suspects,
+            "has_guilt_scores": has_suspects and counts["missing_scores"] == 0,
+            "has_captain_decision": has_suspects and counts["missing_captain"] == 0,
+            "has_chief_decision_if_critical": (
+                self.crime_severity != CrimeSeverity.CRITICAL or counts["missing_chief"] == 0
+            ),
+            "all_suspects_arrested": counts["not_arrested"] == 0,
+            "has_clearable_suspects": counts["clearable"] > 0,
+            "has_trial_verdict": counts["verdicts"] > 0,
+        }
+        return self._readiness
+
+    def clear_readiness(self):
+        self._readiness = None
+
     def has_suspects(self):
         """Check that at least one suspect is linked to this case."""
-        return self.suspect_links.exists()
+        return self.readiness()["has_suspects"]
 
     def has_guilt_scores(self):
         """Check that all suspects have both detective and sergeant guilt scores."""
-        for link in self.suspect_links.select_related("suspect").all():
-            s = link.suspect
-            if s.detective_guilt_score is None or s.sergeant_guilt_score is None:
-                return False
-        return self.suspect_links.exists()
+        return self.readiness()["has_guilt_scores"]
 
     def has_captain_decision(self):
         """Check that captain decision exists for all suspects."""
-        for link in self.suspect_links.select_related("suspect").all():
-            if not link.suspect.captain_decision:
-                return False
-        return self.suspect_links.exists()
+        return self.readiness()["has_captain_decision"]
 
     def has_chief_decision_if_critical(self):
         """For critical crimes, check chief decision exists."""
-        if self.crime_severity != CrimeSeverity.CRITICAL:
-            return True
-        for link in self.suspect_links.select_related("suspect").all():
-            if not link.suspect.chief_decision:
-                return False
-        return True
+        return self.readiness()["has_chief_decision_if_critical"]
 
     def has_trial_verdict(self):
         """Check that the trial has a verdict."""
-        return hasattr(self, "trial") and self.trial.verdict is not None
+        return self.readiness()["has_trial_verdict"]
 
     # State transitions
     @transition(
@@ -212,16 +322,9 @@ class Case(TimeStampedModel):
     def approve_suspects_for_pursuit(self):
         """
         Sergeant approved: move all case suspects from IDENTIFIED (or UNDER_INVESTIGATION) to UNDER_PURSUIT.
-        Case stays SUSPECT_IDENTIFIED.
+        Case stays SUSPECT_IDENTIFIED. Returns the number of suspects moved.
         """
-        for link in self.suspect_links.select_related("suspect").all():
-            suspect = link.suspect
-            if suspect.status == SuspectStatus.IDENTIFIED:
-                suspect.authorize_pursuit()
-                suspect.save()
-            elif suspect.status == SuspectStatus.UNDER_INVESTIGATION:
-                suspect.mark_wanted()
-                suspect.save()
+        return Suspect.objects.filter(case_links__case=self).start_pursuit()
 
     def maybe_start_interrogation(self):
         """
@@ -229,10 +332,8 @@ class Case(TimeStampedModel):
         """
         if self.status != CaseStatus.SUSPECT_IDENTIFIED:
             return
-        for link in self.suspect_links.select_related("suspect").all():
-            if link.suspect.status != SuspectStatus.ARRESTED:
-                return
-        self.start_interrogation()
+        if self.readiness()["all_suspects_arrested"]:
+            self.start_interrogation()
 
     @transition(
         field=status,
@@ -326,11 +427,15 @@ class Case(TimeStampedModel):
     )
     def close_unsolved(self):
         """Close case as unsolved. Clears suspects that were only identified."""
-        for link in self.suspect_links.select_related("suspect").all():
+        if not self.readiness()["has_clearable_suspects"]:
+            return
+        links = self.suspect_links.select_related("suspect__user").filter(
+            suspect__status__in=[SuspectStatus.IDENTIFIED, SuspectStatus.UNDER_INVESTIGATION]
+        )
+        for link in links:
             suspect = link.suspect
-            if suspect.status in ("identified", "under_investigation"):
-                suspect.clear()
-                suspect.save()
+            suspect.clear()
+            suspect.save()
 
 
 class CaseHistory(TimeStampedModel):
@@ -349,6 +454,10 @@ class CaseHistory(TimeStampedModel):
         null=True,
     )
     notes = models.TextField(blank=True)
+    # Set when the event is recorded, not when the buffered row is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Lets apps.common.audit replay spooled events without duplicates
+    event_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
@@ -358,6 +467,171 @@ class CaseHistory(TimeStampedModel):
         return f"{self.case.case_number}: {self.from_status} → {self.to_status}"
 
 
+class DetectiveBoard(TimeStampedModel):
+    """
+    Detective board layout of a case, kept out of the case row so case
+    reads don't load it. `revision` increases on every change and is the
+    ETag used to detect concurrent edits.
+    """
+
+    case = models.OneToOneField(
+        Case,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="board",
+    )
+    data = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Detective board layout data (positions, connections)"
+    )
+    revision = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Board of case {self.case_id} (rev {self.revision})"
+
+
+class CaseEventKind(models.TextChoices):
+    BOARD_PATCH = "board_patch", "Board patched"
+    BOARD_REPLACE = "board_replace", "Board replaced"
+    EVIDENCE_ADDED = "evidence_added", "Evidence added"
+
+
+class CaseEvent(models.Model):
+    """
+    Bounded log of live case events streamed over SSE (see apps.cases.events).
+    The id is the SSE event id clients resume from with Last-Event-ID.
+    """
+
+    case = models.ForeignKey(
+        Case,
+        on_delete=models.CASCADE,
+        related_name="events",
+    )
+    kind = models.CharField(max_length=30, choices=CaseEventKind.choices)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["case", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} (case {self.case_id})"
+
+
+class CaseAccessReason(models.TextChoices):
+    """Why a user is personally attached to a case."""
+
+    CREATOR = "creator", "Created the case"
+    LEAD_DETECTIVE = "lead_detective", "Lead detective"
+    OFFICER = "officer", "Assigned officer"
+    APPROVER = "approver", "Approved the case"
+
+
+class CaseAccess(models.Model):
+    """
+    Materialized user -> case visibility, maintained by apps.cases.signals
+    from created_by, lead_detective, officers and approved_by.
+    Rebuild with `manage.py rebuild_case_access`.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="case_access",
+    )
+    case = models.ForeignKey(
+        Case,
+        on_delete=models.CASCADE,
+        related_name="access_entries",
+    )
+    reason = models.CharField(max_length=20, choices=CaseAccessReason.choices)
+
+    class Meta:
+        unique_together = ["user", "case", "reason"]
+        verbose_name_plural = "Case access entries"
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.case_id} ({self.reason})"
+
+
+# Case columns materialized as CaseAccess rows
+CASE_ACCESS_FIELDS = {
+    CaseAccessReason.CREATOR: "created_by_id",
+    CaseAccessReason.LEAD_DETECTIVE: "lead_detective_id",
+    CaseAccessReason.APPROVER: "approved_by_id",
+}
+
+
+def sync_case_access(case):
+    """Bring a case's creator/lead/approver access rows in line with its columns."""
+    wanted = {
+        (getattr(case, attname), reason)
+        for reason, attname in CASE_ACCESS_FIELDS.items()
+        if getattr(case, attname) is not None
+    }
+    existing = set(
+        CaseAccess.objects.filter(case=case, reason__in=CASE_ACCESS_FIELDS)
+        .values_list("user_id", "reason")
+    )
+    stale = existing - wanted
+    if stale:
+        stale_q = models.Q()
+        for user_id, reason in stale:
+            stale_q |= models.Q(user_id=user_id, reason=reason)
+        CaseAccess.objects.filter(stale_q, case=case).delete()
+    if wanted - existing:
+        CaseAccess.objects.bulk_create(
+            [
+                CaseAccess(user_id=user_id, case=case, reason=reason)
+                for user_id, reason in wanted - existing
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild_case_access(batch_size=10_000, case_model=None, access_model=None):
+    """
+    Recreate every CaseAccess row from the case columns and officers.
+    Models may be passed in to run from a data migration.
+    """
+    case_model = case_model or Case
+    access_model = access_model or CaseAccess
+    officers_through = case_model.officers.through
+
+    access_model.objects.all().delete()
+
+    def rows():
+        for reason, attname in CASE_ACCESS_FIELDS.items():
+            pairs = (
+                case_model.objects.exclude(**{attname: None})
+                .order_by()
+                .values_list("pk", attname)
+            )
+            for case_id, user_id in pairs.iterator(chunk_size=batch_size):
+                yield access_model(case_id=case_id, user_id=user_id, reason=str(reason))
+        pairs = officers_through.objects.order_by().values_list("case_id", "user_id")
+        for case_id, user_id in pairs.iterator(chunk_size=batch_size):
+            yield access_model(
+                case_id=case_id, user_id=user_id, reason=str(CaseAccessReason.OFFICER)
+            )
+
+    created = 0
+    batch = []
+    for row in rows():
+        batch.append(row)
+        if len(batch) >= batch_size:
+            access_model.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    if batch:
+        access_model.objects.bulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
 class CrimeSceneWitness(TimeStampedModel):
     """Witnesses recorded at crime scene."""
     
@@ -3,7 +3,8 @@ from rest_framework import serializers
 
 from apps.accounts.serializers import UserSerializer
 from apps.common.models import CrimeSeverity
-from apps.complaints.serializers import ComplaintSerializer
+from apps.complaints.serializers import COMPLAINT_SERIALIZER_RELATED, ComplaintSerializer
+from apps.suspects.models import CaseSuspect
 from .models import Case, CaseHistory, CaseOrigin, CrimeSceneWitness
 
 User = get_user_model()
@@ -58,7 +59,6 @@ class CaseSerializer(serializers.ModelSerializer):
         fields = [
             "id", "case_number", "title", "summary", "status", "origin",
             "crime_severity", "crime_scene_time", "crime_scene_location",
-            "detective_board",
             "created_by", "approved_by", "lead_detective",
             "officers", "officer_ids",
             "origin_complaint", "origin_complaint_id",
@@ -82,6 +82,50 @@ class CaseSerializer(serializers.ModelSerializer):
         return case
 
 
+# Relation paths (from a case) whose rows CaseSerializer renders; used for
+# conditional GET validators. Officer membership is tracked through
+# CaseAccess rows, which are replaced (new ids) when officers change.
+CASE_SERIALIZER_RELATED = (
+    "created_by", "approved_by", "lead_detective",
+    "officers", "access_entries",
+    "history", "history__changed_by",
+    "witnesses", "witnesses__user",
+    "origin_complaint",
+    *(f"origin_complaint__{path}" for path in COMPLAINT_SERIALIZER_RELATED),
+)
+
+
+class CaseListSerializer(serializers.ModelSerializer):
+    """
+    Flat case representation for list responses: related users and the
+    origin complaint as ids, officers/witnesses/suspects as counts.
+    Expects the queryset from CaseViewSet (officer ids prefetched, counts
+    annotated).
+    """
+
+    officer_ids = serializers.SerializerMethodField()
+    officer_count = serializers.SerializerMethodField()
+    witness_count = serializers.IntegerField(read_only=True)
+    suspect_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Case
+        fields = [
+            "id", "case_number", "title", "status", "origin",
+            "crime_severity", "crime_scene_time", "crime_scene_location",
+            "created_by", "approved_by", "lead_detective", "origin_complaint",
+            "officer_ids", "officer_count", "witness_count", "suspect_count",
+            "created_at", "updated_at",
+        ]
+        read_only_fields = fields
+
+    def get_officer_ids(self, obj):
+        return [officer.pk for officer in obj.officers.all()]
+
+    def get_officer_count(self, obj):
+        return len(obj.officers.all())
+
+
 class CaseTransitionSerializer(serializers.Serializer):
     """Serializer for case state transitions."""
     
@@ -94,6 +138,20 @@ class CaseTransitionSerializer(serializers.Serializer):
         return value
 
 
+class CaseBulkTransitionSerializer(serializers.Serializer):
+    """Serializer for applying one transition to many cases."""
+
+    MAX_CASES = 500
+
+    transition = serializers.CharField()
+    case_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_CASES,
+    )
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
 class CrimeSceneCaseSerializer(serializers.Serializer):
     """Serializer for creating case from crime scene."""
     
@@ -105,6 +163,26 @@ class CrimeSceneCaseSerializer(serializers.Serializer):
     witnesses = CrimeSceneWitnessSerializer(many=True, required=False)
 
 
+class AddCaseSuspectSerializer(serializers.Serializer):
+    """Serializer for linking an existing suspect to a case or creating one."""
+
+    suspect_id = serializers.IntegerField(required=False, min_value=1)
+    link_match = serializers.BooleanField(default=False)
+    full_name = serializers.CharField(max_length=255, required=False)
+    aliases = serializers.CharField(max_length=500, required=False, allow_blank=True, default="")
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    last_known_location = serializers.CharField(
+        max_length=255, required=False, allow_blank=True, default=""
+    )
+    role = serializers.ChoiceField(choices=CaseSuspect.Role.choices, default=CaseSuspect.Role.PRIMARY)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate(self, data):
+        if "suspect_id" not in data and not data.get("full_name"):
+            raise serializers.ValidationError({"full_name": "This field is required."})
+        return data
+
+
 class DetectiveBoardSerializer(serializers.Serializer):
     """Serializer for detective board updates."""
     
@@ -118,3 +196,13 @@ class DetectiveBoardSerializer(serializers.Serializer):
         default=list,
         help_text="Connections between notes (red lines) [{id, from, to, type}]"
     )
+
+    def validate_notes(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Notes must be a list.")
+        return value
+
+    def validate_connections(self, value):
+        if not isinstance(value, list):
+            raise serializers.ValidationError("Connections must be a list.")
+        return value
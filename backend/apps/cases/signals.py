@@ -0,0 +1,48 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from .events import publish_case_event
+from .models import Case, CaseAccess, CaseAccessReason, CaseEventKind, sync_case_access
+
+
+@receiver(post_save, sender=Case)
+def case_saved(sender, instance, raw=False, **kwargs):
+    """Keep creator / lead detective / approver access rows current."""
+    if not raw:
+        sync_case_access(instance)
+
+
+@receiver(m2m_changed, sender=Case.officers.through)
+def case_officers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Mirror case.officers (or user.cases_assigned) into CaseAccess."""
+    officer_rows = CaseAccess.objects.filter(reason=CaseAccessReason.OFFICER)
+    owner = {"user": instance} if reverse else {"case": instance}
+
+    if action == "post_add" and pk_set:
+        other = "case_id" if reverse else "user_id"
+        CaseAccess.objects.bulk_create(
+            [
+                CaseAccess(reason=CaseAccessReason.OFFICER, **owner, **{other: pk})
+                for pk in pk_set
+            ],
+            ignore_conflicts=True,
+        )
+    elif action == "post_remove" and pk_set:
+        other = "case_id__in" if reverse else "user_id__in"
+        officer_rows.filter(**owner, **{other: pk_set}).delete()
+    elif action == "post_clear":
+        officer_rows.filter(**owner).delete()
+
+
+@receiver(post_save, sender="evidence.Evidence")
+def evidence_added(sender, instance, created, raw=False, **kwargs):
+    """Announce new evidence to the case's event stream (detective board)."""
+    if not created or raw:
+        return
+    publish_case_event(instance.case_id, CaseEventKind.EVIDENCE_ADDED, {
+        "id": instance.pk,
+        "title": instance.title,
+        "description": instance.description,
+        "evidence_type": instance.evidence_type,
+        "status": instance.status,
+    })
@@ -0,0 +1,874 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    Case, CaseAccess, CaseAccessReason, CaseHistory, CaseStatus, CrimeSceneWitness,
+    CaseEventKind, DetectiveBoard,
+)
+from .events import case_event_stream, publish_case_event
+from apps.common import audit
+from apps.common.models import CrimeSeverity
+from apps.common.search import to_tsquery
+from apps.complaints.models import Complaint, ComplaintHistory
+from apps.suspects.models import PURSUIT_SOURCES, CaseSuspect, Suspect, SuspectStatus
+
+User = get_user_model()
+
+
+class CaseAccessMaintenanceTestCase(TestCase):
+    """Test that CaseAccess follows case columns and officers."""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', email='creator@example.com', password='pass123'
+        )
+        self.detective = User.objects.create_user(
+            username='detective', email='detective@example.com', password='pass123'
+        )
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='pass123'
+        )
+        self.case = Case.objects.create(
+            title="Access Case",
+            created_by=self.creator,
+            crime_severity=CrimeSeverity.LEVEL_2,
+        )
+
+    def _access(self):
+        return set(
+            CaseAccess.objects.filter(case=self.case).values_list('user__username', 'reason')
+        )
+
+    def test_creator_and_lead_detective_rows(self):
+        self.assertEqual(self._access(), {('creator', CaseAccessReason.CREATOR)})
+
+        self.case.lead_detective = self.detective
+        self.case.save()
+        self.assertIn(('detective', CaseAccessReason.LEAD_DETECTIVE), self._access())
+
+        self.case.lead_detective = None
+        self.case.save()
+        self.assertEqual(self._access(), {('creator', CaseAccessReason.CREATOR)})
+
+    def test_officer_rows_follow_m2m(self):
+        self.case.officers.add(self.officer, self.detective)
+        self.assertIn(('officer', CaseAccessReason.OFFICER), self._access())
+
+        self.case.officers.remove(self.officer)
+        self.assertNotIn(('officer', CaseAccessReason.OFFICER), self._access())
+        self.assertIn(('detective', CaseAccessReason.OFFICER), self._access())
+
+        self.detective.cases_assigned.clear()
+        self.assertEqual(self._access(), {('creator', CaseAccessReason.CREATOR)})
+
+    def test_rebuild_command(self):
+        self.case.officers.add(self.officer)
+        expected = self._access()
+        CaseAccess.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_case_access', stdout=out)
+
+        self.assertEqual(self._access(), expected)
+        self.assertIn('Rebuilt 2 case access rows', out.getvalue())
+
+
+class CaseVisibilityTestCase(APITestCase):
+    """Test case list visibility for non-staff users."""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', email='creator@example.com', password='pass123'
+        )
+        self.sergeant = User.objects.create_user(
+            username='sergeant', email='sergeant@example.com', password='pass123'
+        )
+        self.sergeant.add_role('Sergeant')
+        self.detective = User.objects.create_user(
+            username='detective', email='detective@example.com', password='pass123'
+        )
+        self.detective.add_role('Detective')
+        self.outsider = User.objects.create_user(
+            username='outsider', email='outsider@example.com', password='pass123'
+        )
+
+        self.investigation = Case.objects.create(
+            title="Investigation", created_by=self.creator,
+            status=CaseStatus.INVESTIGATION, lead_detective=self.detective,
+        )
+        self.interrogation = Case.objects.create(
+            title="Interrogation", created_by=self.creator,
+            status=CaseStatus.INTERROGATION,
+        )
+        self.created = Case.objects.create(
+            title="Created", created_by=self.creator, status=CaseStatus.CREATED,
+        )
+
+    def _visible(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/api/v1/cases/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data.get('results', response.data)
+        return {case['title'] for case in results}
+
+    def test_creator_sees_own_cases(self):
+        self.assertEqual(
+            self._visible(self.creator), {"Investigation", "Interrogation", "Created"}
+        )
+
+    def test_role_statuses_and_lead_detective(self):
+        self.assertEqual(self._visible(self.sergeant), {"Interrogation"})
+        self.assertEqual(self._visible(self.detective), {"Investigation", "Created"})
+
+    def test_outsider_sees_nothing(self):
+        self.assertEqual(self._visible(self.outsider), set())
+
+
+class CaseQueryCountTestCase(APITestCase):
+    """Pin the number of queries for case list and detail responses."""
+
+    # Conditional GET validator, case + nested users, 6 group prefetches for
+    # them, then officers, history, witnesses, complainants, complaint
+    # history (+ their groups).
+    DETAIL_QUERIES = 18
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.users = []
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f'member{i}', email=f'member{i}@example.com', password='pass123'
+            )
+            user.add_role('Detective')
+            self.users.append(user)
+        self.client.force_authenticate(user=self.admin)
+
+    def _make_cases(self, count):
+        a, b, c = self.users
+        for i in range(count):
+            complaint = Complaint.objects.create(
+                title=f"Complaint {i}", description="d", created_by=a,
+                assigned_cadet=b, assigned_officer=c,
+            )
+            complaint.complainants.add(a, b)
+            ComplaintHistory.objects.create(
+                complaint=complaint, from_status="submitted", to_status="cadet_review",
+                changed_by=b,
+            )
+            case = Case.objects.create(
+                title=f"Case {i}", created_by=a, lead_detective=b, approved_by=c,
+                origin_complaint=complaint,
+            )
+            case.officers.add(b, c)
+            CaseHistory.objects.create(
+                case=case, from_status="created", to_status="investigation", changed_by=a
+            )
+            CrimeSceneWitness.objects.create(
+                case=case, full_name="W", phone="0912", national_id="1", user=c
+            )
+        return case
+
+    def _list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/v1/cases/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx), response
+
+    def test_list_query_count_is_constant(self):
+        self._make_cases(2)
+        small, _ = self._list_queries()
+        self._make_cases(10)
+        large, response = self._list_queries()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 5)  # including the conditional GET validator
+        row = response.data['results'][0]
+        self.assertEqual(row['officer_count'], 2)
+        self.assertEqual(row['witness_count'], 1)
+        self.assertEqual(row['suspect_count'], 0)
+        self.assertEqual(row['lead_detective'], self.users[1].pk)
+
+    def test_detail_query_count_is_constant(self):
+        case = self._make_cases(1)
+        with self.assertNumQueries(self.DETAIL_QUERIES):
+            response = self.client.get(f'/api/v1/cases/{case.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['lead_detective']['roles'], ['Detective'])
+
+        # More nested rows don't add queries
+        case.officers.add(self.users[0])
+        CaseHistory.objects.create(
+            case=case, from_status="investigation", to_status="suspect_identified",
+            changed_by=self.users[2],
+        )
+        with self.assertNumQueries(self.DETAIL_QUERIES):
+            self.client.get(f'/api/v1/cases/{case.pk}/')
+
+
+class KeysetPaginationTestCase(APITestCase):
+    """Test opt-in cursor pagination on the case list."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        for i in range(45):
+            Case.objects.create(
+                title=f"Case {i}", case_number=f"KEYSET-{i:04d}", created_by=self.admin,
+                status=CaseStatus.CREATED if i % 3 else CaseStatus.INVESTIGATION,
+            )
+        # Duplicate timestamps so the id tie-breaker matters
+        Case.objects.filter(title__in=["Case 10", "Case 11", "Case 12"]).update(
+            created_at=Case.objects.get(title="Case 10").created_at
+        )
+
+    def _walk(self, url):
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            pages.append(response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids, pages
+
+    def test_forward_and_backward_walk(self):
+        ids, pages = self._walk('/api/v1/cases/?pagination=cursor')
+        expected = list(
+            Case.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [row['id'] for row in pages[1]['results']],
+        )
+
+    def test_filters_and_ordering_are_kept(self):
+        ids, _ = self._walk(
+            '/api/v1/cases/?pagination=cursor&status=created&ordering=created_at'
+        )
+        expected = list(
+            Case.objects.filter(status=CaseStatus.CREATED)
+            .order_by('created_at', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_page_numbers_remain_default(self):
+        response = self.client.get('/api/v1/cases/?page=2')
+        self.assertEqual(response.data['count'], 45)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_invalid_cursor_and_nullable_ordering(self):
+        response = self.client.get('/api/v1/cases/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get('/api/v1/evidence/?pagination=cursor&ordering=collection_date')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CaseSearchTestCase(APITestCase):
+    """Test the search backend (ILIKE fallback outside PostgreSQL)."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.client.force_authenticate(user=self.admin)
+        Case.objects.create(
+            title="Harbor robbery", summary="Shipment stolen", created_by=self.admin
+        )
+        Case.objects.create(
+            title="Downtown fraud", crime_scene_location="Market", created_by=self.admin
+        )
+
+    def test_search_filters_cases(self):
+        response = self.client.get('/api/v1/cases/', {'search': 'robbery'})
+        self.assertEqual(
+            [case['title'] for case in response.data['results']], ["Harbor robbery"]
+        )
+        response = self.client.get('/api/v1/cases/', {'search': 'market'})
+        self.assertEqual(
+            [case['title'] for case in response.data['results']], ["Downtown fraud"]
+        )
+
+    def test_tsquery_uses_prefix_terms(self):
+        self.assertEqual(to_tsquery(["CASE-2026", "دزدی!"]), "case:* & 2026:* & دزدی:*")
+        self.assertEqual(to_tsquery(["&|!"]), "")
+
+
+class CaseBulkTransitionTestCase(APITestCase):
+    """Test POST /cases/bulk_transition/."""
+
+    def setUp(self):
+        self.sergeant = User.objects.create_user(
+            username='sergeant', email='sergeant@example.com', password='pass123'
+        )
+        self.sergeant.add_role('Sergeant')
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='pass123'
+        )
+        self.officer.add_role('Police Officer')
+        self.pending = [
+            Case.objects.create(
+                title=f"Scene {i}", created_by=self.officer,
+                status=CaseStatus.PENDING_APPROVAL,
+            )
+            for i in range(3)
+        ]
+        self.investigating = Case.objects.create(
+            title="Investigating", created_by=self.officer, status=CaseStatus.INVESTIGATION,
+        )
+
+    def _post(self, user, data):
+        self.client.force_authenticate(user=user)
+        return self.client.post('/api/v1/cases/bulk_transition/', data, format='json')
+
+    def test_bulk_approve_reports_each_case(self):
+        ids = [case.pk for case in self.pending] + [self.investigating.pk, 999999]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(self.sergeant, {'transition': 'approve', 'case_ids': ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'], 3)
+        self.assertEqual(response.data['failed'], 2)
+        results = response.data['results']
+        self.assertEqual([row['id'] for row in results], ids)
+        self.assertTrue(all(row['success'] for row in results[:3]))
+        self.assertEqual(results[0]['to_status'], CaseStatus.CREATED)
+        self.assertFalse(results[3]['success'])
+        self.assertEqual(results[4]['error'], "Case not found.")
+
+        for case in Case.objects.filter(pk__in=ids[:3]):
+            self.assertEqual(case.status, CaseStatus.CREATED)
+            self.assertEqual(case.approved_by, self.sergeant)
+        self.assertEqual(
+            CaseHistory.objects.filter(
+                case__in=self.pending, to_status=CaseStatus.CREATED, changed_by=self.sergeant
+            ).count(),
+            3,
+        )
+        self.assertEqual(
+            Case.objects.get(pk=self.investigating.pk).status, CaseStatus.INVESTIGATION
+        )
+
+    def test_unexpected_error_fails_only_its_case(self):
+        ids = [case.pk for case in self.pending]
+        original_save = Case.save
+
+        def save(case, *args, **kwargs):
+            if case.pk == ids[1]:
+                raise DatabaseError("disk full")
+            return original_save(case, *args, **kwargs)
+
+        with mock.patch.object(Case, "save", save), self.assertLogs("apps.cases.views", "ERROR"):
+            response = self._post(self.sergeant, {'transition': 'approve', 'case_ids': ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertEqual(
+            response.data['results'][1], {'id': ids[1], 'success': False, 'error': "disk full"}
+        )
+        self.assertEqual(Case.objects.get(pk=ids[0]).status, CaseStatus.CREATED)
+        self.assertEqual(Case.objects.get(pk=ids[1]).status, CaseStatus.PENDING_APPROVAL)
+
+    def test_capability_and_transition_name_are_checked(self):
+        ids = [case.pk for case in self.pending]
+        response = self._post(self.officer, {'transition': 'approve', 'case_ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn('error', response.data)
+
+        response = self._post(self.sergeant, {'transition': 'delete', 'case_ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CaseHistory.objects.exists())
+
+
+class AuditBufferTestCase(APITestCase):
+    """Test buffered history writes and spool replay."""
+
+    DEAD_PID = 4194305  # above the kernel's maximum pid
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.case = Case.objects.create(title="Audited", created_by=self.admin)
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir)
+
+    def _event(self, to_status):
+        return CaseHistory(
+            case=self.case, from_status="created", to_status=to_status, changed_by=self.admin
+        )
+
+    def test_history_is_written_only_after_commit(self):
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                audit.record(self._event("investigation"))
+                transaction.set_rollback(True)
+            response = self.client.post(f'/api/v1/cases/{self.case.pk}/start_investigation/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(CaseHistory.objects.values_list('to_status', 'changed_by')),
+            [(CaseStatus.INVESTIGATION, self.admin.pk)],
+        )
+
+    def test_size_threshold_and_order(self):
+        buffer = audit.AuditBuffer(max_size=3, interval=60, spool_dir=self.spool_dir)
+        buffer._start_thread = lambda: None
+        events = [self._event(s) for s in ("investigation", "suspect_identified", "interrogation")]
+
+        buffer.add(events[:2])
+        self.assertFalse(CaseHistory.objects.exists())
+        spool = os.path.join(self.spool_dir, f"audit-{audit.process_id()}.jsonl")
+        with open(spool) as fh:
+            self.assertEqual(len(fh.readlines()), 2)
+
+        buffer.add(events[2:])
+        self.assertEqual(
+            list(CaseHistory.objects.order_by('id').values_list('to_status', flat=True)),
+            ["investigation", "suspect_identified", "interrogation"],
+        )
+        self.assertEqual(os.path.getsize(spool), 0)
+
+    def test_replay_orphaned_spool_once(self):
+        events = [self._event("investigation"), self._event("closed_unsolved")]
+        for event in events:
+            event.event_id = uuid.uuid4()
+        lines = "".join(audit.dump_event(event) + "\n" for event in events)
+        for name in (f"audit-{self.DEAD_PID}.jsonl", f"audit-{self.DEAD_PID + 1}.jsonl"):
+            with open(os.path.join(self.spool_dir, name), "w") as fh:
+                fh.write(lines)
+
+        self.assertEqual(audit.replay_spool(self.spool_dir), 4)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+        self.assertEqual(
+            list(CaseHistory.objects.order_by('id').values_list('to_status', 'created_at')),
+            [(event.to_status, event.created_at) for event in events],
+        )
+
+    def test_spool_of_same_pid_is_replayed_not_truncated(self):
+        # After a restart the new worker can get the PID of a crashed one
+        events = [self._event("investigation"), self._event("closed_unsolved")]
+        for event in events:
+            event.event_id = uuid.uuid4()
+        for name, event in (
+            (f"audit-{os.getpid()}-1.jsonl", events[0]),
+            (f"audit-{audit.process_id()}.jsonl", events[1]),
+        ):
+            with open(os.path.join(self.spool_dir, name), "w") as fh:
+                fh.write(audit.dump_event(event) + "\n")
+
+        self.assertEqual(audit.replay_spool(self.spool_dir), 1)
+        buffer = audit.AuditBuffer(max_size=3, interval=60, spool_dir=self.spool_dir)
+        buffer._start_thread = lambda: None
+        buffer.add([self._event("suspect_identified")])
+        buffer.flush()
+
+        self.assertEqual(
+            list(CaseHistory.objects.order_by('id').values_list('to_status', flat=True)),
+            ["investigation", "closed_unsolved", "suspect_identified"],
+        )
+        self.assertEqual(os.listdir(self.spool_dir), [f"audit-{audit.process_id()}.jsonl"])
+
+
+class CaseReadinessTestCase(APITestCase):
+    """Test the aggregated transition preconditions."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.case = Case.objects.create(
+            title="Ready", created_by=self.admin, status=CaseStatus.INTERROGATION,
+            crime_severity=CrimeSeverity.CRITICAL,
+        )
+        self.suspects = [
+            Suspect.objects.create(
+                full_name=f"Suspect {i}", status=SuspectStatus.ARRESTED,
+                detective_guilt_score=7, sergeant_guilt_score=6,
+            )
+            for i in range(2)
+        ]
+        for suspect in self.suspects:
+            CaseSuspect.objects.create(case=self.case, suspect=suspect, added_by=self.admin)
+
+    def test_conditions_share_one_query(self):
+        case = Case.objects.get(pk=self.case.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(case.has_guilt_scores())
+            self.assertFalse(case.has_captain_decision())
+            self.assertFalse(case.has_chief_decision_if_critical())
+            self.assertTrue(case.readiness()['all_suspects_arrested'])
+
+        # Memoized until the case is saved or the cache is cleared
+        Suspect.objects.filter(pk=self.suspects[0].pk).update(sergeant_guilt_score=None)
+        self.assertTrue(case.has_guilt_scores())
+        case.clear_readiness()
+        self.assertFalse(case.has_guilt_scores())
+
+    def test_readiness_endpoint(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(f'/api/v1/cases/{self.case.pk}/readiness/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['suspect_count'], 2)
+        self.assertTrue(response.data['has_guilt_scores'])
+        self.assertFalse(response.data['has_trial_verdict'])
+        self.assertEqual(
+            set(response.data['available_transitions']), {'submit_to_captain', 'close_unsolved'}
+        )
+
+
+class PursuitApprovalTestCase(APITestCase):
+    """Set-based approve_suspects_for_pursuit."""
+
+    def setUp(self):
+        self.sergeant = User.objects.create_user(
+            username='sergeant', email='sergeant@example.com', password='pass123'
+        )
+        self.sergeant.add_role('Sergeant')
+        self.case = Case.objects.create(
+            title="Gang", created_by=self.sergeant, status=CaseStatus.SUSPECT_IDENTIFIED,
+        )
+
+    def add_suspects(self, count, status_=SuspectStatus.IDENTIFIED):
+        suspects = []
+        for _ in range(count):
+            n = Suspect.objects.count()
+            user = User.objects.create_user(username=f'person{n}', email=f'person{n}@example.com')
+            suspect = Suspect.objects.create(full_name=f"Suspect {n}", user=user)
+            Suspect.objects.filter(pk=suspect.pk).update(status=status_)
+            CaseSuspect.objects.create(case=self.case, suspect=suspect)
+            suspects.append(suspect)
+        return suspects
+
+    def test_respects_source_states(self):
+        identified = self.add_suspects(1)[0]
+        investigated = self.add_suspects(1, SuspectStatus.UNDER_INVESTIGATION)[0]
+        arrested = self.add_suspects(1, SuspectStatus.ARRESTED)[0]
+
+        self.client.force_authenticate(user=self.sergeant)
+        response = self.client.post(f'/api/v1/cases/{self.case.pk}/approve_suspects/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        suspects = Suspect.objects.in_bulk()
+        for suspect in (identified, investigated):
+            self.assertEqual(suspects[suspect.pk].status, SuspectStatus.UNDER_PURSUIT)
+            self.assertIsNotNone(suspects[suspect.pk].wanted_since)
+            self.assertTrue(User.objects.get(pk=suspect.user_id).is_suspect)
+        self.assertEqual(suspects[arrested.pk].status, SuspectStatus.ARRESTED)
+        self.assertIsNone(suspects[arrested.pk].wanted_since)
+        self.assertFalse(User.objects.get(pk=arrested.user_id).is_suspect)
+
+    def test_pursuit_sources_match_transitions(self):
+        sources = {
+            *Suspect.authorize_pursuit._django_fsm.transitions,
+            *Suspect.mark_wanted._django_fsm.transitions,
+        }
+        self.assertEqual(set(PURSUIT_SOURCES), sources)
+
+    def test_writes_do_not_grow_with_suspects(self):
+        def approve():
+            Suspect.objects.update(status=SuspectStatus.IDENTIFIED)
+            User.objects.update(is_suspect=False)
+            with CaptureQueriesContext(connection) as ctx:
+                moved = Case.objects.get(pk=self.case.pk).approve_suspects_for_pursuit()
+            self.assertEqual(moved, Suspect.objects.count())
+            return len(ctx.captured_queries)
+
+        self.add_suspects(2)
+        few = approve()
+        self.add_suspects(20)
+        self.assertEqual(approve(), few)
+
+
+class DetectiveBoardTestCase(APITestCase):
+    """Test detective board patches and revision checks."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.case = Case.objects.create(title="Board", created_by=self.admin)
+        self.url = f'/api/v1/cases/{self.case.pk}/detective_board/'
+        self.client.force_authenticate(user=self.admin)
+
+    def _patch(self, operations, etag=None):
+        headers = {'HTTP_IF_MATCH': etag} if etag else {}
+        return self.client.generic(
+            'PATCH', self.url, json.dumps(operations),
+            content_type='application/json-patch+json', **headers
+        )
+
+    def test_put_then_json_patch(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response['ETag'].startswith('"0-'))
+        self.assertEqual(response.data['notes'], [])
+
+        response = self.client.put(self.url, {
+            'notes': [{'id': 1, 'x': 0, 'y': 0}, {'id': 2, 'x': 5, 'y': 5}],
+            'connections': [],
+        }, format='json')
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self._patch([
+            {'op': 'replace', 'path': '/notes/0/x', 'value': 40},
+            {'op': 'add', 'path': '/connections/-', 'value': {'id': 9, 'from': 1, 'to': 2}},
+            {'op': 'remove', 'path': '/notes/1'},
+        ], etag='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        board = DetectiveBoard.objects.get(case=self.case)
+        self.assertEqual(board.revision, 2)
+        self.assertEqual(board.data, {
+            'notes': [{'id': 1, 'x': 40, 'y': 0}],
+            'connections': [{'id': 9, 'from': 1, 'to': 2}],
+        })
+
+    def test_stale_revision_and_bad_patches_are_rejected(self):
+        self._patch([{'op': 'add', 'path': '/notes/-', 'value': {'id': 1}}])
+
+        response = self._patch([{'op': 'remove', 'path': '/notes/0'}], etag='"0"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(response['ETag'], '"1"')
+
+        response = self._patch([{'op': 'test', 'path': '/notes/0/id', 'value': 2}])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self._patch([{'op': 'remove', 'path': '/notes/3'}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self._patch([{'op': 'replace', 'path': '/notes', 'value': 'x'}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(DetectiveBoard.objects.get(case=self.case).revision, 1)
+
+
+@override_settings(CASE_EVENT_STREAM_SECONDS=0, CASE_EVENT_POLL_SECONDS=0)
+class CaseEventStreamTestCase(APITestCase):
+    """Test the case event log and its SSE stream."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='pass123'
+        )
+        self.case = Case.objects.create(title="Stream", created_by=self.admin)
+        self.url = f'/api/v1/cases/{self.case.pk}/events/'
+
+    def _stream(self, last_event_id=None):
+        async def collect():
+            return [frame async for frame in case_event_stream(self.case.pk, last_event_id)]
+        return async_to_sync(collect)()
+
+    def test_board_and_evidence_writes_are_logged(self):
+        from apps.evidence.models import Evidence, EvidenceType
+
+        self.client.force_authenticate(user=self.admin)
+        board_url = f'/api/v1/cases/{self.case.pk}/detective_board/'
+        self.client.put(board_url, {'notes': [{'id': 1}], 'connections': []}, format='json')
+        self.client.generic(
+            'PATCH', board_url,
+            json.dumps([{'op': 'add', 'path': '/notes/-', 'value': {'id': 2}}]),
+            content_type='application/json-patch+json',
+        )
+        Evidence.objects.create(
+            case=self.case, title="Knife", description="Found at the scene",
+            evidence_type=EvidenceType.OTHER, collected_by=self.admin,
+        )
+
+        events = list(self.case.events.order_by('id'))
+        self.assertEqual(
+            [event.kind for event in events],
+            [CaseEventKind.BOARD_REPLACE, CaseEventKind.BOARD_PATCH, CaseEventKind.EVIDENCE_ADDED],
+        )
+        self.assertEqual(events[0].payload, {
+            'revision': 1, 'board': {'notes': [{'id': 1}], 'connections': []},
+        })
+        self.assertEqual(events[1].payload['patch'][0]['value'], {'id': 2})
+        self.assertEqual(events[2].payload['title'], "Knife")
+
+    @override_settings(CASE_EVENT_LOG_SIZE=3)
+    def test_log_is_trimmed_and_replayed_after_last_event_id(self):
+        events = [
+            publish_case_event(self.case.pk, CaseEventKind.BOARD_PATCH, {'revision': n})
+            for n in range(5)
+        ]
+        self.assertEqual(
+            list(self.case.events.values_list('id', flat=True).order_by('id')),
+            [event.pk for event in events[2:]],
+        )
+
+        frames = self._stream(last_event_id=events[2].pk)
+        self.assertTrue(frames[0].startswith('retry: '))
+        self.assertEqual(frames[1:], [
+            f'id: {event.pk}\nevent: board_patch\ndata: {{"revision": {n}}}\n\n'
+            for n, event in list(enumerate(events))[3:]
+        ])
+
+        # Resuming from a trimmed event asks the client to reload
+        frames = self._stream(last_event_id=events[0].pk)
+        self.assertIn('event: reset', frames[1])
+        self.assertEqual(len(frames), 5)
+
+        # A fresh connection only gets new events
+        self.assertEqual(len(self._stream()), 1)
+
+    def test_endpoint_requires_token_and_case_access(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = AccessToken.for_user(self.officer)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        publish_case_event(self.case.pk, CaseEventKind.BOARD_PATCH, {'revision': 1})
+        token = AccessToken.for_user(self.admin)
+        response = self.client.get(f'{self.url}?access_token={token}&last_event_id=0')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        async def read():
+            return [chunk async for chunk in response.streaming_content]
+        body = b''.join(async_to_sync(read)()).decode()
+        self.assertIn('event: board_patch', body)
+
+
+class ConditionalGetTestCase(APITestCase):
+    """Test ETag / Last-Modified answers on read endpoints."""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.other_admin = User.objects.create_user(
+            username='admin2', email='admin2@example.com', password='pass123',
+            phone='09120000002', national_id='0000000002', is_staff=True,
+        )
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='pass123',
+            phone='09120000003', national_id='0000000003',
+        )
+        self.case = Case.objects.create(
+            title="Conditional", created_by=self.admin, case_number="CASE-COND-1"
+        )
+        self.url = f'/api/v1/cases/{self.case.pk}/'
+        self.client.force_authenticate(user=self.admin)
+
+    def _revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_retrieve_answers_304_until_a_nested_row_changes(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(2):  # validator + object permission check
+            response = self._revalidate(self.url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        CrimeSceneWitness.objects.create(case=self.case, full_name="W", phone="1", national_id="1")
+        response = self._revalidate(self.url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Swapping officers keeps the count but not the ETag
+        self.case.officers.add(self.admin)
+        etag = self.client.get(self.url)['ETag']
+        self.case.officers.remove(self.admin)
+        self.case.officers.add(self.officer)
+        self.assertEqual(self._revalidate(self.url, etag).status_code, status.HTTP_200_OK)
+
+        # A nested user's role change shows up as well
+        etag = self.client.get(self.url)['ETag']
+        self.officer.add_role("Detective")
+        self.assertEqual(self._revalidate(self.url, etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_is_per_user_and_query(self):
+        etag = self.client.get('/api/v1/cases/')['ETag']
+        self.assertEqual(
+            self._revalidate('/api/v1/cases/', etag).status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(
+            self._revalidate('/api/v1/cases/?status=created', etag).status_code,
+            status.HTTP_200_OK,
+        )
+        self.client.force_authenticate(user=self.other_admin)
+        self.assertEqual(self._revalidate('/api/v1/cases/', etag).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.admin)
+        Case.objects.create(title="New", created_by=self.admin, case_number="CASE-COND-2")
+        self.assertEqual(self._revalidate('/api/v1/cases/', etag).status_code, status.HTTP_200_OK)
+
+    def test_detective_board_etag_covers_evidence(self):
+        from apps.evidence.models import Evidence, EvidenceType
+
+        url = f'{self.url}detective_board/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self._revalidate(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Evidence.objects.create(
+            case=self.case, title="Glove", description="Left glove",
+            evidence_type=EvidenceType.OTHER, collected_by=self.admin,
+        )
+        response = self._revalidate(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['evidence_items']), 1)
+
+        # The GET ETag is accepted as If-Match for writes (same revision)
+        response = self.client.generic(
+            'PATCH', url,
+            json.dumps([{'op': 'add', 'path': '/notes/-', 'value': {'id': 1}}]),
+            content_type='application/json-patch+json', HTTP_IF_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._revalidate(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        response = self.client.get(self.url)
+        last_modified = response['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_ignored_for_lists_after_a_delete(self):
+        doomed = Case.objects.create(title="Doomed", created_by=self.admin, case_number="CASE-COND-3")
+        response = self.client.get('/api/v1/cases/')
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(response.data['count'], 2)
+
+        doomed.delete()
+        response = self.client.get(
+            '/api/v1/cases/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
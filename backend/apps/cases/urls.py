@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import CaseViewSet
+from .views import CaseViewSet, case_events
 
 router = DefaultRouter()
 router.register("", CaseViewSet, basename="case")
 
 urlpatterns = [
+    path("<int:pk>/events/", case_events, name="case-events"),
     path("", include(router.urls)),
 ]
@@ -1,13 +1,45 @@
+import logging
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.db import models, transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django_fsm import TransitionNotAllowed
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.accounts.authentication import RoleClaimJWTAuthentication
+from apps.accounts.models import Capability
+from apps.accounts.policy import capability_required, has_capability
+from apps.common import audit
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.jsonpatch import JSONPatchParser, PatchError, PatchTestFailed, apply_patch
 from apps.common.models import CrimeSeverity
-from .models import Case, CaseHistory, CaseOrigin, CaseStatus, CrimeSceneWitness
+from apps.common.pagination import OptInKeysetPagination
+from apps.complaints.models import ComplaintHistory
+from apps.suspects.models import CaseSuspect
+from .events import case_event_stream, publish_case_event
+from .models import (
+    Case,
+    CaseEventKind,
+    CaseHistory,
+    CaseOrigin,
+    CaseStatus,
+    CrimeSceneWitness,
+    DetectiveBoard,
+)
 from .serializers import (
+    CASE_SERIALIZER_RELATED,
+    AddCaseSuspectSerializer,
+    CaseBulkTransitionSerializer,
+    CaseListSerializer,
     CaseSerializer,
     CaseTransitionSerializer,
     CrimeSceneCaseSerializer,
@@ -16,14 +48,129 @@ from .serializers import (
 )
 
 User = get_user_model()
-
-
-class CaseViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+
+def _users_with_groups():
+    return User.objects.prefetch_related("groups")
+
+
+# Everything CaseSerializer nests, including groups for the roles of each
+# nested user, loaded with a fixed number of queries.
+CASE_DETAIL_SELECT = [
+    "created_by",
+    "approved_by",
+    "lead_detective",
+    "origin_complaint__created_by",
+    "origin_complaint__assigned_cadet",
+    "origin_complaint__assigned_officer",
+]
+CASE_DETAIL_PREFETCH = [
+    "created_by__groups",
+    "approved_by__groups",
+    "lead_detective__groups",
+    "origin_complaint__created_by__groups",
+    "origin_complaint__assigned_cadet__groups",
+    "origin_complaint__assigned_officer__groups",
+    Prefetch("officers", queryset=_users_with_groups()),
+    Prefetch(
+        "history",
+        queryset=CaseHistory.objects.select_related("changed_by").prefetch_related(
+            "changed_by__groups"
+        ),
+    ),
+    Prefetch(
+        "witnesses",
+        queryset=CrimeSceneWitness.objects.select_related("user").prefetch_related(
+            "user__groups"
+        ),
+    ),
+    Prefetch("origin_complaint__complainants", queryset=_users_with_groups()),
+    Prefetch(
+        "origin_complaint__history",
+        queryset=ComplaintHistory.objects.select_related("changed_by").prefetch_related(
+            "changed_by__groups"
+        ),
+    ),
+]
+
+
+def _count_per_case(model):
+    """Correlated COUNT(*) of `model` rows for each case, evaluated per row."""
+    counts = (
+        model.objects.filter(case=OuterRef("pk"))
+        .order_by()
+        .values("case")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+# Transitions available to bulk_transition:
+# name -> (apply(case, user), required capability, default history note)
+BULK_TRANSITIONS = {
+    "approve": (
+        lambda case, user: case.approve_case(user),
+        Capability.APPROVE_CASES,
+        "Case approved by superior",
+    ),
+    "start_investigation": (
+        lambda case, user: case.start_investigation(detective=user), None, "",
+    ),
+    "identify_suspect": (lambda case, user: case.identify_suspect(), None, ""),
+    "start_interrogation": (lambda case, user: case.start_interrogation(), None, ""),
+    "submit_to_captain": (
+        lambda case, user: case.submit_to_captain(),
+        None,
+        "Interrogation complete – submitted to captain",
+    ),
+    "escalate_to_chief": (lambda case, user: case.escalate_to_chief(), None, ""),
+    "send_to_trial": (
+        lambda case, user: case.send_to_trial(), Capability.SEND_TO_TRIAL, "",
+    ),
+    "close_solved": (lambda case, user: case.close_solved(), None, ""),
+    "close_unsolved": (lambda case, user: case.close_unsolved(), None, ""),
+}
+
+
+def _board_etag(board):
+    return f'"{board.revision}"'
+
+
+def _etag_revision(tag):
+    """Board revision named by an ETag: '"3"' (writes) or '"3-<digest>"' (GET)."""
+    return tag.strip().removeprefix("W/").strip('"').split("-", 1)[0]
+
+
+def _etag_matches(if_match, board):
+    """True when there is no If-Match header or it names the board's revision (or *)."""
+    if not if_match:
+        return True
+    tags = [tag.strip() for tag in if_match.split(",")]
+    return "*" in tags or str(board.revision) in [_etag_revision(tag) for tag in tags]
+
+
+def cases_visible_to(user):
+    # Admins see all
+    # Judge, Captain, Chief: full access to all cases for overall report (گزارش‌گیری کلی)
+    if user.is_staff or has_capability(user, Capability.VIEW_ALL_CASES):
+        return Case.objects.all()
+    # Cases the user is attached to, plus statuses their roles review
+    return Case.objects.visible_to(user)
+
+
+class CaseViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CaseSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
     filterset_fields = ["status", "origin", "crime_severity", "lead_detective"]
     search_fields = ["case_number", "title", "summary", "crime_scene_location"]
     ordering_fields = ["created_at", "updated_at", "crime_severity"]
+    conditional_related = {
+        "list": ["officers", "access_entries", "witnesses", "suspect_links"],
+        "retrieve": CASE_SERIALIZER_RELATED,
+    }
 
     def create(self, request, *args, **kwargs):
         """Standard case creation - restricted to admin/staff only."""
@@ -34,80 +181,49 @@ class CaseViewSet(viewsets.ModelViewSet):
             )
         return super().create(request, *args, **kwargs)
 
-    APPROVAL_ROLES = ["Chief", "Captain", "Sergeant"]
+    def get_serializer_class(self):
+        if self.action == "list":
+            return CaseListSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
-        user = self.request.user
-        
-        # Admins see all
-        if user.is_staff:
-            return Case.objects.all()
-        
-        user_roles = user.get_roles()
-        
-        # Judge, Captain, Chief: full access to all cases for overall report (گزارش‌گیری کلی)
-        if any(role in ["Judge", "Captain", "Chief"] for role in user_roles):
-            return Case.objects.all()
-        
-        q = (
-            models.Q(created_by=user) |
-            models.Q(lead_detective=user) |
-            models.Q(officers=user) |
-            models.Q(approved_by=user)
-        )
-        
-        # Superiors (Sergeant, Captain, Chief) can see pending_approval cases
-        if any(role in self.APPROVAL_ROLES for role in user_roles):
-            q |= models.Q(status=CaseStatus.PENDING_APPROVAL)
-        
-        # Sergeant can see suspect_identified (approve/reject) and interrogation
-        if "Sergeant" in user_roles:
-            q |= models.Q(status=CaseStatus.SUSPECT_IDENTIFIED)
-            q |= models.Q(status=CaseStatus.INTERROGATION)
-
-        # Captain can see cases pending their decision and interrogation cases
-        if "Captain" in user_roles:
-            q |= models.Q(status=CaseStatus.PENDING_CAPTAIN)
-            q |= models.Q(status=CaseStatus.INTERROGATION)
-
-        # Chief can see cases pending their decision
-        if "Chief" in user_roles:
-            q |= models.Q(status=CaseStatus.PENDING_CHIEF)
-
-        # Judge can see cases in trial
-        if "Judge" in user_roles:
-            q |= models.Q(status=CaseStatus.TRIAL)
-
-        # Detectives can see created, investigation, suspect_identified (their case), interrogation
-        if "Detective" in user_roles:
-            q |= models.Q(status=CaseStatus.CREATED)
-            q |= (models.Q(status=CaseStatus.INVESTIGATION) & models.Q(lead_detective=user))
-            q |= (models.Q(status=CaseStatus.SUSPECT_IDENTIFIED) & models.Q(lead_detective=user))
-            q |= (models.Q(status=CaseStatus.INTERROGATION) & models.Q(lead_detective=user))
-        
-        return Case.objects.filter(q).distinct()
+        queryset = cases_visible_to(self.request.user)
+
+        if self.action == "list":
+            return queryset.prefetch_related(
+                Prefetch("officers", queryset=User.objects.only("id"))
+            ).annotate(
+                witness_count=_count_per_case(CrimeSceneWitness),
+                suspect_count=_count_per_case(CaseSuspect),
+            )
+        if self.action == "retrieve":
+            return queryset.select_related(*CASE_DETAIL_SELECT).prefetch_related(
+                *CASE_DETAIL_PREFETCH
+            )
+        return queryset
 
     def _log_transition(self, case, from_status, to_status, user, notes=""):
-        CaseHistory.objects.create(
+        audit.record(CaseHistory(
             case=case,
             from_status=from_status,
             to_status=to_status,
             changed_by=user,
             notes=notes,
-        )
-
-    @action(detail=False, methods=["post"])
+        ))
+
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.REPORT_CRIME_SCENE,
+                "Only police officers (non-Cadet) can register crime scenes.",
+            ),
+        ],
+    )
     def from_crime_scene(self, request):
         """Create case from crime scene report (police officer)."""
-        ALLOWED_ROLES = ["Chief", "Captain", "Sergeant", "Detective", "Police Officer", "Patrol Officer"]
-        user_roles = request.user.get_roles()
-        
-        if not request.user.is_staff and not any(role in ALLOWED_ROLES for role in user_roles):
-            return Response(
-                {"error": "Only police officers (non-Cadet) can register crime scenes."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
         serializer = CrimeSceneCaseSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -139,16 +255,19 @@ class CaseViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
-    @action(detail=True, methods=["post"])
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.APPROVE_CASES,
+                "Only Sergeant, Captain, or Chief can approve cases.",
+            ),
+        ],
+    )
     def approve(self, request, pk=None):
         """Superior approves the case (Sergeant, Captain, Chief only)."""
-        user_roles = request.user.get_roles()
-        if not request.user.is_staff and not any(role in self.APPROVAL_ROLES for role in user_roles):
-            return Response(
-                {"error": "Only Sergeant, Captain, or Chief can approve cases."},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
         case = self.get_object()
         from_status = case.status
         
@@ -359,15 +478,19 @@ class CaseViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=["post"])
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.SEND_TO_TRIAL,
+                "Only Captain or Chief can send cases to trial.",
+            ),
+        ],
+    )
     def send_to_trial(self, request, pk=None):
         """Send case to trial (Captain/Chief only)."""
-        user_roles = request.user.get_roles()
-        if not request.user.is_staff and not any(role in ["Captain", "Chief"] for role in user_roles):
-            return Response(
-                {"error": "Only Captain or Chief can send cases to trial."},
-                status=status.HTTP_403_FORBIDDEN
-            )
         case = self.get_object()
         from_status = case.status
         
@@ -412,32 +535,169 @@ class CaseViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=True, methods=["get", "put", "patch"])
+    @action(detail=False, methods=["post"])
+    def bulk_transition(self, request):
+        """
+        Apply one transition to many cases in a single transaction.
+        Rows locked by another request are skipped and reported, and each
+        case succeeds or fails on its own.
+        """
+        serializer = CaseBulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        name = serializer.validated_data["transition"]
+        case_ids = list(dict.fromkeys(serializer.validated_data["case_ids"]))
+        notes = serializer.validated_data.get("notes", "")
+
+        if name not in BULK_TRANSITIONS:
+            return Response(
+                {"error": f"Unknown transition. Choose one of: {', '.join(BULK_TRANSITIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        apply, capability, default_note = BULK_TRANSITIONS[name]
+        if capability and not (
+            request.user.is_staff or has_capability(request.user, capability)
+        ):
+            return Response(
+                {"error": "You do not have permission to perform this transition."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        results = {}
+        history = []
+        with transaction.atomic():
+            visible = self.get_queryset().filter(pk__in=case_ids)
+            cases = {case.pk: case for case in visible.select_for_update(skip_locked=True)}
+            missing = [pk for pk in case_ids if pk not in cases]
+            locked = set(
+                visible.filter(pk__in=missing).values_list("pk", flat=True)
+            ) if missing else set()
+            for pk in missing:
+                results[pk] = {
+                    "id": pk,
+                    "success": False,
+                    "error": "Case is being updated by another request." if pk in locked
+                    else "Case not found.",
+                }
+
+            for pk in case_ids:
+                case = cases.get(pk)
+                if case is None:
+                    continue
+                from_status = case.status
+                try:
+                    with transaction.atomic():
+                        apply(case, request.user)
+                        case.save()
+                except (TransitionNotAllowed, ValueError) as e:
+                    results[pk] = {
+                        "id": pk,
+                        "success": False,
+                        "error": str(e) or f"Cannot {name} a case in status '{from_status}'.",
+                    }
+                    continue
+                except Exception as e:
+                    logger.exception("Bulk %s failed for case %s", name, pk)
+                    results[pk] = {"id": pk, "success": False, "error": str(e)}
+                    continue
+                results[pk] = {
+                    "id": pk,
+                    "success": True,
+                    "from_status": from_status,
+                    "to_status": case.status,
+                }
+                history.append(CaseHistory(
+                    case=case,
+                    from_status=from_status,
+                    to_status=case.status,
+                    changed_by=request.user,
+                    notes=notes or default_note,
+                ))
+            audit.record(*history)
+
+        return Response({
+            "transition": name,
+            "succeeded": len(history),
+            "failed": len(case_ids) - len(history),
+            "results": [results[pk] for pk in case_ids],
+        })
+
+    @action(
+        detail=True,
+        methods=["get", "put", "patch"],
+        parser_classes=[JSONParser, JSONPatchParser],
+    )
     def detective_board(self, request, pk=None):
-        """Get or update detective board."""
+        """
+        Get or update detective board.
+        PUT replaces the board. PATCH takes a list of RFC 6902 operations
+        (or, like PUT, a {notes, connections} object). The ETag starts with
+        the board revision (GET's also covers the evidence items); send it
+        back in If-Match to have the write rejected with 412 if the board
+        changed in the meantime.
+        """
         case = self.get_object()
         
         if request.method == "GET":
             from apps.evidence.models import Evidence
+            board = DetectiveBoard.objects.filter(case=case).first() or DetectiveBoard(case=case)
+            not_modified = self.not_modified(
+                Case.objects.filter(pk=case.pk), "board", "evidence", version=board.revision
+            )
+            if not_modified:
+                return not_modified
             evidence_qs = Evidence.objects.filter(case=case).values(
                 "id", "title", "description", "evidence_type", "status"
             )
-            board_data = dict(case.detective_board or {})
+            board_data = dict(board.data or {})
             board_data.setdefault("notes", [])
             board_data.setdefault("connections", [])
             board_data["evidence_items"] = list(evidence_qs)
+            board_data["revision"] = board.revision
             return Response(board_data)
-        
-        serializer = DetectiveBoardSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        
-        case.detective_board = {
-            "notes": serializer.validated_data.get("notes", []),
-            "connections": serializer.validated_data.get("connections", []),
-        }
-        case.save()
-        
-        return Response(case.detective_board)
+
+        with transaction.atomic():
+            DetectiveBoard.objects.get_or_create(case=case)
+            board = DetectiveBoard.objects.select_for_update().get(case=case)
+            if not _etag_matches(request.headers.get("If-Match"), board):
+                return Response(
+                    {"error": "The board was changed by someone else. Reload it and try again."},
+                    status=status.HTTP_412_PRECONDITION_FAILED,
+                    headers={"ETag": _board_etag(board)},
+                )
+
+            data = request.data
+            is_patch = request.method == "PATCH" and isinstance(data, list)
+            if is_patch:
+                try:
+                    data = apply_patch({"notes": [], "connections": [], **board.data}, data)
+                except PatchTestFailed as e:
+                    return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+                except PatchError as e:
+                    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            serializer = DetectiveBoardSerializer(data=data)
+            serializer.is_valid(raise_exception=True)
+
+            board.data = {
+                "notes": serializer.validated_data.get("notes", []),
+                "connections": serializer.validated_data.get("connections", []),
+            }
+            board.revision += 1
+            board.save(update_fields=["data", "revision", "updated_at"])
+            if is_patch:
+                publish_case_event(
+                    case.pk, CaseEventKind.BOARD_PATCH,
+                    {"revision": board.revision, "patch": request.data},
+                )
+            else:
+                publish_case_event(
+                    case.pk, CaseEventKind.BOARD_REPLACE,
+                    {"revision": board.revision, "board": board.data},
+                )
+
+        return Response(
+            {**board.data, "revision": board.revision},
+            headers={"ETag": _board_etag(board)},
+        )
 
     @action(detail=True, methods=["post"])
     def add_witness(self, request, pk=None):
@@ -454,7 +714,13 @@ class CaseViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def add_suspect(self, request, pk=None):
-        """Detective adds a suspect to this case."""
+        """
+        Detective adds a suspect to this case. To avoid duplicate suspects
+        across cases, pass `suspect_id` to link an existing suspect (e.g. one
+        from /suspects/match/), or `link_match: true` to link the best
+        identity match for full_name/aliases when it is close enough;
+        otherwise a new suspect is created.
+        """
         case = self.get_object()
 
         user_roles = request.user.get_roles()
@@ -470,36 +736,66 @@ class CaseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
+        from apps.suspects import identity
         from apps.suspects.models import Suspect, CaseSuspect
+        from apps.suspects.serializers import SuspectListSerializer, SuspectSerializer as SuspectSer
 
-        full_name = request.data.get("full_name")
-        if not full_name:
+        serializer = AddCaseSuspectSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        # Suspects of other cases are found the way /suspects/match/ finds them,
+        # so linking them takes the same capability (which staff always have)
+        can_link = request.user.is_staff or has_capability(request.user, Capability.POLICE_STAFF)
+        if ("suspect_id" in data or data["link_match"]) and not can_link:
             return Response(
-                {"error": "full_name is required."},
+                {"error": "Only police staff can link existing suspects."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        suspect = None
+        if "suspect_id" in data:
+            suspect = Suspect.objects.filter(pk=data["suspect_id"]).first()
+            if suspect is None:
+                return Response(
+                    {"error": "Suspect not found."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        elif data["link_match"]:
+            names = [data["full_name"], *identity.split_aliases(data["aliases"])]
+            matches = [m for name in names for m in identity.find_matches(name, limit=1)]
+            best = max(matches, key=lambda m: m[1], default=None)
+            if best and best[1] >= identity.LINK_MATCH_SCORE:
+                suspect = Suspect.objects.get(pk=best[0])
+
+        if suspect is not None and CaseSuspect.objects.filter(case=case, suspect=suspect).exists():
+            return Response(
+                {"error": "This suspect is already linked to the case."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        created = suspect is None
         with transaction.atomic():
-            suspect = Suspect.objects.create(
-                full_name=full_name,
-                aliases=request.data.get("aliases", ""),
-                description=request.data.get("description", ""),
-                last_known_location=request.data.get("last_known_location", ""),
-            )
+            if created:
+                suspect = Suspect.objects.create(
+                    full_name=data["full_name"],
+                    aliases=data["aliases"],
+                    description=data["description"],
+                    last_known_location=data["last_known_location"],
+                )
 
             CaseSuspect.objects.create(
                 case=case,
                 suspect=suspect,
-                role=request.data.get("role", "primary"),
-                notes=request.data.get("notes", ""),
+                role=data["role"],
+                notes=data["notes"],
                 added_by=request.user,
             )
 
-        from apps.suspects.serializers import SuspectSerializer as SuspectSer
-        return Response(
-            SuspectSer(suspect).data,
-            status=status.HTTP_201_CREATED
-        )
+        if created:
+            return Response(SuspectSer(suspect).data, status=status.HTTP_201_CREATED)
+        # A linked suspect is shown as /suspects/match/ shows it
+        suspect = Suspect.objects.with_rank().get(pk=suspect.pk)
+        return Response(SuspectListSerializer(suspect).data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["get"])
     def suspects(self, request, pk=None):
@@ -507,9 +803,28 @@ class CaseViewSet(viewsets.ModelViewSet):
         case = self.get_object()
         from apps.suspects.models import CaseSuspect
         from apps.suspects.serializers import CaseSuspectSerializer
+        not_modified = self.not_modified(
+            Case.objects.filter(pk=case.pk),
+            "suspect_links", "suspect_links__suspect", "suspect_links__added_by",
+        )
+        if not_modified:
+            return not_modified
         links = CaseSuspect.objects.filter(case=case).select_related("suspect", "added_by")
         return Response(CaseSuspectSerializer(links, many=True).data)
-    
+
+    @action(detail=True, methods=["get"])
+    def readiness(self, request, pk=None):
+        """Transition preconditions and the transitions currently allowed (one aggregate query)."""
+        case = self.get_object()
+        return Response({
+            "id": case.pk,
+            "status": case.status,
+            **case.readiness(),
+            "available_transitions": [
+                transition.name for transition in case.get_available_status_transitions()
+            ],
+        })
+
     @action(detail=False, methods=["get"], url_path="detective-board-cases")
     def detective_board_cases(self, request):
         """
@@ -528,3 +843,57 @@ class CaseViewSet(viewsets.ModelViewSet):
 
         data = list(qs.values("id", "case_number", "title", "status", "updated_at"))
         return Response(data)
+
+
+def _stream_user(request):
+    """Authenticate from the Authorization header, or ?access_token= (EventSource cannot set headers)."""
+    authenticator = RoleClaimJWTAuthentication()
+    try:
+        raw_token = request.GET.get("access_token")
+        if raw_token:
+            return authenticator.get_user(authenticator.get_validated_token(raw_token))
+        result = authenticator.authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def _open_case_stream(request, pk):
+    user = _stream_user(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {"error": "Authentication credentials were not provided or are invalid."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    if not cases_visible_to(user).filter(pk=pk).exists():
+        return JsonResponse({"error": "Case not found."}, status=status.HTTP_404_NOT_FOUND)
+    return None
+
+
+@require_GET
+async def case_events(request, pk):
+    """
+    Server-sent events for one case: detective board patches/replacements
+    and newly added evidence. Reconnecting clients send Last-Event-ID (or
+    ?last_event_id=) to receive the events they missed. Served by the ASGI
+    app; every open stream holds a connection.
+    """
+    error = await sync_to_async(_open_case_stream)(request, pk)
+    if error is not None:
+        return error
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse(
+            {"error": "Last-Event-ID must be an integer."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    response = StreamingHttpResponse(
+        case_event_stream(pk, last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,293 @@
+"""
+Buffered writer for workflow audit rows (CaseHistory, ComplaintHistory).
+
+`record()` queues unsaved history rows to be written once the current
+transaction commits, so a rolled-back transition leaves no history. Each
+worker keeps committed events in an in-memory FIFO that is written with
+one bulk_create per model run:
+
+- AUDIT_FLUSH_INTERVAL = 0 (default): flushed right after commit, so a
+  client re-reading the case sees its history entry. Events committed
+  concurrently by other request threads go out in the same insert.
+- AUDIT_FLUSH_INTERVAL > 0: flushed by a background thread every that many
+  seconds, or as soon as AUDIT_BUFFER_SIZE events are pending.
+
+Before an event enters the buffer it is appended to a per-process spool file
+in AUDIT_SPOOL_DIR, named after the PID and the process start time (PIDs
+repeat after a container restart). Spool files left behind by a crashed
+worker are replayed when a worker starts (and by `manage.py
+replay_audit_spool`). Every event
+carries an `event_id`, so replaying rows that were already written is a
+no-op. Events are written in the order they were recorded, and keep the
+`created_at` of the moment they were recorded.
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime
+from itertools import groupby
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = 5.0
+# audit-<pid>-<start>.jsonl, or .replay-<pid>-<start> once claimed for replay
+SPOOL_RE = re.compile(r"^audit-(\d+(?:-\w+)?)\.jsonl(?:\.replay-(\d+(?:-\w+)?))?$")
+
+
+def _event_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and field.name != "updated_at"
+    ]
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def dump_event(obj):
+    return json.dumps({
+        "model": obj._meta.label,
+        "fields": {
+            field.attname: _encode(getattr(obj, field.attname))
+            for field in _event_fields(type(obj))
+        },
+    })
+
+
+def load_event(line):
+    data = json.loads(line)
+    model = apps.get_model(data["model"])
+    values = data["fields"]
+    return model(**{
+        field.attname: field.to_python(values[field.attname])
+        for field in _event_fields(model)
+        if field.attname in values
+    })
+
+
+def write_events(events):
+    """Insert events in order; rows whose case/complaint is gone are dropped."""
+    for model, run in groupby(events, key=type):
+        rows = list(run)
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(rows, ignore_conflicts=True)
+            continue
+        except IntegrityError:
+            pass
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_create([row], ignore_conflicts=True)
+            except IntegrityError:
+                logger.error("Dropping audit event %s (%s)", row.event_id, model._meta.label)
+
+
+def _start_time(pid):
+    """Start time of process `pid` in clock ticks since boot, or None where /proc is missing."""
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            return fh.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+_process_id = None
+_process_id_pid = None
+
+
+def process_id():
+    """<pid>-<start time> of this process, unique across PID reuse."""
+    global _process_id, _process_id_pid
+    if _process_id_pid != os.getpid():
+        _process_id_pid = os.getpid()
+        _process_id = f"{os.getpid()}-{_start_time('self') or uuid.uuid4().hex}"
+    return _process_id
+
+
+class AuditBuffer:
+    """Per-process FIFO of committed history events."""
+
+    def __init__(self, max_size=200, interval=0.0, spool_dir=None):
+        self.max_size = max_size
+        self.interval = interval
+        self.events = deque()
+        self._lock = threading.Lock()  # events and spool file
+        self._flush_lock = threading.Lock()  # one writer at a time keeps order
+        self._thread = None
+        self._spool = None
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            name = f"audit-{process_id()}.jsonl"
+            # A file under our name was left by an earlier buffer: replay it, never truncate it
+            if os.path.exists(os.path.join(spool_dir, name)):
+                _replay_file(spool_dir, name, process_id())
+            self._spool = open(os.path.join(spool_dir, name), "a+")
+
+    def add(self, events):
+        with self._lock:
+            if self._spool is not None:
+                try:
+                    self._spool.write("".join(dump_event(e) + "\n" for e in events))
+                    self._spool.flush()
+                    os.fsync(self._spool.fileno())
+                except OSError:
+                    logger.exception("Could not spool audit events")
+            self.events.extend(events)
+            pending = len(self.events)
+
+        if self.interval <= 0 or pending >= self.max_size:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed; retrying in the background")
+                self._start_thread()
+        else:
+            self._start_thread()
+
+    def flush(self):
+        """Write every pending event. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self.events)
+            if not batch:
+                return 0
+            write_events(batch)
+            with self._lock:
+                for _ in batch:
+                    self.events.popleft()
+                self._rewrite_spool()
+            return len(batch)
+
+    def _rewrite_spool(self):
+        if self._spool is None:
+            return
+        self._spool.seek(0)
+        self._spool.truncate()
+        self._spool.write("".join(dump_event(e) + "\n" for e in self.events))
+        self._spool.flush()
+        os.fsync(self._spool.fileno())
+
+    def _start_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval if self.interval > 0 else RETRY_SECONDS)
+            if not self.events:
+                if self.interval <= 0:
+                    return
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit flush failed")
+            finally:
+                close_old_connections()
+
+
+def _alive(owner):
+    """Whether the process named by `owner` (<pid> or <pid>-<start>) is still running."""
+    pid, _, start = owner.partition("-")
+    pid = int(pid)
+    if pid == os.getpid():
+        return owner == process_id()
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if not start:
+        return True
+    running = _start_time(pid)
+    # A PID reused by a new process has a different start time
+    return running is None or running == start
+
+
+def _replay_file(spool_dir, name, source):
+    """Claim spool file `name` (of process `source`) and write its events. Returns the count."""
+    path = os.path.join(spool_dir, name)
+    claimed = os.path.join(spool_dir, f"audit-{source}.jsonl.replay-{process_id()}")
+    try:
+        os.rename(path, claimed)
+    except FileNotFoundError:
+        return 0  # another worker claimed it first
+    events = []
+    with open(claimed) as fh:
+        for line in fh:
+            try:
+                events.append(load_event(line))
+            except (ValueError, KeyError, LookupError):
+                logger.warning("Skipping malformed audit spool line in %s", name)
+    write_events(events)
+    os.remove(claimed)
+    return len(events)
+
+
+def replay_spool(spool_dir):
+    """Write the events spooled by worker processes that are no longer running."""
+    if not spool_dir or not os.path.isdir(spool_dir):
+        return 0
+    written = 0
+    for name in sorted(os.listdir(spool_dir)):
+        match = SPOOL_RE.match(name)
+        if not match or _alive(match[2] or match[1]):
+            continue
+        written += _replay_file(spool_dir, name, match[1])
+    return written
+
+
+_buffer = None
+_buffer_pid = None
+_buffer_lock = threading.Lock()
+
+
+def get_audit_buffer():
+    """Return this process' buffer, replaying orphaned spool files on first use."""
+    global _buffer, _buffer_pid
+    if _buffer is not None and _buffer_pid == os.getpid():
+        return _buffer
+    with _buffer_lock:
+        if _buffer is None or _buffer_pid != os.getpid():
+            spool_dir = getattr(settings, "AUDIT_SPOOL_DIR", None)
+            try:
+                replay_spool(spool_dir)
+            except Exception:
+                logger.exception("Replaying audit spool files failed")
+            _buffer = AuditBuffer(
+                getattr(settings, "AUDIT_BUFFER_SIZE", 200),
+                getattr(settings, "AUDIT_FLUSH_INTERVAL", 0.0),
+                spool_dir,
+            )
+            _buffer_pid = os.getpid()
+            atexit.register(_buffer.flush)
+    return _buffer
+
+
+def record(*entries):
+    """Queue unsaved history rows to be written after the current transaction commits."""
+    now = timezone.now()
+    for entry in entries:
+        entry.event_id = entry.event_id or uuid.uuid4()
+        entry.created_at = entry.created_at or now
+    transaction.on_commit(lambda: get_audit_buffer().add(entries))
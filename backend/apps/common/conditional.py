@@ -0,0 +1,136 @@
+"""
+Conditional GET (ETag / Last-Modified) for viewsets.
+
+Before serializing, a GET computes a validator for the rows the response is
+built from: for every source (the viewset's queryset plus the related rows
+listed in `conditional_related`) the row count, the sum of primary keys and
+the newest `updated_at`. All sources are summarized in one UNION ALL query.
+A matching If-None-Match is answered with 304 Not Modified and nothing is
+serialized. Deleting a row does not move the newest `updated_at`, only the
+count and pk sum in the ETag, so Last-Modified (and If-Modified-Since) is
+only used for retrieve, where a deleted row is a 404.
+
+The ETag also covers the requesting user, the query string and the response
+format, so it only matches for the same request. Validators are computed
+before the body is built; a write landing in between only costs the client
+one extra full response.
+"""
+import hashlib
+
+from django.db.models import Count, DateTimeField, Max, Sum, Value
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.generics import get_object_or_404
+
+
+def related_model(model, path):
+    """Model reached from `model` by a relation path such as "history__changed_by"."""
+    for name in path.split("__"):
+        model = model._meta.get_field(name).related_model
+    return model
+
+
+def related_rows(queryset, path):
+    """Rows of the model at `path` that belong to the rows of `queryset`."""
+    model = related_model(queryset.model, path)
+    return model._default_manager.filter(pk__in=queryset.order_by().values(path))
+
+
+def _summary(queryset, index):
+    model = queryset.model
+    names = {field.name for field in model._meta.concrete_fields}
+    stamp = next((name for name in ("updated_at", "created_at") if name in names), None)
+    newest = Max(stamp) if stamp else Value(None, output_field=DateTimeField())
+    return (
+        queryset.order_by()
+        .annotate(source=Value(index))
+        .values("source")
+        .annotate(rows=Count("pk"), ids=Sum("pk"), newest=newest)
+    )
+
+
+def summarize(sources):
+    """[(rows, sum of pks, newest timestamp)] for each plain queryset, in one query."""
+    summaries = [_summary(queryset, index) for index, queryset in enumerate(sources)]
+    query = summaries[0].union(*summaries[1:], all=True) if len(summaries) > 1 else summaries[0]
+    rows = sorted(query.values_list("source", "rows", "ids", "newest"))
+    return [(count, ids or 0, newest) for _, count, ids, newest in rows]
+
+
+class ConditionalGetMixin:
+    """
+    Answer list/retrieve (and actions calling `not_modified`) with 304 when
+    the client's validator is current.
+
+    `conditional_related` maps an action to the relation paths, from the
+    action's queryset, whose rows also end up in the response (nested
+    serializers, counts).
+    """
+
+    conditional_related = {}
+
+    def get_conditional_salt(self):
+        """Extra input for the ETag, for responses that change without a row changing."""
+        return ""
+
+    def not_modified(self, queryset, *related, version=None, dated=False):
+        """
+        Compute validators for `queryset` plus `related` paths from it. Returns
+        a 304 response when the request's conditions match, else None (the
+        validators are then sent with the response). `dated` adds
+        Last-Modified, for single-row responses.
+        """
+        # Re-select the rows by pk so joins, DISTINCT and annotations of the
+        # viewset queryset stay out of the aggregate.
+        rows = queryset.model._default_manager.filter(pk__in=queryset.order_by().values("pk"))
+        sources = [rows, *(related_rows(queryset, path) for path in related)]
+        summary = summarize(sources)
+
+        request = self.request
+        user = getattr(request, "user", None)
+        renderer = getattr(request, "accepted_renderer", None)
+        digest = hashlib.sha1(repr((
+            getattr(user, "pk", None),
+            request.get_full_path(),
+            getattr(renderer, "format", None),
+            self.get_conditional_salt(),
+            version,
+            summary,
+        )).encode()).hexdigest()[:20]
+        etag = f'"{version}-{digest}"' if version is not None else f'"{digest}"'
+
+        stamps = [newest for _, _, newest in summary if newest is not None]
+        last_modified = int(max(stamps).timestamp()) if dated and stamps else None
+        self._validators = (etag, last_modified)
+        return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        related = self.conditional_related.get("list", ())
+        return self.not_modified(queryset, *related) or super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        rows = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        not_modified = self.not_modified(
+            rows, *self.conditional_related.get("retrieve", ()), dated=True
+        )
+        if not_modified is None:
+            return super().retrieve(request, *args, **kwargs)
+        # Skip loading what the serializer needs, not the object permission checks
+        instance = get_object_or_404(rows.select_related(None).prefetch_related(None))
+        self.check_object_permissions(request, instance)
+        return not_modified
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, "_validators", None)
+        if validators and request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response.headers.setdefault("ETag", etag)
+            if last_modified is not None:
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+            patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,124 @@
+"""
+RFC 6902 JSON Patch (with RFC 6901 JSON Pointers) for JSON documents.
+
+`apply_patch(document, operations)` returns a patched deep copy and leaves
+the input untouched, so a failing operation never leaves a half-applied
+document behind.
+"""
+import copy
+
+from rest_framework.parsers import JSONParser
+
+OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+class JSONPatchParser(JSONParser):
+    """Accept request bodies sent as `application/json-patch+json`."""
+
+    media_type = "application/json-patch+json"
+
+
+class PatchError(ValueError):
+    """The patch is malformed or cannot be applied to the document."""
+
+
+class PatchTestFailed(PatchError):
+    """A `test` operation did not match (the document has changed)."""
+
+
+def parse_pointer(pointer):
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    if pointer == "":
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container, token, allow_end=False):
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _resolve(document, tokens):
+    """Return the value at `tokens`."""
+    value = document
+    for token in tokens:
+        if isinstance(value, dict):
+            if token not in value:
+                raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[_index(value, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+    return value
+
+
+def _add(document, tokens, value):
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, key, allow_end=True), value)
+    else:
+        raise PatchError(f"Cannot add to a scalar at /{'/'.join(tokens[:-1])}")
+    return document
+
+
+def _remove(document, tokens):
+    if not tokens:
+        raise PatchError("Cannot remove the whole document.")
+    parent = _resolve(document, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, key))
+    raise PatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_patch(document, operations):
+    if not isinstance(operations, list):
+        raise PatchError("A JSON patch must be a list of operations.")
+    document = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            raise PatchError(f"Invalid operation: {operation!r}")
+        op = operation["op"]
+        path = parse_pointer(operation.get("path"))
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' requires a value.")
+
+        if op == "add":
+            document = _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            _resolve(document, path)
+            if path:
+                _remove(document, path)
+            document = _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "test":
+            if _resolve(document, path) != operation["value"]:
+                raise PatchTestFailed(f"Test failed at {operation['path']}")
+        else:
+            source = parse_pointer(operation.get("from"))
+            if op == "move":
+                if path[:len(source)] == source and path != source:
+                    raise PatchError("Cannot move a value into one of its children.")
+                value = _remove(document, source)
+            else:
+                value = copy.deepcopy(_resolve(document, source))
+            document = _add(document, path, value)
+    return document
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.common.thumbnails import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Make the missing thumbnails of suspect photos and user avatars "
+        "(after imports, or uploads whose background job did not finish)."
+    )
+
+    def handle(self, *args, **options):
+        updated = backfill()
+        self.stdout.write(self.style.SUCCESS(f"Made thumbnails for {updated} images."))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.common.audit import replay_spool
+
+
+class Command(BaseCommand):
+    help = (
+        "Write case/complaint history events left in audit spool files by "
+        "worker processes that are no longer running. Events already written "
+        "are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--spool-dir", default=settings.AUDIT_SPOOL_DIR)
+
+    def handle(self, *args, **options):
+        written = replay_spool(options["spool_dir"])
+        self.stdout.write(self.style.SUCCESS(f"Replayed {written} audit events."))
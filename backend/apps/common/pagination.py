@@ -0,0 +1,174 @@
+"""
+Opt-in keyset pagination.
+
+List endpoints keep PageNumberPagination by default. Passing
+`?pagination=cursor` (or a `cursor` from a previous response) switches to
+keyset pagination: each page is fetched with a WHERE on the last row's
+ordering key instead of OFFSET, and without COUNT(*), so deep pages cost
+the same as the first. The key is the active ordering (default
+`-created_at`) plus `id` as a tie-breaker, which the (created_at, id)
+indexes serve as a single range scan. Non-null annotations (e.g. the
+suspects' current_rank) can be part of the key too.
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over the queryset ordering plus an `id` tie-breaker."""
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        self.annotations = set(queryset.query.annotations)
+        self.fields = [self._field(queryset, name.lstrip("-")) for name in self.ordering]
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(position, ordering))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_ordering(self, queryset):
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        for name in ordering:
+            if not isinstance(name, str) or name == "?" or "__" in name:
+                raise ValidationError({"ordering": "Unsupported ordering for cursor pagination."})
+            if name.lstrip("-") in queryset.query.annotations:
+                continue
+            try:
+                field = queryset.model._meta.get_field(name.lstrip("-"))
+            except FieldDoesNotExist:
+                raise ValidationError({"ordering": f"Cannot paginate by '{name}'."})
+            if field.null:
+                raise ValidationError({
+                    "ordering": f"Cursor pagination cannot order by nullable field '{field.name}'."
+                })
+        if not ordering:
+            ordering = ["-created_at"]
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering.append("-id" if ordering[-1].startswith("-") else "id")
+        return ["id" if name == "pk" else "-id" if name == "-pk" else name for name in ordering]
+
+    @staticmethod
+    def _field(queryset, name):
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def _flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    def _after(self, position, ordering):
+        """Rows strictly after `position` in `ordering` (lexicographic compare)."""
+        clauses = []
+        for i, name in enumerate(ordering):
+            lookup = "lt" if name.startswith("-") else "gt"
+            equal = {ordering[j].lstrip("-"): position[j] for j in range(i)}
+            clauses.append(Q(**equal, **{f"{name.lstrip('-')}__{lookup}": position[i]}))
+        bound = "lte" if ordering[0].startswith("-") else "gte"
+        # The redundant bound on the leading column keeps this an index range scan.
+        return Q(**{f"{ordering[0].lstrip('-')}__{bound}": position[0]}) & reduce(or_, clauses)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = data["p"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(self.fields, values)]
+            return position, bool(data.get("r"))
+        except (
+            TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse):
+        # value_to_string keeps full datetime precision (DjangoJSONEncoder
+        # truncates to milliseconds, which would skip or repeat rows).
+        values = [
+            str(getattr(obj, name)) if name in self.annotations else field.value_to_string(obj)
+            for name, field in zip((name.lstrip("-") for name in self.ordering), self.fields)
+        ]
+        payload = json.dumps({"p": values, "r": int(reverse)})
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+
+class OptInKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination unless the client asks for keyset pagination
+    with `?pagination=cursor` or sends a `cursor`.
+    """
+
+    mode_query_param = "pagination"
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or self.keyset_class.cursor_query_param in request.query_params
+        ):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,113 @@
+"""
+Full-text search.
+
+Models that define a `search_vector` column (a tsvector kept up to date by a
+trigger installed in their migration, with a GIN index) are searched with
+`@@` and ranked with `ts_rank` on PostgreSQL. On other databases, and for
+models without the column, the filter behaves exactly like DRF's
+SearchFilter (`ILIKE` over `search_fields`).
+
+Documents use the `simple` configuration: data is a mix of Persian and
+English and PostgreSQL ships no Persian stemmer, so words are only
+lower-cased. Every search term is matched as a prefix.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR_FIELD = "search_vector"
+TERM_RE = re.compile(r"\w+")
+
+
+def to_tsquery(terms):
+    """Build a raw tsquery matching every term as a prefix, e.g. `foo:* & bar:*`."""
+    words = [word for term in terms for word in TERM_RE.findall(term.lower())]
+    return " & ".join(f"{word}:*" for word in words)
+
+
+def search_document_sql(weights, prefix="NEW."):
+    """SQL expression building the weighted tsvector for `{column: weight}`."""
+    return " || ".join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in weights.items()
+    )
+
+
+def install_search_trigger(schema_editor, table, weights):
+    """
+    Create the trigger that maintains `table.search_vector`, backfill it and
+    add the GIN index. No-op outside PostgreSQL, where the column stays NULL
+    and searches fall back to ILIKE.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    function = f"{table}_search_vector_update"
+    columns = ", ".join(list(weights) + [SEARCH_VECTOR_FIELD])
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            NEW.{SEARCH_VECTOR_FIELD} := {search_document_sql(weights)};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute(f"""
+        CREATE TRIGGER {table}_search_vector
+        BEFORE INSERT OR UPDATE OF {columns} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {function}()
+    """)
+    schema_editor.execute(
+        f"UPDATE {table} SET {SEARCH_VECTOR_FIELD} = {search_document_sql(weights, prefix='')}"
+    )
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {table}_search_gin ON {table} "
+        f"USING gin ({SEARCH_VECTOR_FIELD})"
+    )
+
+
+def drop_search_trigger(schema_editor, table):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_gin")
+    schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+    schema_editor.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter that uses the `search_vector`
+    column when it is available. Results are ordered by rank unless the
+    client passes `?ordering=` (which is also needed to page search results
+    with a cursor, since rank is not a column).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        tsquery = to_tsquery(terms)
+        if not tsquery or not self.uses_full_text(queryset):
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(tsquery, search_type="raw", config=SEARCH_CONFIG)
+        queryset = queryset.filter(**{SEARCH_VECTOR_FIELD: query})
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        return queryset.annotate(
+            search_rank=SearchRank(F(SEARCH_VECTOR_FIELD), query)
+        ).order_by("-search_rank", *ordering)
+
+    @staticmethod
+    def uses_full_text(queryset):
+        if connections[queryset.db].vendor != "postgresql":
+            return False
+        try:
+            queryset.model._meta.get_field(SEARCH_VECTOR_FIELD)
+        except FieldDoesNotExist:
+            return False
+        return True
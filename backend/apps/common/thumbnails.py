@@ -0,0 +1,260 @@
+"""
+Thumbnails of uploaded images (Suspect.photo, User.avatar).
+
+After an upload commits, each image is scaled once to every width in
+WIDTHS and encoded as WebP and JPEG. The variants are stored next to the
+original, named after a hash of its content
+(suspects/face.<hash>.160w.webp), so a name never changes meaning and can
+be cached for a year (CACHE_CONTROL). The names are kept in a JSON field
+on the row ({"source", "hash", "widths": {width: {format: name}}}) for the
+serializers' ThumbnailField.
+
+Variants are plain files under MEDIA_ROOT. In production the web server
+serves them and adds the header for names matching VARIANT_PATTERN, e.g.
+with nginx (MEDIA_ROOT at /app/media):
+
+    location ~ "^/media/.+[.][0-9a-f]{16}[.][0-9]+w[.](webp|jpeg)$" {
+        root /app;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
+With DEBUG, serve() does the same from Django.
+
+Encoding runs on a small per-process thread pool (THUMBNAIL_WORKERS, 0
+runs it inline after commit), which other image jobs share through
+run_after_commit(); `manage.py generate_thumbnails` fills in missing
+variants after imports or a crash.
+"""
+import hashlib
+import io
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.views import static
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (160, 480)
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# (model, image field, variants field) of every thumbnailed image
+SOURCES = [
+    ("suspects.Suspect", "photo", "photo_variants"),
+    ("accounts.User", "avatar", "avatar_variants"),
+]
+# Matches variant names only, for serve() and its URL pattern
+VARIANT_PATTERN = r"[^?#]+\.[0-9a-f]{16}\.\d+w\.(?:webp|jpeg)"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def variant_name(source, digest, width, fmt):
+    stem = posixpath.splitext(source)[0]
+    return f"{stem}.{digest}.{width}w.{fmt}"
+
+
+def _encode(image, width, fmt):
+    variant = image.copy()
+    variant.thumbnail((width, width), Image.LANCZOS)
+    if fmt == "jpeg" and variant.mode != "RGB":
+        # No alpha in JPEG: flatten onto white
+        background = Image.new("RGB", variant.size, "white")
+        background.paste(variant, mask=variant.getchannel("A") if "A" in variant.mode else None)
+        variant = background
+    pil_format, options = FORMATS[fmt]
+    out = io.BytesIO()
+    variant.save(out, pil_format, **options)
+    return out.getvalue()
+
+
+def render(storage, source):
+    """Write the variants of `source` (a stored image name); returns the JSON to keep."""
+    with storage.open(source, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    widths = {
+        str(width): {fmt: variant_name(source, digest, width, fmt) for fmt in FORMATS}
+        for width in WIDTHS
+    }
+    missing = [
+        (int(width), fmt, name)
+        for width, names in widths.items() for fmt, name in names.items()
+        if not storage.exists(name)
+    ]
+    if missing:
+        image = Image.open(io.BytesIO(data))
+        # JPEG can decode at a reduced scale, far cheaper for camera-sized photos
+        image.draft("RGB", (max(WIDTHS) * 2, max(WIDTHS) * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if alpha else "RGB")
+        for width, fmt, name in missing:
+            saved = storage.save(name, ContentFile(_encode(image, width, fmt)))
+            if saved != name:
+                storage.delete(saved)  # another worker wrote the same variant
+    return {"source": source, "hash": digest, "widths": widths}
+
+
+def generate(label, pk, field, variants_field, source):
+    """Render the variants of one row's image and record them if the image is unchanged."""
+    model = apps.get_model(label)
+    variants = render(model._meta.get_field(field).storage, source)
+    return model.objects.filter(pk=pk, **{field: source}).update(
+        **{variants_field: variants, "updated_at": timezone.now()}
+    )
+
+
+def backfill():
+    """Make the missing or outdated variants of every image, inline. Returns the rows updated."""
+    updated = 0
+    for label, field, variants_field in SOURCES:
+        rows = (
+            apps.get_model(label)._default_manager.exclude(**{f"{field}__isnull": True})
+            .exclude(**{field: ""}).values_list("pk", field, variants_field)
+        )
+        for pk, source, variants in rows.iterator():
+            if (variants or {}).get("source") == source:
+                continue
+            try:
+                updated += generate(label, pk, field, variants_field, source)
+            except Exception:
+                logger.exception("Thumbnail generation failed for %s #%s", label, pk)
+    return updated
+
+
+def _call(fn, args):
+    try:
+        fn(*args)
+    except Exception:
+        logger.exception("Background image job %s%r failed", fn.__name__, args)
+
+
+def _call_pooled(fn, args):
+    close_old_connections()
+    try:
+        _call(fn, args)
+    finally:
+        connection.close()
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """This process' thumbnail pool, or None when thumbnails are made inline."""
+    global _executor, _executor_pid
+    workers = getattr(settings, "THUMBNAIL_WORKERS", 0)
+    if workers <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def run_after_commit(fn, *args):
+    """Run fn(*args) on the pool (or inline) once the transaction commits; errors are logged."""
+    def submit():
+        executor = get_executor()
+        if executor is None:
+            _call(fn, args)
+        else:
+            executor.submit(_call_pooled, fn, args)
+
+    transaction.on_commit(submit)
+
+
+def keep_variants(instance, field, variants_field, update_fields=None):
+    """
+    pre_save: carry over variants written by the pool since `instance` was
+    loaded, so saving a stale instance does not drop them. When the image
+    was cleared they are carried over too, for schedule() to notice.
+    """
+    if instance._state.adding or update_fields is not None:
+        return
+    source = getattr(instance, field).name or ""
+    if (getattr(instance, variants_field) or {}).get("source") != source:
+        rows = type(instance)._default_manager.filter(pk=instance.pk)
+        if source:
+            rows = rows.filter(**{field: source})
+        stored = rows.values_list(variants_field, flat=True).first()
+        if stored and (not source or stored.get("source") == source):
+            setattr(instance, variants_field, stored)
+
+
+def _generate(label, pk, field, variants_field, source, done):
+    if generate(label, pk, field, variants_field, source) and done:
+        done()
+
+
+def schedule(instance, field, variants_field, done=None, created=False):
+    """
+    post_save: queue thumbnails when the image changed since its variants
+    were made; `done` runs once they are recorded. Returns whether the
+    image changed.
+    """
+    source = getattr(instance, field).name or ""
+    model = type(instance)
+    if not source:
+        if created:
+            return False
+        # The instance may predate its variants, so ask the row
+        return bool(
+            model._default_manager.filter(pk=instance.pk).exclude(**{variants_field: {}})
+            .update(**{variants_field: {}, "updated_at": timezone.now()})
+        )
+    if source == (getattr(instance, variants_field) or {}).get("source"):
+        return False
+    run_after_commit(_generate, model._meta.label, instance.pk, field, variants_field, source, done)
+    return True
+
+
+def variant_url(name, request=None):
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+class ThumbnailField(serializers.ReadOnlyField):
+    """URL of one variant from a variants JSON field (null until it is made)."""
+
+    def __init__(self, width=WIDTHS[0], fmt="webp", **kwargs):
+        self.width, self.fmt = str(width), fmt
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        name = ((variants or {}).get("widths") or {}).get(self.width, {}).get(self.fmt)
+        return variant_url(name, self.context.get("request")) if name else None
+
+
+class ThumbnailSetField(serializers.ReadOnlyField):
+    """{"<width>w": {format: URL}} of all variants, for srcset (empty until made)."""
+
+    def to_representation(self, variants):
+        request = self.context.get("request")
+        return {
+            f"{width}w": {fmt: variant_url(name, request) for fmt, name in names.items()}
+            for width, names in ((variants or {}).get("widths") or {}).items()
+        }
+
+
+def serve(request, path):
+    """Serve a variant from MEDIA_ROOT with far-future caching (DEBUG only, like static())."""
+    response = static.serve(request, path, document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -1,5 +1,7 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django_fsm import FSMField, RETURN_VALUE, transition
 
 from apps.common.models import TimeStampedModel, CrimeSeverity
@@ -66,6 +68,8 @@ class Complaint(TimeStampedModel):
     title = models.CharField(max_length=255)
     description = models.TextField()
     location = models.CharField(max_length=255, blank=True)
+    # Maintained by a database trigger, see apps.common.search
+    search_vector = SearchVectorField(null=True, editable=False)
     incident_date = models.DateTimeField(null=True, blank=True)
     crime_severity = models.IntegerField(
         choices=CrimeSeverity.choices,
@@ -78,6 +82,9 @@ class Complaint(TimeStampedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+        ]
         permissions = [
             ("can_submit_complaint", "Can submit complaint"),
             ("can_review_as_cadet", "Can review complaints as cadet"),
@@ -203,6 +210,10 @@ class ComplaintHistory(TimeStampedModel):
         null=True,
     )
     message = models.TextField(blank=True)
+    # Set when the event is recorded, not when the buffered row is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Lets apps.common.audit replay spooled events without duplicates
+    event_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
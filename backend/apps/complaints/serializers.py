@@ -63,6 +63,14 @@ class ComplaintSerializer(serializers.ModelSerializer):
         return complaint
 
 
+# Relation paths (from a complaint) whose rows ComplaintSerializer renders;
+# used for conditional GET validators.
+COMPLAINT_SERIALIZER_RELATED = (
+    "created_by", "assigned_cadet", "assigned_officer", "complainants",
+    "history", "history__changed_by",
+)
+
+
 class ComplaintTransitionSerializer(serializers.Serializer):
     """Serializer for complaint state transitions."""
     
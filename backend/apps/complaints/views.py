@@ -6,9 +6,13 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from apps.cases.models import Case, CaseOrigin
+from apps.common import audit
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.pagination import OptInKeysetPagination
 
 from .models import Complaint, ComplaintHistory, ComplaintStatus
 from .serializers import (
+    COMPLAINT_SERIALIZER_RELATED,
     AddComplainantSerializer,
     ComplaintSerializer,
     ComplaintTransitionSerializer,
@@ -17,12 +21,17 @@ from .serializers import (
 User = get_user_model()
 
 
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = ComplaintSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
     filterset_fields = ["status", "crime_severity", "created_by"]
     search_fields = ["title", "description", "location"]
     ordering_fields = ["created_at", "updated_at", "crime_severity"]
+    conditional_related = {
+        "list": COMPLAINT_SERIALIZER_RELATED,
+        "retrieve": COMPLAINT_SERIALIZER_RELATED,
+    }
 
     def create(self, request, *args, **kwargs):
         """Only users with Complainant role can file complaints."""
@@ -65,13 +74,13 @@ class ComplaintViewSet(viewsets.ModelViewSet):
         return Complaint.objects.filter(q).distinct()
 
     def _log_transition(self, complaint, from_status, to_status, user, message=""):
-        ComplaintHistory.objects.create(
+        audit.record(ComplaintHistory(
             complaint=complaint,
             from_status=from_status,
             to_status=to_status,
             changed_by=user,
             message=message,
-        )
+        ))
 
     @action(detail=True, methods=["post"])
     def submit(self, request, pk=None):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Evidence, EvidenceAttachment, Testimony
+from .models import AttachmentUpload, Evidence, EvidenceAttachment, Testimony
 
 
 class EvidenceAttachmentInline(admin.TabularInline):
@@ -29,6 +29,13 @@ class EvidenceAttachmentAdmin(admin.ModelAdmin):
     list_filter = ["attachment_type", "created_at"]
 
 
+@admin.register(AttachmentUpload)
+class AttachmentUploadAdmin(admin.ModelAdmin):
+    list_display = ["id", "evidence", "file", "offset", "length", "uploaded_by", "attachment", "updated_at"]
+    list_filter = ["attachment_type", "updated_at"]
+    readonly_fields = ["offset", "attachment"]
+
+
 @admin.register(Testimony)
 class TestimonyAdmin(admin.ModelAdmin):
     list_display = ["id", "evidence", "witness", "witness_name", "interviewer", "recorded_at"]
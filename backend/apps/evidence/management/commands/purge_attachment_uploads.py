@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.evidence.uploads import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete resumable attachment uploads idle for longer than "
+        "ATTACHMENT_UPLOAD_EXPIRY_HOURS, with the files of unfinished ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.ATTACHMENT_UPLOAD_EXPIRY_HOURS)
+
+    def handle(self, *args, **options):
+        purged = purge(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} uploads."))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_created_at_id_index'),
+        ('evidence', '0002_alter_evidence_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evidence',
+            index=models.Index(fields=['created_at', 'id'], name='evidence_ev_created_80fb87_idx'),
+        ),
+    ]
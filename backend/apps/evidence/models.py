@@ -1,4 +1,7 @@
+import uuid
+
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.exceptions import ValidationError
 
@@ -63,6 +66,8 @@ class Evidence(TimeStampedModel):
     )
     collection_date = models.DateTimeField(null=True, blank=True)
     location_found = models.CharField(max_length=255, blank=True)
+    # Maintained by a database trigger, see apps.common.search
+    search_vector = SearchVectorField(null=True, editable=False)
     
     # Type-specific metadata stored as JSON
     metadata = models.JSONField(
@@ -87,6 +92,9 @@ class Evidence(TimeStampedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+        ]
         verbose_name_plural = "Evidence"
         permissions = [
             ("can_verify_evidence", "Can verify evidence"),
@@ -156,6 +164,52 @@ class EvidenceAttachment(TimeStampedModel):
         return f"{self.get_attachment_type_display()} for {self.evidence.title}"
 
 
+class AttachmentUpload(TimeStampedModel):
+    """
+    A chunked, resumable attachment upload (apps.evidence.uploads). Chunks
+    are written straight into `file`; once all `length` bytes are in, it is
+    finished into an EvidenceAttachment pointing at the same file.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    evidence = models.ForeignKey(
+        Evidence,
+        on_delete=models.CASCADE,
+        related_name="uploads",
+    )
+    file = models.FileField(upload_to="evidence_attachments/%Y/%m/")
+    length = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    attachment_type = models.CharField(
+        max_length=20,
+        choices=EvidenceAttachment.AttachmentType.choices,
+    )
+    description = models.CharField(max_length=255, blank=True)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="attachment_uploads",
+    )
+    attachment = models.OneToOneField(
+        EvidenceAttachment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="upload",
+    )
+    # The request writing a chunk, and until when its claim holds
+    writer = models.UUIDField(null=True, blank=True, editable=False)
+    writing_until = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"Upload of {self.file.name} ({self.offset}/{self.length} bytes)"
+
+
 class Testimony(TimeStampedModel):
     """
     Detailed testimony/witness statement linked to evidence.
@@ -1,9 +1,10 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from rest_framework import serializers
 
 from apps.accounts.serializers import UserSerializer
-from .models import Evidence, EvidenceAttachment, EvidenceStatus, EvidenceType, Testimony
+from .models import AttachmentUpload, Evidence, EvidenceAttachment, EvidenceStatus, EvidenceType, Testimony
 
 User = get_user_model()
 
@@ -20,6 +21,42 @@ class EvidenceAttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ["uploaded_by"]
 
 
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    """A resumable upload; `offset` is where the next chunk starts."""
+
+    filename = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AttachmentUpload
+        fields = [
+            "id", "evidence", "filename", "length", "offset", "attachment_type",
+            "description", "attachment", "created_at", "updated_at",
+        ]
+        read_only_fields = fields
+
+    def get_filename(self, obj):
+        return obj.file.name.rsplit("/", 1)[-1]
+
+
+class AttachmentUploadCreateSerializer(serializers.Serializer):
+    """Serializer for starting a resumable attachment upload."""
+
+    filename = serializers.CharField(max_length=100)
+    length = serializers.IntegerField(min_value=1)
+    attachment_type = serializers.ChoiceField(
+        choices=EvidenceAttachment.AttachmentType.choices,
+        default=EvidenceAttachment.AttachmentType.DOCUMENT,
+    )
+    description = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+    def validate_length(self, value):
+        if value > settings.ATTACHMENT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Files larger than {settings.ATTACHMENT_UPLOAD_MAX_SIZE} bytes are not accepted."
+            )
+        return value
+
+
 class TestimonySerializer(serializers.ModelSerializer):
     witness = UserSerializer(read_only=True)
     witness_id = serializers.PrimaryKeyRelatedField(
@@ -103,6 +140,15 @@ class EvidenceSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+# Relation paths (from an evidence item) whose rows EvidenceSerializer
+# renders; used for conditional GET validators.
+EVIDENCE_SERIALIZER_RELATED = (
+    "collected_by", "verified_by",
+    "attachments", "attachments__uploaded_by",
+    "testimony_detail", "testimony_detail__witness", "testimony_detail__interviewer",
+)
+
+
 class EvidenceCreateWithTestimonySerializer(serializers.Serializer):
     """Combined serializer for creating testimony evidence with details."""
     
@@ -1,9 +1,24 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from .models import Evidence, EvidenceType
+from . import uploads
+from .models import AttachmentUpload, Evidence, EvidenceAttachment, EvidenceType
 from apps.cases.models import Case, CaseStatus
 from apps.common.models import CrimeSeverity
 
@@ -351,3 +366,227 @@ class EvidenceAccessControlTestCase(APITestCase):
             status.HTTP_403_FORBIDDEN,
             status.HTTP_401_UNAUTHORIZED
         ])
+
+
+class ResumableAttachmentUploadTestCase(APITestCase):
+    """Chunked, resumable attachment uploads (apps.evidence.uploads)."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.officer = User.objects.create_user(username='officer', email='officer@example.com', password='pass123')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='pass123')
+        self.case = Case.objects.create(
+            title="Upload Case",
+            created_by=self.officer,
+            crime_severity=CrimeSeverity.LEVEL_2,
+            status=CaseStatus.INVESTIGATION,
+        )
+        self.evidence = Evidence.objects.create(
+            case=self.case,
+            title="Body-cam footage",
+            description="Patrol recording",
+            evidence_type=EvidenceType.OTHER,
+            collected_by=self.officer,
+        )
+        self.data = os.urandom(5000)
+        self.client.force_authenticate(user=self.officer)
+
+    def start(self, length=None, **extra):
+        return self.client.post(f'/api/v1/evidence/{self.evidence.id}/uploads/', {
+            'filename': 'bodycam.mp4',
+            'length': len(self.data) if length is None else length,
+            'attachment_type': 'video',
+            **extra,
+        }, format='json')
+
+    def patch(self, upload_id, offset, chunk, content_type=uploads.CONTENT_TYPE):
+        return self.client.generic(
+            'PATCH', f'/api/v1/evidence/uploads/{upload_id}/', chunk,
+            content_type=content_type, HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload_resumes_and_finishes(self):
+        response = self.start(description="Interview room 2")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload_id = response.data["id"]
+        self.assertTrue(response["Location"].endswith(f'/api/v1/evidence/uploads/{upload_id}/'))
+        self.assertEqual(response["Upload-Offset"], "0")
+        upload = AttachmentUpload.objects.get(pk=upload_id)
+        self.assertRegex(upload.file.name, r'^evidence_attachments/\d{4}/\d{2}/bodycam.*\.mp4$')
+        self.assertEqual(os.path.getsize(upload.file.path), 0)
+
+        response = self.patch(upload_id, 0, self.data[:2000])
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response["Upload-Offset"], "2000")
+
+        # A retried chunk from the old offset is refused, with the offset to resume from
+        response = self.patch(upload_id, 0, self.data[:2000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.head(f'/api/v1/evidence/uploads/{upload_id}/')
+        self.assertEqual(response["Upload-Offset"], "2000")
+        self.assertEqual(response["Upload-Length"], "5000")
+
+        response = self.client.post(f'/api/v1/evidence/uploads/{upload_id}/finish/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.patch(upload_id, 2000, self.data[2000:])
+        self.assertEqual(response["Upload-Offset"], "5000")
+
+        response = self.client.post(f'/api/v1/evidence/uploads/{upload_id}/finish/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        attachment = EvidenceAttachment.objects.get(pk=response.data["id"])
+        self.assertEqual(attachment.evidence, self.evidence)
+        self.assertEqual(attachment.attachment_type, "video")
+        self.assertEqual(attachment.description, "Interview room 2")
+        self.assertEqual(attachment.uploaded_by, self.officer)
+        self.assertEqual(attachment.file.name, upload.file.name)
+        with attachment.file.open("rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+        # Finishing again (e.g. the response was lost) returns the same attachment
+        response = self.client.post(f'/api/v1/evidence/uploads/{upload_id}/finish/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], attachment.id)
+        response = self.patch(upload_id, 5000, b"x")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_interrupted_chunk_keeps_received_bytes(self):
+        upload_id = self.start().data["id"]
+
+        class DroppedStream(io.BytesIO):
+            def read(self, size=-1):
+                data = super().read(size)
+                if not data:
+                    raise OSError("client went away")
+                return data
+
+        with mock.patch.object(uploads, "CHUNK_SIZE", 1000):
+            upload = uploads.write_chunk(
+                AttachmentUpload.objects.get(pk=upload_id), 0, DroppedStream(self.data[:3000]), 5000
+            )
+        self.assertEqual(upload.offset, 3000)
+        self.assertEqual(AttachmentUpload.objects.get(pk=upload_id).offset, 3000)
+
+        response = self.patch(upload_id, 3000, self.data[3000:])
+        self.assertEqual(response["Upload-Offset"], "5000")
+        response = self.client.post(f'/api/v1/evidence/uploads/{upload_id}/finish/')
+        with EvidenceAttachment.objects.get(pk=response.data["id"]).file.open("rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_concurrent_writer_is_refused_until_its_claim_runs_out(self):
+        upload_id = self.start().data["id"]
+        AttachmentUpload.objects.filter(pk=upload_id).update(
+            writer=uuid.uuid4(), writing_until=timezone.now() + timedelta(seconds=30)
+        )
+        response = self.patch(upload_id, 0, self.data[:1000])
+        self.assertEqual(response.status_code, 423)
+        response = self.client.delete(f'/api/v1/evidence/uploads/{upload_id}/')
+        self.assertEqual(response.status_code, 423)
+
+        # A claim left behind by a killed worker expires
+        AttachmentUpload.objects.filter(pk=upload_id).update(
+            writing_until=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.patch(upload_id, 0, self.data[:1000])
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        upload = AttachmentUpload.objects.get(pk=upload_id)
+        self.assertEqual((upload.offset, upload.writer, upload.writing_until), (1000, None, None))
+
+    def test_invalid_requests(self):
+        with override_settings(ATTACHMENT_UPLOAD_MAX_SIZE=4999):
+            response = self.start()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("length", response.data)
+
+        upload_id = self.start().data["id"]
+        response = self.patch(upload_id, 0, self.data + b"x")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.patch(upload_id, 0, self.data, content_type='application/octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        response = self.client.generic(
+            'PATCH', f'/api/v1/evidence/uploads/{upload_id}/', self.data,
+            content_type=uploads.CONTENT_TYPE,
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(AttachmentUpload.objects.get(pk=upload_id).offset, 0)
+
+        # Other users neither see nor write to someone else's upload
+        self.client.force_authenticate(user=self.other)
+        response = self.patch(upload_id, 0, self.data)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get('/api/v1/evidence/uploads/')
+        self.assertEqual(response.data["count"], 0)
+        response = self.client.post(f'/api/v1/evidence/{self.evidence.id}/uploads/', {
+            'filename': 'x.mp4', 'length': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_abort_and_purge(self):
+        upload = AttachmentUpload.objects.get(pk=self.start().data["id"])
+        path = upload.file.path
+        response = self.client.delete(f'/api/v1/evidence/uploads/{upload.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(AttachmentUpload.objects.filter(pk=upload.pk).exists())
+
+        stale = AttachmentUpload.objects.get(pk=self.start().data["id"])
+        recent = AttachmentUpload.objects.get(pk=self.start().data["id"])
+        AttachmentUpload.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(hours=100)
+        )
+        out = io.StringIO()
+        call_command("purge_attachment_uploads", "--hours", "72", stdout=out)
+        self.assertIn("Purged 1 uploads", out.getvalue())
+        self.assertFalse(os.path.exists(stale.file.path))
+        self.assertEqual(list(AttachmentUpload.objects.values_list("pk", flat=True)), [recent.pk])
+
+
+class AttachmentUploaderQueryTestCase(APITestCase):
+    """Serializing the token-authenticated uploader costs one user query."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='pass123'
+        )
+        case = Case.objects.create(
+            title="Upload Case", created_by=self.officer, crime_severity=CrimeSeverity.LEVEL_2
+        )
+        self.evidence = Evidence.objects.create(
+            case=case, title="Photo", description="Scene photo",
+            evidence_type=EvidenceType.OTHER, collected_by=self.officer,
+        )
+        response = self.client.post('/api/v1/auth/login/', {
+            'identifier': 'officer', 'password': 'pass123'
+        }, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+
+    def upload(self):
+        return self.client.post(
+            f'/api/v1/evidence/{self.evidence.id}/upload_attachment/',
+            {'file': SimpleUploadedFile('note.txt', b'notes'), 'attachment_type': 'document'},
+            format='multipart',
+        )
+
+    def test_upload_attachment_loads_uploader_once(self):
+        self.upload()  # caches the auth version
+        with CaptureQueriesContext(connection) as queries:
+            response = self.upload()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['uploaded_by']['email'], 'officer@example.com')
+        user_queries = [
+            q['sql'] for q in queries.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "accounts_user"' in q['sql']
+        ]
+        self.assertEqual(len(user_queries), 1, user_queries)
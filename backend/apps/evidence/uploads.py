@@ -0,0 +1,235 @@
+"""
+Chunked, resumable evidence attachment uploads, in the style of tus.
+
+A single multipart request has to carry a whole file, which for hours of
+interrogation or body-cam video outlasts the worker timeout. Instead:
+
+1. POST /evidence/{id}/uploads/ {"filename", "length", "attachment_type",
+   "description"} creates an AttachmentUpload. Its file is reserved in
+   storage right away (empty, under the attachment's final name).
+2. PATCH /evidence/uploads/{upload id}/ with Content-Type
+   application/offset+octet-stream, an Upload-Offset header equal to the
+   upload's offset and a chunk of the file as the body. The body is
+   streamed into the file at that offset in CHUNK_SIZE pieces, never
+   buffered whole, and the offset advances by the bytes written, including
+   when the client drops mid-chunk. A few MB to a few hundred MB per chunk
+   keeps each request well inside the worker timeout. No transaction is
+   held while the body streams in: the request claims the upload with a
+   short UPDATE (writer, writing_until), renews the claim as it goes and
+   moves the offset with a conditional UPDATE at the end. A second writer
+   is refused while the claim holds; a claim left by a killed worker runs
+   out after CLAIM_SECONDS.
+3. After an interruption, GET or HEAD /evidence/uploads/{upload id}/
+   reports the offset to resume from (also in the Upload-Offset header).
+4. POST /evidence/uploads/{upload id}/finish/ once all bytes are in makes
+   the EvidenceAttachment, pointing at the same file; nothing is copied.
+   Repeating it returns the same attachment.
+
+DELETE abandons an upload and its file; `manage.py purge_attachment_uploads`
+clears uploads left unfinished for ATTACHMENT_UPLOAD_EXPIRY_HOURS.
+
+Chunks are written in place, so the attachment storage must have local
+paths (the default FileSystemStorage, shared between web hosts).
+"""
+import os
+import posixpath
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AttachmentUpload, EvidenceAttachment
+
+CONTENT_TYPE = "application/offset+octet-stream"
+CHUNK_SIZE = 1024 * 1024
+# How long a chunk's claim on an upload holds without being renewed
+CLAIM_SECONDS = 30
+
+
+class UploadError(ValueError):
+    status_code = 400
+
+
+class UploadConflict(UploadError):
+    status_code = 409
+
+
+class UploadLocked(UploadError):
+    status_code = 423
+
+
+def start(evidence, uploaded_by, filename, length, attachment_type, description=""):
+    """Create an upload and reserve its file. Returns the AttachmentUpload."""
+    upload = AttachmentUpload(
+        evidence=evidence,
+        length=length,
+        attachment_type=attachment_type,
+        description=description,
+        uploaded_by=uploaded_by,
+    )
+    field = upload.file.field
+    name = field.generate_filename(upload, posixpath.basename(filename.replace("\\", "/")))
+    upload.file.name = field.storage.save(name, ContentFile(b""))
+    try:
+        upload.save()
+    except Exception:
+        field.storage.delete(upload.file.name)
+        raise
+    return upload
+
+
+def _lock(upload_id):
+    try:
+        return AttachmentUpload.objects.select_for_update(nowait=True).get(pk=upload_id)
+    except DatabaseError:
+        raise UploadLocked("Another request is writing to this upload.")
+
+
+def _unclaimed(now):
+    return Q(writing_until__isnull=True) | Q(writing_until__lt=now)
+
+
+def _claim(upload, offset):
+    """Claim the upload for one chunk at `offset`; returns the claim token."""
+    token, now = uuid.uuid4(), timezone.now()
+    claimed = AttachmentUpload.objects.filter(
+        _unclaimed(now), pk=upload.pk, attachment__isnull=True, offset=offset,
+    ).update(writer=token, writing_until=now + timedelta(seconds=CLAIM_SECONDS))
+    if claimed:
+        return token
+    current = AttachmentUpload.objects.get(pk=upload.pk)
+    if current.attachment_id:
+        raise UploadConflict("This upload is already finished.")
+    if current.offset != offset:
+        raise UploadConflict(f"Upload-Offset must be {current.offset}.")
+    raise UploadLocked("Another request is writing to this upload.")
+
+
+def _renew(upload_id, token):
+    renewed = AttachmentUpload.objects.filter(pk=upload_id, writer=token).update(
+        writing_until=timezone.now() + timedelta(seconds=CLAIM_SECONDS)
+    )
+    if not renewed:
+        raise UploadConflict("The upload was taken over by another request.")
+
+
+def _copy(stream, f, size, renew):
+    """Copy up to `size` bytes; returns the number written before EOF or a dropped client."""
+    written = 0
+    renewed_at = time.monotonic()
+    while written < size:
+        try:
+            data = stream.read(min(CHUNK_SIZE, size - written))
+        except OSError:
+            break
+        if not data:
+            break
+        if time.monotonic() - renewed_at > CLAIM_SECONDS / 3:
+            renew()
+            renewed_at = time.monotonic()
+        f.write(data)
+        written += len(data)
+    return written
+
+
+def write_chunk(upload, offset, stream, size):
+    """Write `size` bytes from `stream` at `offset`. Returns the upload, offset advanced."""
+    if upload.attachment_id:
+        raise UploadConflict("This upload is already finished.")
+    if offset + size > upload.length:
+        raise UploadError(
+            f"The chunk runs past the end of the upload ({upload.length} bytes)."
+        )
+    token = _claim(upload, offset)
+    written = 0
+    try:
+        with open(upload.file.path, "r+b") as f:
+            f.seek(offset)
+            written = _copy(stream, f, size, lambda: _renew(upload.pk, token))
+            f.flush()
+            os.fsync(f.fileno())
+    finally:
+        # Record what was written, even when the chunk was cut short
+        done = AttachmentUpload.objects.filter(pk=upload.pk, writer=token).update(
+            offset=offset + written, writer=None, writing_until=None, updated_at=timezone.now(),
+        )
+    if not done:
+        raise UploadConflict("The upload was taken over by another request.")
+    upload.offset = offset + written
+    return upload
+
+
+def finish(upload_id):
+    """Make the upload's EvidenceAttachment. Returns (attachment, created)."""
+    with transaction.atomic():
+        upload = _lock(upload_id)
+        if upload.attachment_id:
+            return upload.attachment, False
+        if upload.offset < upload.length:
+            raise UploadConflict(
+                f"Only {upload.offset} of {upload.length} bytes have been received."
+            )
+        # Drop anything written past the end by a chunk that was not recorded
+        os.truncate(upload.file.path, upload.length)
+        attachment = EvidenceAttachment(
+            evidence_id=upload.evidence_id,
+            attachment_type=upload.attachment_type,
+            description=upload.description,
+            uploaded_by_id=upload.uploaded_by_id,
+        )
+        attachment.file.name = upload.file.name
+        attachment.save()
+        upload.attachment = attachment
+        upload.save(update_fields=["attachment", "updated_at"])
+        return attachment, True
+
+
+def abort(upload_id):
+    """Delete an unfinished upload and its file."""
+    with transaction.atomic():
+        upload = _lock(upload_id)
+        if upload.attachment_id:
+            raise UploadConflict("This upload is already finished.")
+        if upload.writing_until and upload.writing_until >= timezone.now():
+            raise UploadLocked("Another request is writing to this upload.")
+        upload.file.delete(save=False)
+        upload.delete()
+
+
+def purge(hours=None):
+    """
+    Delete uploads idle for `hours` (ATTACHMENT_UPLOAD_EXPIRY_HOURS): the
+    files of unfinished ones, and the records of all. Returns the count.
+    """
+    if hours is None:
+        hours = settings.ATTACHMENT_UPLOAD_EXPIRY_HOURS
+    cutoff = timezone.now() - timedelta(hours=hours)
+    purged = 0
+    for upload in AttachmentUpload.objects.filter(updated_at__lt=cutoff).iterator():
+        with transaction.atomic():
+            try:
+                upload = _lock(upload.pk)
+            except (UploadLocked, AttachmentUpload.DoesNotExist):
+                continue
+            if upload.updated_at >= cutoff or (
+                upload.writing_until and upload.writing_until >= timezone.now()
+            ):
+                continue
+            if not upload.attachment_id:
+                upload.file.delete(save=False)
+            upload.delete()
+            purged += 1
+    return purged
+
+
+def headers(response, upload):
+    """Add the upload's offset headers to `response`."""
+    response["Upload-Offset"] = str(upload.offset)
+    response["Upload-Length"] = str(upload.length)
+    response["Cache-Control"] = "no-store"
+    return response
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import EvidenceViewSet, EvidenceAttachmentViewSet
+from .views import AttachmentUploadViewSet, EvidenceViewSet, EvidenceAttachmentViewSet
 
 router = DefaultRouter()
 router.register("attachments", EvidenceAttachmentViewSet, basename="evidence-attachment")
+router.register("uploads", AttachmentUploadViewSet, basename="evidence-upload")
 router.register("", EvidenceViewSet, basename="evidence")
 
 urlpatterns = [
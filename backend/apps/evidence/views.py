@@ -1,18 +1,26 @@
 from django.contrib.auth import get_user_model
 from django.db import models, transaction
 from django.utils import timezone
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 
 from ..accounts.models import DefaultRoles
-from .models import EvidenceType
-
-from .models import Evidence, EvidenceAttachment, EvidenceStatus, EvidenceType, Testimony
+from ..cases.models import CaseAccess, CaseAccessReason
+from ..common.conditional import ConditionalGetMixin
+from ..common.pagination import OptInKeysetPagination
+from . import uploads
+from .models import (
+    AttachmentUpload, Evidence, EvidenceAttachment, EvidenceStatus, EvidenceType, Testimony,
+)
 from .serializers import (
+    EVIDENCE_SERIALIZER_RELATED,
     AddLabResultSerializer,
+    AttachmentUploadCreateSerializer,
+    AttachmentUploadSerializer,
     EvidenceAttachmentSerializer,
     EvidenceCreateWithTestimonySerializer,
     EvidenceSerializer,
@@ -23,12 +31,17 @@ from .serializers import (
 User = get_user_model()
 
 
-class EvidenceViewSet(viewsets.ModelViewSet):
+class EvidenceViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = EvidenceSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
     filterset_fields = ["case", "evidence_type", "status", "collected_by"]
     search_fields = ["title", "description", "location_found"]
     ordering_fields = ["created_at", "collection_date"]
+    conditional_related = {
+        "list": EVIDENCE_SERIALIZER_RELATED,
+        "retrieve": EVIDENCE_SERIALIZER_RELATED,
+    }
 
     def get_queryset(self):
         user = self.request.user
@@ -41,12 +54,18 @@ class EvidenceViewSet(viewsets.ModelViewSet):
                 models.Q(evidence_type=EvidenceType.BIOLOGICAL)
             ).distinct()
         # Users see evidence from cases they're involved in
+        involved_cases = CaseAccess.objects.filter(
+            user=user,
+            reason__in=[
+                CaseAccessReason.CREATOR,
+                CaseAccessReason.LEAD_DETECTIVE,
+                CaseAccessReason.OFFICER,
+            ],
+        ).values("case_id")
         return Evidence.objects.filter(
-            models.Q(case__created_by=user) |
-            models.Q(case__lead_detective=user) |
-            models.Q(case__officers=user) |
+            models.Q(case_id__in=involved_cases) |
             models.Q(collected_by=user)
-        ).distinct()
+        )
 
     @action(detail=False, methods=["post"])
     def create_testimony(self, request):
@@ -112,6 +131,24 @@ class EvidenceViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @action(detail=True, methods=["post"], url_path="uploads")
+    def start_upload(self, request, pk=None):
+        """Start a chunked, resumable attachment upload (see apps.evidence.uploads)."""
+        evidence = self.get_object()
+        serializer = AttachmentUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload = uploads.start(evidence, request.user, **serializer.validated_data)
+
+        response = Response(
+            AttachmentUploadSerializer(upload).data,
+            status=status.HTTP_201_CREATED
+        )
+        response["Location"] = reverse(
+            "evidence-upload-detail", args=[upload.pk], request=request
+        )
+        return uploads.headers(response, upload)
+
     @action(detail=True, methods=["post"])
     def verify(self, request, pk=None):
         """Verify or reject evidence (Coronary for biological, others for general)."""
@@ -154,17 +191,100 @@ class EvidenceViewSet(viewsets.ModelViewSet):
     def attachments(self, request, pk=None):
         """List all attachments for evidence."""
         evidence = self.get_object()
+        not_modified = self.not_modified(
+            Evidence.objects.filter(pk=evidence.pk), "attachments", "attachments__uploaded_by"
+        )
+        if not_modified:
+            return not_modified
         attachments = evidence.attachments.all()
         return Response(EvidenceAttachmentSerializer(attachments, many=True).data)
 
 
-class EvidenceAttachmentViewSet(viewsets.ModelViewSet):
+class EvidenceAttachmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for managing evidence attachments."""
     
     queryset = EvidenceAttachment.objects.all()
     serializer_class = EvidenceAttachmentSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    conditional_related = {"list": ["uploaded_by"], "retrieve": ["uploaded_by"]}
 
     def perform_create(self, serializer):
         serializer.save(uploaded_by=self.request.user)
+
+
+class AttachmentUploadViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Resumable attachment uploads of the current user: GET/HEAD for the
+    offset, PATCH to append a chunk, POST finish/ to make the attachment,
+    DELETE to abandon. Started from POST /evidence/{id}/uploads/.
+    """
+
+    serializer_class = AttachmentUploadSerializer
+    permission_classes = [IsAuthenticated]
+    filterset_fields = ["evidence"]
+
+    def get_queryset(self):
+        queryset = AttachmentUpload.objects.order_by("-created_at")
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(uploaded_by=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        return uploads.headers(Response(self.get_serializer(upload).data), upload)
+
+    def partial_update(self, request, pk=None):
+        """Write the request body at Upload-Offset."""
+        upload = self.get_object()
+
+        if request.content_type.split(";")[0].strip() != uploads.CONTENT_TYPE:
+            return Response(
+                {"error": f"Chunks must be sent as {uploads.CONTENT_TYPE}."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        if not request.META.get("CONTENT_LENGTH"):
+            return Response(
+                {"error": "Content-Length is required."},
+                status=status.HTTP_411_LENGTH_REQUIRED
+            )
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            size = int(request.META["CONTENT_LENGTH"])
+        except ValueError:
+            return Response(
+                {"error": "Upload-Offset and Content-Length must be integers."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            upload = uploads.write_chunk(upload, offset, request.stream, size)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return uploads.headers(Response(status=status.HTTP_204_NO_CONTENT), upload)
+
+    def destroy(self, request, pk=None):
+        """Abandon an unfinished upload and delete its file."""
+        upload = self.get_object()
+        try:
+            uploads.abort(upload.pk)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=["post"])
+    def finish(self, request, pk=None):
+        """Make the EvidenceAttachment once every byte has been received."""
+        upload = self.get_object()
+        try:
+            attachment, created = uploads.finish(upload.pk)
+        except uploads.UploadError as e:
+            return Response({"error": str(e)}, status=e.status_code)
+        return Response(
+            EvidenceAttachmentSerializer(attachment).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
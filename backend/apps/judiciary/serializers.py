@@ -3,8 +3,8 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from apps.accounts.serializers import UserSerializer
-from apps.cases.serializers import CaseSerializer
-from apps.suspects.serializers import SuspectSerializer
+from apps.cases.serializers import CASE_SERIALIZER_RELATED, CaseSerializer
+from apps.suspects.serializers import SUSPECT_SERIALIZER_RELATED, SuspectSerializer
 from .models import CaseReport, Sentence, Trial, VerdictChoice
 
 User = get_user_model()
@@ -58,6 +58,17 @@ class TrialSerializer(serializers.ModelSerializer):
         return Trial.objects.create(case=case, **validated_data)
 
 
+# Relation paths (from a trial) whose rows TrialSerializer renders; used for
+# conditional GET validators.
+TRIAL_SERIALIZER_RELATED = (
+    "judge",
+    "case",
+    *(f"case__{path}" for path in CASE_SERIALIZER_RELATED),
+    "sentences", "sentences__issued_by", "sentences__suspect",
+    *(f"sentences__suspect__{path}" for path in SUSPECT_SERIALIZER_RELATED),
+)
+
+
 class VerdictSerializer(serializers.Serializer):
     """Serializer for issuing verdict."""
     
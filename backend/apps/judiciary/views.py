@@ -5,10 +5,14 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.accounts.models import Capability
+from apps.accounts.policy import capability_required
 from apps.cases.models import Case
+from apps.common.conditional import ConditionalGetMixin
 from apps.suspects.models import Suspect
 from .models import CaseReport, Sentence, Trial, VerdictChoice
 from .serializers import (
+    TRIAL_SERIALIZER_RELATED,
     CaseReportSerializer,
     SentenceSerializer,
     TrialSerializer,
@@ -18,12 +22,20 @@ from .serializers import (
 User = get_user_model()
 
 
-class TrialViewSet(viewsets.ModelViewSet):
+class TrialViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Trial.objects.all()
     serializer_class = TrialSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ["case", "judge", "verdict"]
     ordering_fields = ["scheduled_date", "created_at"]
+    conditional_related = {
+        "list": TRIAL_SERIALIZER_RELATED,
+        "retrieve": TRIAL_SERIALIZER_RELATED,
+    }
+
+    def get_conditional_salt(self):
+        # Sentenced suspects carry day-based rank fields
+        return timezone.localdate().isoformat()
 
     @action(detail=True, methods=["post"])
     def start(self, request, pk=None):
@@ -95,17 +107,19 @@ class TrialViewSet(viewsets.ModelViewSet):
         
         return Response(SentenceSerializer(sentence).data, status=status.HTTP_201_CREATED)
 
-    @action(detail=True, methods=["get"])
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.VIEW_FULL_REPORT,
+                "Only Judge, Captain, or Chief can access full reports.",
+            ),
+        ],
+    )
     def full_report(self, request, pk=None):
         """Get comprehensive case report for judge."""
-        user_roles = request.user.get_roles()
-        if not request.user.is_staff and not any(
-            role in ["Judge", "Captain", "Chief"] for role in user_roles
-        ):
-            return Response(
-                {"error": "Only Judge, Captain, or Chief can access full reports."},
-                status=status.HTTP_403_FORBIDDEN
-            )
         trial = self.get_object()
         case = trial.case
         
@@ -117,14 +131,20 @@ class TrialViewSet(viewsets.ModelViewSet):
         if created or not report.report_data:
             report.generated_by = request.user
             report.generate_report()
-        
+
+        not_modified = self.not_modified(
+            CaseReport.objects.filter(pk=report.pk), "generated_by"
+        )
+        if not_modified:
+            return not_modified
         return Response(CaseReportSerializer(report).data)
 
 
-class CaseReportViewSet(viewsets.ReadOnlyModelViewSet):
+class CaseReportViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = CaseReport.objects.all()
     serializer_class = CaseReportSerializer
     permission_classes = [IsAuthenticated]
+    conditional_related = {"list": ["generated_by"], "retrieve": ["generated_by"]}
 
     @action(detail=False, methods=["post"])
     def generate(self, request):
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0004_created_at_id_index'),
+        ('rewards', '0001_initial'),
+        ('suspects', '0003_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tip',
+            index=models.Index(fields=['created_at', 'id'], name='rewards_tip_created_160890_idx'),
+        ),
+    ]
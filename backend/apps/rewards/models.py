@@ -1,5 +1,6 @@
 import uuid
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from apps.common.models import TimeStampedModel
@@ -61,6 +62,8 @@ class Tip(TimeStampedModel):
     # Tip content
     title = models.CharField(max_length=255)
     description = models.TextField()
+    # Maintained by a database trigger, see apps.common.search
+    search_vector = SearchVectorField(null=True, editable=False)
     
     # Review tracking
     reviewed_by_officer = models.ForeignKey(
@@ -85,6 +88,9 @@ class Tip(TimeStampedModel):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"Tip #{self.pk}: {self.title}"
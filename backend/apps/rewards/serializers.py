@@ -50,6 +50,14 @@ class TipSerializer(serializers.ModelSerializer):
         return attrs
 
 
+# Relation paths (from a tip) whose rows TipSerializer renders; used for
+# conditional GET validators.
+TIP_SERIALIZER_RELATED = (
+    "submitted_by", "reviewed_by_officer", "reviewed_by_detective",
+    "reward_code",
+)
+
+
 class TipReviewSerializer(serializers.Serializer):
     """Serializer for reviewing tips."""
     
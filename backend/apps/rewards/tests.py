@@ -1,10 +1,17 @@
+from datetime import timedelta
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 import uuid
 
+from apps.cases.models import Case, CaseStatus
+from apps.common.models import CrimeSeverity
+from apps.suspects.models import CaseSuspect, Suspect, SuspectStatus
 from .models import Tip, TipStatus, RewardCode
+from .views import TipViewSet
 
 User = get_user_model()
 
@@ -134,6 +141,28 @@ class RewardCodeGenerationTestCase(TestCase):
         """Generate a unique code for testing."""
         return f"RWD-{uuid.uuid4().hex[:12].upper()}"
 
+    def test_tip_reward_uses_current_suspect_rank(self):
+        """Reward for a tip about a suspect = today's rank * 20,000,000."""
+        case = Case.objects.create(
+            title="Murder",
+            created_by=self.user,
+            crime_severity=CrimeSeverity.LEVEL_1,
+            status=CaseStatus.INVESTIGATION,
+        )
+        suspect = Suspect.objects.create(
+            full_name="Wanted",
+            status=SuspectStatus.MOST_WANTED,
+            wanted_since=timezone.now() - timedelta(days=31),
+        )
+        CaseSuspect.objects.create(case=case, suspect=suspect)
+        # The stored column is stale until the periodic job runs
+        Suspect.objects.filter(pk=suspect.pk).update(reward_amount=0)
+        tip = Tip.objects.create(
+            submitted_by=self.user, suspect=suspect, title="Seen", description="Seen"
+        )
+
+        self.assertEqual(TipViewSet()._calculate_reward(tip), 31 * 3 * 20_000_000)
+
 
 class TipSubmissionWorkflowTestCase(TestCase):
     """Test tip submission and review workflow."""
@@ -5,8 +5,15 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from apps.accounts.models import Capability
+from apps.accounts.policy import capability_required, has_capability
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.pagination import OptInKeysetPagination
+from apps.suspects.models import Suspect
+
 from .models import RewardCode, Tip, TipStatus
 from .serializers import (
+    TIP_SERIALIZER_RELATED,
     ClaimRewardSerializer,
     RewardCodeSerializer,
     RewardLookupSerializer,
@@ -17,12 +24,14 @@ from .serializers import (
 User = get_user_model()
 
 
-class TipViewSet(viewsets.ModelViewSet):
+class TipViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TipSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = OptInKeysetPagination
     filterset_fields = ["status", "case", "suspect"]
     search_fields = ["title", "description"]
     ordering_fields = ["created_at"]
+    conditional_related = {"list": TIP_SERIALIZER_RELATED, "retrieve": TIP_SERIALIZER_RELATED}
 
     def get_queryset(self):
         user = self.request.user
@@ -33,8 +42,7 @@ class TipViewSet(viewsets.ModelViewSet):
         user_roles = user.get_roles()
         
         # Police officers see submitted tips for initial review
-        officer_roles = ["Police Officer", "Patrol Officer", "Chief", "Captain", "Sergeant"]
-        if any(role in officer_roles for role in user_roles):
+        if has_capability(user, Capability.VIEW_TIP_QUEUE):
             from django.db.models import Q
             return Tip.objects.filter(
                 Q(submitted_by=user) |
@@ -56,15 +64,20 @@ class TipViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(submitted_by=self.request.user)
 
-    @action(detail=True, methods=["post"])
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.REVIEW_TIPS_AS_OFFICER,
+                "You do not have permission to perform officer review.",
+                allow_staff=False,
+            ),
+        ],
+    )
     def officer_review(self, request, pk=None):
         """Police officer reviews the tip."""
-        allowed_roles = ["Police Officer", "Patrol Officer", "Chief", "Captain", "Sergeant", "Administrator"]
-        if not any(request.user.has_role(role) for role in allowed_roles):
-            return Response(
-                {"error": "You do not have permission to perform officer review."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
         tip = self.get_object()
         serializer = TipReviewSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -81,14 +94,20 @@ class TipViewSet(viewsets.ModelViewSet):
         tip.save()
         return Response(TipSerializer(tip).data)
 
-    @action(detail=True, methods=["post"])
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.REVIEW_TIPS_AS_DETECTIVE,
+                "You do not have permission to perform detective review.",
+                allow_staff=False,
+            ),
+        ],
+    )
     def detective_review(self, request, pk=None):
         """Detective reviews the tip and approves reward."""
-        if not any(request.user.has_role(role) for role in ["Detective", "Administrator"]):
-            return Response(
-                {"error": "You do not have permission to perform detective review."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
         tip = self.get_object()
         serializer = TipReviewSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -124,9 +143,12 @@ class TipViewSet(viewsets.ModelViewSet):
         """Calculate reward amount based on case/suspect severity."""
         base_reward = 5_000_000  # 5 million Rials base
         
-        if tip.suspect and hasattr(tip.suspect, "reward_amount"):
-            # Use suspect's calculated reward
-            return tip.suspect.reward_amount
+        if tip.suspect_id:
+            # Use the suspect's Most Wanted reward as of today
+            return (
+                Suspect.objects.with_rank().filter(pk=tip.suspect_id)
+                .values_list("current_reward", flat=True).get()
+            )
         
         if tip.case:
             # Higher severity = higher reward
@@ -136,10 +158,12 @@ class TipViewSet(viewsets.ModelViewSet):
         return base_reward
 
 
-class RewardCodeViewSet(viewsets.ReadOnlyModelViewSet):
+class RewardCodeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = RewardCode.objects.all()
     serializer_class = RewardCodeSerializer
     permission_classes = [IsAuthenticated]
+    # recipient is the tip's submitter
+    conditional_related = {"list": ["tip__submitted_by"], "retrieve": ["tip__submitted_by"]}
 
     def get_queryset(self):
         user = self.request.user
@@ -150,24 +174,23 @@ class RewardCodeViewSet(viewsets.ReadOnlyModelViewSet):
         # Users see their own rewards
         return RewardCode.objects.filter(tip__submitted_by=user)
 
-    def _user_can_lookup_claim(self, user):
-        """Only police ranks may lookup or claim rewards."""
-        allowed_roles = [
-            "Police Officer", "Patrol Officer", "Chief", "Captain", "Sergeant", "Administrator"
-        ]
-        return any(user.has_role(role) for role in allowed_roles)
-
-    @action(detail=False, methods=["post"])
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.PROCESS_REWARDS,
+                "Only police personnel can lookup rewards.",
+                allow_staff=False,
+            ),
+        ],
+    )
     def lookup(self, request):
         """
         Look up reward info by national_id + code.
         All police ranks can use this to verify rewards.
         """
-        if not self._user_can_lookup_claim(request.user):
-            return Response(
-                {"error": "Only police personnel can lookup rewards."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
         serializer = RewardLookupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -197,14 +220,20 @@ class RewardCodeViewSet(viewsets.ReadOnlyModelViewSet):
             }
         })
 
-    @action(detail=False, methods=["post"])
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.PROCESS_REWARDS,
+                "Only police personnel can process reward claims.",
+                allow_staff=False,
+            ),
+        ],
+    )
     def claim(self, request):
         """Process reward claim in person. Only police personnel."""
-        if not self._user_can_lookup_claim(request.user):
-            return Response(
-                {"error": "Only police personnel can process reward claims."},
-                status=status.HTTP_403_FORBIDDEN,
-            )
         serializer = ClaimRewardSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
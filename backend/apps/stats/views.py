@@ -3,6 +3,8 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth.models import Group
 
+from apps.accounts.models import Capability
+from apps.accounts.policy import get_policy
 from apps.cases.models import Case, CaseStatus
 from apps.suspects.models import Suspect, SuspectStatus
 from apps.complaints.models import Complaint, ComplaintStatus
@@ -10,11 +12,6 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-POLICE_GROUPS = [
-    'Chief', 'Captain', 'Sergeant', 'Detective',
-    'Police Officer', 'Patrol Officer', 'Cadet',
-]
-
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -24,7 +21,9 @@ def dashboard_stats(request):
     stats = {
         'active_cases': Case.objects.exclude(status__in=closed_statuses).count(),
         'total_solved_cases': Case.objects.filter(status=CaseStatus.CLOSED_SOLVED).count(),
-        'total_staff': User.objects.filter(groups__name__in=POLICE_GROUPS).distinct().count(),
+        'total_staff': User.objects.filter(
+            groups__name__in=get_policy().roles_with(Capability.POLICE_STAFF)
+        ).distinct().count(),
         'wanted_suspects': Suspect.objects.filter(
             status__in=[SuspectStatus.UNDER_PURSUIT, SuspectStatus.MOST_WANTED]
         ).count(),
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CaseSuspect, Interrogation, Suspect
+from .models import CaseSuspect, Interrogation, Suspect, SuspectMerge
 
 
 class CaseSuspectInline(admin.TabularInline):
@@ -26,13 +26,22 @@ class SuspectAdmin(admin.ModelAdmin):
     def most_wanted_rank(self, obj):
         return obj.most_wanted_rank
     most_wanted_rank.short_description = "Most Wanted Rank"
+    most_wanted_rank.admin_order_field = "most_wanted_rank"
 
     def reward_amount(self, obj):
         return f"{obj.reward_amount:,} Rials"
     reward_amount.short_description = "Reward Amount"
+    reward_amount.admin_order_field = "reward_amount"
 
 
 @admin.register(Interrogation)
 class InterrogationAdmin(admin.ModelAdmin):
     list_display = ["id", "suspect", "case", "conducted_by", "started_at", "ended_at"]
     list_filter = ["started_at", "conducted_by"]
+
+
+@admin.register(SuspectMerge)
+class SuspectMergeAdmin(admin.ModelAdmin):
+    list_display = ["id", "survivor_id", "merged_ids", "merged_by", "created_at", "undone_at"]
+    list_filter = ["created_at", "undone_at"]
+    readonly_fields = ["survivor", "merged_ids", "snapshot", "merged_by", "undone_at", "undone_by"]
@@ -0,0 +1,221 @@
+"""
+Suspect identity index: find suspects that are probably the same person.
+
+Every name variant of a suspect (the full name and each alias) is stored
+normalized in SuspectNameKey together with a phonetic key. Normalization
+folds Persian/Arabic script variants (Arabic yeh and kaf, hamza forms,
+diacritics, tatweel, ZWNJ, Persian digits) and case, so spellings that only
+differ in keyboard layout compare equal.
+
+Candidates are the variants that share the phonetic key or are trigram
+similar to the query. On PostgreSQL the latter is pg_trgm's `%` operator
+on a GIN index (installed by migration 0006), which keeps a lookup to an
+index scan at millions of suspects; elsewhere a substring filter stands in.
+Candidates are scored in Python with the same trigram similarity pg_trgm
+uses, plus a bonus for a phonetic match.
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import Q
+
+# Arabic code points typed for Persian letters, and letter variants
+CHARACTER_MAP = str.maketrans({
+    "\u064a": "\u06cc",  # ARABIC YEH -> FARSI YEH
+    "\u0649": "\u06cc",  # ALEF MAKSURA -> FARSI YEH
+    "\u0626": "\u06cc",  # YEH WITH HAMZA ABOVE -> FARSI YEH
+    "\u0643": "\u06a9",  # ARABIC KAF -> KEHEH
+    "\u0629": "\u0647",  # TEH MARBUTA -> HEH
+    "\u06c0": "\u0647",  # HEH WITH YEH ABOVE -> HEH
+    "\u0623": "\u0627",  # ALEF WITH HAMZA ABOVE -> ALEF
+    "\u0625": "\u0627",  # ALEF WITH HAMZA BELOW -> ALEF
+    "\u0622": "\u0627",  # ALEF WITH MADDA ABOVE -> ALEF
+    "\u0671": "\u0627",  # ALEF WASLA -> ALEF
+    "\u0624": "\u0648",  # WAW WITH HAMZA ABOVE -> WAW
+    "\u0640": None,       # TATWEEL
+    "\u200c": None,       # ZERO WIDTH NON-JOINER
+    "\u200d": None,       # ZERO WIDTH JOINER
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Persian digits
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+})
+# Harakat, superscript alef and Quranic marks
+DIACRITICS_RE = re.compile("[\u064b-\u065f\u0670\u06d6-\u06ed]")
+NON_WORD_RE = re.compile(r"[\W_]+")
+ALIAS_SEPARATORS_RE = re.compile(r"[,،;؛/|\n]+")
+
+# Persian letters that sound alike collapse to one; long vowels are dropped
+PERSIAN_SOUNDS = str.maketrans({
+    "\u062b": "\u0633", "\u0635": "\u0633",                     # se, sad -> sin
+    "\u0630": "\u0632", "\u0636": "\u0632", "\u0638": "\u0632",  # zal, zad, za -> ze
+    "\u0637": "\u062a",                                          # ta -> te
+    "\u062d": "\u0647",                                          # he (jimi) -> he
+    "\u063a": "\u0642",                                          # ghein -> ghaf
+    "\u0639": "\u0627",                                          # ein -> alef
+})
+PERSIAN_VOWELS = set("\u0627\u0648\u06cc")
+LATIN_SOUNDS = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+PHONETIC_BONUS = 0.25
+MIN_SCORE = 0.3
+# add_suspect(link_match=true) links an existing suspect from this score up
+LINK_MATCH_SCORE = 0.8
+CANDIDATE_LIMIT = 200
+
+
+def normalize_name(value):
+    """Case- and script-folded name with single spaces between words."""
+    value = unicodedata.normalize("NFKC", value or "").translate(CHARACTER_MAP)
+    value = DIACRITICS_RE.sub("", value).casefold()
+    return " ".join(NON_WORD_RE.sub(" ", value).split())
+
+
+def split_aliases(aliases):
+    return [part.strip() for part in ALIAS_SEPARATORS_RE.split(aliases or "") if part.strip()]
+
+
+def name_variants(full_name, aliases):
+    """Distinct normalized names a suspect is known by, full name first."""
+    variants = [normalize_name(name) for name in [full_name, *split_aliases(aliases)]]
+    return list(dict.fromkeys(variant for variant in variants if variant))
+
+
+def _word_code(word):
+    if word.isascii():
+        # Soundex: first letter plus up to three consonant-group digits
+        codes = [LATIN_SOUNDS.get(ch, "") for ch in word]
+        digits, previous = [], codes[0]
+        for ch, code in zip(word[1:], codes[1:]):
+            if code and code != previous:
+                digits.append(code)
+            if ch not in "hw":
+                previous = code
+        return (word[0] + "".join(digits) + "000")[:4]
+    sounds = word.translate(PERSIAN_SOUNDS)
+    skeleton = sounds[0] + "".join(ch for ch in sounds[1:] if ch not in PERSIAN_VOWELS)
+    return re.sub(r"(.)\1+", r"\1", skeleton)
+
+
+def phonetic_key(normalized):
+    """Phonetic code of a normalized name, one code per word."""
+    return " ".join(_word_code(word) for word in normalized.split())
+
+
+def trigrams(normalized):
+    """pg_trgm's trigram set: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def sync_name_keys(suspect):
+    """Make the suspect's SuspectNameKey rows match its current names."""
+    from .models import SuspectNameKey
+    wanted = {
+        (variant, phonetic_key(variant))
+        for variant in name_variants(suspect.full_name, suspect.aliases)
+    }
+    rows = {
+        (name, phonetic): pk
+        for pk, name, phonetic in SuspectNameKey.objects.filter(suspect=suspect)
+        .values_list("pk", "name", "phonetic")
+    }
+    stale = [pk for key, pk in rows.items() if key not in wanted]
+    if stale:
+        SuspectNameKey.objects.filter(pk__in=stale).delete()
+    SuspectNameKey.objects.bulk_create([
+        SuspectNameKey(suspect=suspect, name=name, phonetic=phonetic)
+        for name, phonetic in wanted - rows.keys()
+    ])
+
+
+def rebuild_name_keys(suspect_model=None, key_model=None, batch_size=5000):
+    """
+    Rebuild the whole identity index (after bulk imports, which skip the
+    post_save handler). The models can be passed in for data migrations.
+    Returns the number of rows written.
+    """
+    if suspect_model is None:
+        from .models import Suspect as suspect_model, SuspectNameKey as key_model
+    key_model.objects.all().delete()
+    written, batch = 0, []
+    rows = suspect_model.objects.order_by().values_list("pk", "full_name", "aliases")
+    for pk, full_name, aliases in rows.iterator(chunk_size=batch_size):
+        batch.extend(
+            key_model(suspect_id=pk, name=variant, phonetic=phonetic_key(variant))
+            for variant in name_variants(full_name, aliases)
+        )
+        if len(batch) >= batch_size:
+            key_model.objects.bulk_create(batch)
+            written, batch = written + len(batch), []
+    key_model.objects.bulk_create(batch)
+    return written + len(batch)
+
+
+def candidate_keys(normalized, phonetic):
+    from .models import SuspectNameKey
+    keys = SuspectNameKey.objects.all()
+    if connection.vendor == "postgresql":
+        keys = keys.filter(Q(phonetic=phonetic) | Q(name__trigram_similar=normalized))
+        keys = keys.annotate(trigram=TrigramSimilarity("name", normalized)).order_by("-trigram")
+    else:
+        words = Q()
+        for word in normalized.split():
+            words |= Q(name__contains=word)
+        keys = keys.filter(Q(phonetic=phonetic) | words)
+    return keys.values_list("suspect_id", "name", "phonetic")[:CANDIDATE_LIMIT]
+
+
+def find_matches(name, limit=10):
+    """
+    [(suspect_id, score, matched variant)] for suspects probably named
+    `name`, best first. Scores are trigram similarity (0..1) plus
+    PHONETIC_BONUS when the phonetic keys agree, capped at 1.
+    """
+    normalized = normalize_name(name)
+    if not normalized:
+        return []
+    phonetic = phonetic_key(normalized)
+    best = {}
+    for suspect_id, variant, variant_phonetic in candidate_keys(normalized, phonetic):
+        score = similarity(normalized, variant)
+        if variant_phonetic == phonetic:
+            score = min(score + PHONETIC_BONUS, 1.0)
+        if score >= MIN_SCORE and score > best.get(suspect_id, (0.0,))[0]:
+            best[suspect_id] = (round(score, 3), variant)
+    ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+    return [(suspect_id, score, variant) for suspect_id, (score, variant) in ranked]
+
+
+def install_trigram_index(schema_editor, table, column):
+    """GIN trigram index for `%` lookups. No-op outside PostgreSQL."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} "
+        f"USING gin ({column} gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(schema_editor, table, column):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {table}_{column}_trgm")
@@ -0,0 +1,49 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.suspects.photo_index import DEFAULT_RADIUS, MAX_RADIUS, PhotoIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure photo search latency on an in-memory index of random "
+        "hashes (no database). Each query is a perturbed copy of an indexed "
+        "hash, so every search has at least one match."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=1_000_000)
+        parser.add_argument("--samples", type=int, default=50)
+        parser.add_argument("--radius", type=int, nargs="+", default=[DEFAULT_RADIUS, MAX_RADIUS])
+
+    def handle(self, *args, **options):
+        rng = random.Random(24)
+        index = PhotoIndex()
+        hashes = []
+        started = time.perf_counter()
+        for key in range(options["images"]):
+            phash, dhash = rng.getrandbits(64), rng.getrandbits(64)
+            index.add(key << 1, phash, dhash)
+            if key < options["samples"]:
+                hashes.append((phash, dhash))
+        self.stdout.write(
+            f"Indexed {len(index)} hashes in {time.perf_counter() - started:.1f}s"
+        )
+
+        for radius in options["radius"]:
+            timings = []
+            for phash, dhash in hashes:
+                for bit in rng.sample(range(64), radius // 2):
+                    phash ^= 1 << bit
+                started = time.perf_counter()
+                matches = index.search(phash, dhash, radius)
+                timings.append(time.perf_counter() - started)
+                assert matches
+            timings.sort()
+            self.stdout.write(
+                f"radius {radius:>2}: mean {statistics.mean(timings) * 1000:.1f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f} ms"
+            )
@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.suspects import identity
+from apps.suspects.models import Suspect
+
+FIRST_NAMES = (
+    "ali reza mohammad hossein mehdi hamid saeed amir javad majid "
+    "sara maryam zahra fatemeh narges leila "
+    "علی رضا محمد حسین مهدی حمید سعید امیر جواد مجید سارا مریم زهرا فاطمه"
+).split()
+LAST_NAMES = (
+    "rezaei karimi ahmadi hosseini moradi jafari mousavi sadeghi rahimi "
+    "alavi kazemi ghorbani heidari tehrani shirazi "
+    "رضایی کریمی احمدی حسینی مرادی جعفری موسوی صادقی رحیمی علوی کاظمی"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure GET /suspects/match/ lookups (identity.find_matches) against "
+        "a seeded identity index. Benchmark data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--suspects", type=int, default=1_000_000)
+        parser.add_argument("--samples", type=int, default=30)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(21)
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                "The trigram index needs PostgreSQL; measuring the substring fallback."
+            ))
+        with transaction.atomic():
+            self._seed(options["suspects"], options["batch_size"])
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            timings = []
+            for _ in range(options["samples"]):
+                # A misspelled name: one letter dropped from the surname
+                last = self.rng.choice(LAST_NAMES)
+                cut = self.rng.randrange(1, len(last))
+                name = f"{self.rng.choice(FIRST_NAMES)} {last[:cut]}{last[cut + 1:]}"
+                started = time.perf_counter()
+                identity.find_matches(name)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f"match: mean {statistics.mean(timings) * 1000:.1f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f} ms"
+            )
+            transaction.set_rollback(True)
+
+    def _seed(self, count, batch_size):
+        self.stdout.write(f"Seeding {count} suspects...")
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            Suspect.objects.bulk_create([
+                Suspect(
+                    full_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {i}",
+                    aliases=self.rng.choice(("", "", self.rng.choice(LAST_NAMES))),
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+        written = identity.rebuild_name_keys(batch_size=batch_size)
+        self.stdout.write(
+            f"  seeded {count} suspects ({written} name keys) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.suspects.merge import MergeError, merge_suspects, undo_merge
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold duplicate suspects into a survivor (merge_suspects SURVIVOR ID...), "
+        "or undo an earlier merge (merge_suspects --undo MERGE_ID)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("suspect_ids", nargs="*", type=int)
+        parser.add_argument("--undo", type=int, metavar="MERGE_ID")
+
+    def handle(self, *args, **options):
+        try:
+            if options["undo"] is not None:
+                merge = undo_merge(options["undo"])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Undid merge #{merge.pk}: restored suspects {merge.merged_ids}."
+                ))
+                return
+            if len(options["suspect_ids"]) < 2:
+                raise CommandError("Pass the surviving suspect id followed by the ids to merge.")
+            survivor_id, *suspect_ids = options["suspect_ids"]
+            merge = merge_suspects(survivor_id, suspect_ids)
+        except MergeError as e:
+            raise CommandError(str(e))
+        moved = sum(
+            len(pks) for rows in merge.snapshot["relinked"].values() for pks in rows["rows"].values()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Merge #{merge.pk}: folded {merge.merged_ids} into suspect #{survivor_id}, "
+            f"re-pointed {moved} rows, dropped {len(merge.snapshot['dropped'])} duplicates."
+        ))
@@ -0,0 +1,21 @@
+"""
+Promote suspects under pursuit for 30+ days to Most Wanted and refresh the
+stored ranks, which grow with the days wanted.
+
+Run periodically (the `scheduler` service in docker-compose runs it hourly):
+
+    python manage.py promote_most_wanted
+"""
+from django.core.management.base import BaseCommand
+
+from apps.suspects import most_wanted
+
+
+class Command(BaseCommand):
+    help = "Promote long-wanted suspects to Most Wanted and recompute ranks."
+
+    def handle(self, *args, **options):
+        promoted, ranked = most_wanted.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f"Promoted {promoted} suspect(s); updated the rank of {ranked}."
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.suspects.photo_index import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the perceptual hashes of suspect photos and image evidence "
+        "attachments that have none yet (e.g. after imports)."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        hashed, failed = rebuild(stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Hashed {hashed} images ({failed} failed) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,249 @@
+"""
+Fold duplicate suspects into one survivor, and undo it.
+
+A merge runs in one transaction with the suspects locked. Every foreign
+key to Suspect (case links, interrogations, tips, bails, sentences and
+whatever is added later) is re-pointed with one UPDATE per model. Rows
+that would break a unique_together with the survivor (a case linked to two
+of the merged suspects) are dropped, keeping the survivor's row, or else
+the first absorbed suspect's. The survivor takes the names of the absorbed
+suspects as aliases and fills its blank details from them (a photo comes
+with its thumbnails, and is hashed for photo search after commit); its
+status is kept. The absorbed suspects are then deleted and the survivor's
+stored rank recomputed once.
+
+Everything needed to reverse the merge goes into a SuspectMerge row;
+undo_merge() recreates the absorbed suspects under their old ids and moves
+back the rows that still point at the survivor.
+"""
+from datetime import datetime
+
+from django.apps import apps
+from django.core import serializers
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+from . import identity, most_wanted, photo_index
+from .models import Suspect, SuspectMerge, SuspectNameKey
+
+# Survivor fields filled from the first absorbed suspect that has a value
+FILL_FIELDS = ["description", "last_known_location", "photo", "user"]
+
+
+class MergeError(ValueError):
+    pass
+
+
+def relations():
+    """(model, field name) of each foreign key to Suspect a merge re-points."""
+    return [
+        (rel.related_model, rel.field.name)
+        for rel in Suspect._meta.related_objects
+        if rel.one_to_many and rel.related_model not in (SuspectNameKey, SuspectMerge)
+    ]
+
+
+def _plain(value):
+    """A field value as stored in the undo record."""
+    if isinstance(value, FieldFile):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _touch(model, now):
+    names = {field.name for field in model._meta.concrete_fields}
+    return {"updated_at": now} if "updated_at" in names else {}
+
+
+def _duplicates(model, field, survivor_id, absorbed_ids):
+    """
+    Pks of rows that would collide on a unique_together with `field` once
+    re-pointed: the survivor's rows win, then the absorbed suspects' in order.
+    """
+    keys = [
+        [name for name in fields if name != field]
+        for fields in model._meta.unique_together
+        if field in fields
+    ]
+    if not keys:
+        return []
+    order = {pk: position for position, pk in enumerate([survivor_id, *absorbed_ids])}
+    columns = sorted({name for key in keys for name in key})
+    rows = sorted(
+        model.objects.filter(**{f"{field}__in": list(order)})
+        .values_list("pk", field, *columns),
+        key=lambda row: (order[row[1]], row[0]),
+    )
+    seen = [set() for _ in keys]
+    dropped = []
+    for pk, _, *values in rows:
+        row = dict(zip(columns, values))
+        key_values = [tuple(row[name] for name in key) for key in keys]
+        if any(value in taken for value, taken in zip(key_values, seen)):
+            dropped.append(pk)
+            continue
+        for value, taken in zip(key_values, seen):
+            taken.add(value)
+    return dropped
+
+
+def _survivor_changes(survivor, absorbed):
+    """{field name: new value} for the survivor after absorbing `absorbed`."""
+    changes = {}
+    names = [survivor.aliases, *(n for s in absorbed for n in (s.full_name, s.aliases))]
+    aliases, known = [], {identity.normalize_name(survivor.full_name)}
+    for alias in (a for name in names for a in identity.split_aliases(name)):
+        normalized = identity.normalize_name(alias)
+        if normalized and normalized not in known:
+            known.add(normalized)
+            aliases.append(alias)
+    max_length = Suspect._meta.get_field("aliases").max_length
+    while len(", ".join(aliases)) > max_length:
+        aliases.pop()
+    if ", ".join(aliases) != survivor.aliases:
+        changes["aliases"] = ", ".join(aliases)
+
+    for name in FILL_FIELDS:
+        attname = Suspect._meta.get_field(name).attname
+        if _plain(getattr(survivor, attname)):
+            continue
+        value = next((getattr(s, attname) for s in absorbed if _plain(getattr(s, attname))), None)
+        if value is not None:
+            changes[attname] = _plain(value)
+    if "photo" in changes:
+        # The thumbnails already made for the photo come along with it
+        donor = next(s for s in absorbed if s.photo.name == changes["photo"])
+        changes["photo_variants"] = donor.photo_variants
+
+    # The same person has been wanted since the earliest of the records
+    if survivor.wanted_since:
+        earliest = min(s.wanted_since for s in [survivor, *absorbed] if s.wanted_since)
+        if earliest != survivor.wanted_since:
+            changes["wanted_since"] = earliest
+    return changes
+
+
+def _refresh(suspect_ids):
+    """
+    Recompute ranks, the identity index and (after commit) the photo hashes
+    once for the touched suspects; queryset updates skip their signals.
+    """
+    Suspect.objects.filter(pk__in=suspect_ids).recompute_ranks()
+    for suspect in Suspect.objects.filter(pk__in=suspect_ids):
+        identity.sync_name_keys(suspect)
+        photo_index.schedule_suspect(suspect.pk)
+    most_wanted.invalidate()
+
+
+def merge_suspects(survivor_id, suspect_ids, merged_by=None):
+    """Fold `suspect_ids` into suspect `survivor_id`. Returns the SuspectMerge."""
+    absorbed_ids = list(dict.fromkeys(suspect_ids))
+    if survivor_id in absorbed_ids:
+        raise MergeError("A suspect cannot be merged into itself.")
+    if not absorbed_ids:
+        raise MergeError("No suspects to merge.")
+
+    now = timezone.now()
+    with transaction.atomic():
+        locked = {
+            s.pk: s for s in
+            Suspect.objects.filter(pk__in=[survivor_id, *absorbed_ids])
+            .order_by("pk").select_for_update()
+        }
+        missing = [pk for pk in [survivor_id, *absorbed_ids] if pk not in locked]
+        if missing:
+            raise MergeError(f"Suspects not found: {', '.join(map(str, missing))}.")
+        survivor = locked[survivor_id]
+        absorbed = [locked[pk] for pk in absorbed_ids]
+
+        changes = _survivor_changes(survivor, absorbed)
+        snapshot = {
+            "suspects": serializers.serialize("python", absorbed),
+            "survivor": {
+                attname: [_plain(getattr(survivor, attname)), _plain(value)]
+                for attname, value in changes.items()
+            },
+            "relinked": {},
+            "dropped": [],
+        }
+
+        for model, field in relations():
+            dropped = _duplicates(model, field, survivor_id, absorbed_ids)
+            if dropped:
+                rows = model.objects.filter(pk__in=dropped)
+                snapshot["dropped"].extend(serializers.serialize("python", rows))
+                rows.delete()
+            moved = {}
+            rows = model.objects.filter(**{f"{field}__in": absorbed_ids})
+            for pk, suspect_id in rows.values_list("pk", field):
+                moved.setdefault(str(suspect_id), []).append(pk)
+            if moved:
+                rows.update(**{field: survivor_id}, **_touch(model, now))
+                snapshot["relinked"][model._meta.label] = {"field": field, "rows": moved}
+
+        if "user_id" in changes:
+            # The account moves to the survivor (a one-to-one)
+            Suspect.objects.filter(pk__in=absorbed_ids).update(user=None)
+        Suspect.objects.filter(pk__in=absorbed_ids).delete()
+        if changes:
+            Suspect.objects.filter(pk=survivor_id).update(**changes, updated_at=now)
+        _refresh([survivor_id])
+
+        return SuspectMerge.objects.create(
+            survivor_id=survivor_id,
+            merged_ids=absorbed_ids,
+            snapshot=snapshot,
+            merged_by=merged_by,
+        )
+
+
+def undo_merge(merge_id, undone_by=None):
+    """
+    Restore the suspects absorbed by merge `merge_id`. Rows re-pointed by the
+    merge go back unless they have been moved since; survivor fields go back
+    unless they have been edited since. Returns the SuspectMerge.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        merge = SuspectMerge.objects.select_for_update().filter(pk=merge_id).first()
+        if merge is None:
+            raise MergeError("Merge not found.")
+        if merge.undone_at:
+            raise MergeError("This merge has already been undone.")
+        survivor = Suspect.objects.select_for_update().filter(pk=merge.survivor_id).first()
+        if survivor is None:
+            raise MergeError(
+                "The surviving suspect no longer exists; undo the merge that absorbed it first."
+            )
+        if Suspect.objects.filter(pk__in=merge.merged_ids).exists():
+            raise MergeError("The merged suspects already exist.")
+        snapshot = merge.snapshot
+
+        restore = {}
+        for attname, (old, new) in snapshot["survivor"].items():
+            field = next(f for f in Suspect._meta.concrete_fields if f.attname == attname)
+            if _plain(getattr(survivor, attname)) == _plain(field.to_python(new)):
+                restore[attname] = field.to_python(old)
+        if restore:
+            Suspect.objects.filter(pk=survivor.pk).update(**restore, updated_at=now)
+
+        for obj in serializers.deserialize("python", snapshot["suspects"]):
+            obj.save()
+        for label, relinked in snapshot["relinked"].items():
+            model = apps.get_model(label)
+            field = relinked["field"]
+            for suspect_id, pks in relinked["rows"].items():
+                model.objects.filter(pk__in=pks, **{field: survivor.pk}).update(
+                    **{field: int(suspect_id)}, **_touch(model, now)
+                )
+        for obj in serializers.deserialize("python", snapshot["dropped"]):
+            obj.save()
+        _refresh([survivor.pk, *merge.merged_ids])
+
+        merge.undone_at = now
+        merge.undone_by = undone_by
+        merge.save(update_fields=["undone_at", "undone_by", "updated_at"])
+        return merge
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspects', '0002_alter_suspect_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['created_at', 'id'], name='suspects_su_created_2ba5a5_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from apps.suspects.models import RANK_FIELDS, rank_values
+
+CLOSED_CASE_STATUSES = ["closed_solved", "closed_unsolved"]
+
+
+def backfill_ranks(apps, schema_editor):
+    Suspect = apps.get_model("suspects", "Suspect")
+    now = timezone.now()
+    rows = Suspect.objects.annotate(
+        min_case_severity=Min("case_links__case__crime_severity"),
+        open_cases=Count(
+            "case_links", filter=~Q(case_links__case__status__in=CLOSED_CASE_STATUSES)
+        ),
+    ).values_list("pk", "wanted_since", "min_case_severity", "open_cases")
+    suspects = [
+        Suspect(pk=pk, **dict(zip(RANK_FIELDS, rank_values(wanted_since, severity, open_cases, now))))
+        for pk, wanted_since, severity, open_cases in rows.iterator()
+    ]
+    Suspect.objects.bulk_update(suspects, RANK_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cases', '0008_case_event_log'),
+        ('suspects', '0004_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suspect',
+            name='max_crime_severity',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='suspect',
+            name='most_wanted_rank',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='suspect',
+            name='reward_amount',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['status', '-most_wanted_rank'], name='suspects_su_status_24d490_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suspect',
+            index=models.Index(fields=['max_crime_severity'], name='suspects_su_max_cri_60d6c7_idx'),
+        ),
+        migrations.RunPython(backfill_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.suspects.identity import drop_trigram_index, install_trigram_index, rebuild_name_keys
+
+
+def build_index(apps, schema_editor):
+    rebuild_name_keys(apps.get_model("suspects", "Suspect"), apps.get_model("suspects", "SuspectNameKey"))
+    install_trigram_index(schema_editor, "suspects_suspectnamekey", "name")
+
+
+def drop_index(apps, schema_editor):
+    drop_trigram_index(schema_editor, "suspects_suspectnamekey", "name")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspects', '0005_most_wanted_rank_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuspectNameKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=500)),
+                ('phonetic', models.CharField(max_length=500)),
+                ('suspect', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_keys', to='suspects.suspect')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['phonetic'], name='suspects_su_phoneti_d309fe_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
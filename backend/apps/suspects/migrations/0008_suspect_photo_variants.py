@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suspects', '0007_suspect_merge'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='suspect',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
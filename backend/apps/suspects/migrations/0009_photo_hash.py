@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('evidence', '0004_search_vector'),
+        ('suspects', '0008_suspect_photo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PhotoHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('source', models.CharField(max_length=255)),
+                ('phash', models.BigIntegerField()),
+                ('dhash', models.BigIntegerField()),
+                ('attachment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='photo_hash', to='evidence.evidenceattachment')),
+                ('suspect', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='photo_hash', to='suspects.suspect')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['updated_at'], name='suspects_ph_updated_09cd7b_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('suspect__isnull', True), ('attachment__isnull', True), _connector='XOR'), name='photo_hash_one_source')],
+            },
+        ),
+    ]
@@ -1,6 +1,12 @@
 from datetime import timedelta
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, Exists, ExpressionWrapper, F, Min, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django_fsm import FSMField, transition
 
@@ -20,6 +26,156 @@ class SuspectStatus(models.TextChoices):
     CONVICTED = "convicted", "Convicted"
 
 
+# Days under pursuit before a suspect is promoted to Most Wanted
+MOST_WANTED_AFTER_DAYS = 30
+REWARD_PER_RANK_POINT = 20_000_000
+RANK_FIELDS = ["max_crime_severity", "most_wanted_rank", "reward_amount"]
+# Sources of authorize_pursuit() and mark_wanted(), which both lead to UNDER_PURSUIT
+PURSUIT_SOURCES = (SuspectStatus.IDENTIFIED, SuspectStatus.UNDER_INVESTIGATION)
+
+
+def rank_values(wanted_since, min_case_severity, open_cases, now):
+    """
+    (max_crime_severity, most_wanted_rank, reward_amount) for a suspect.
+    CrimeSeverity (CRITICAL=0..LEVEL_3=3) maps to the doc scale 4..1; days
+    wanted only count while the suspect has an open case.
+    """
+    severity = 0 if min_case_severity is None else 4 - min_case_severity
+    days = max((now - wanted_since).days, 0) if wanted_since and open_cases else 0
+    rank = days * severity
+    return severity, rank, rank * REWARD_PER_RANK_POINT
+
+
+class DaysSince(models.Func):
+    """Whole days from a datetime expression until `now` (like timedelta.days)."""
+
+    output_field = models.IntegerField()
+
+    def __init__(self, expression, now, **extra):
+        super().__init__(
+            models.Value(now, output_field=models.DateTimeField()), expression, **extra
+        )
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL
+        template = "CAST(FLOOR(EXTRACT(EPOCH FROM (%(expressions)s)) / 86400) AS integer)"
+        return super().as_sql(
+            compiler, connection, template=template, arg_joiner=" - ", **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        template = "CAST(julianday(%(expressions)s) AS INTEGER)"
+        return super().as_sql(
+            compiler, connection, template=template,
+            arg_joiner=") - julianday(", **extra_context
+        )
+
+
+class SuspectQuerySet(models.QuerySet):
+    def with_rank_inputs(self):
+        """Annotate what rank_values() needs: min linked case severity, open case count."""
+        from apps.cases.models import CaseStatus
+        closed = [CaseStatus.CLOSED_SOLVED, CaseStatus.CLOSED_UNSOLVED]
+        return self.annotate(
+            min_case_severity=Min("case_links__case__crime_severity"),
+            open_cases=Count("case_links", filter=~Q(case_links__case__status__in=closed)),
+        )
+
+    def with_rank(self, now=None):
+        """
+        Annotate the Most Wanted ranking as of `now`, computed in the database:
+        current_days_wanted (max Lj), current_severity (max Di), current_rank
+        and current_reward. Each input is a correlated subquery, so the rows
+        stay one per suspect and the annotations can be ordered, filtered
+        and paginated on like columns.
+        """
+        from apps.cases.models import CaseStatus
+        now = now or timezone.now()
+        links = CaseSuspect.objects.filter(suspect=OuterRef("pk"))
+        open_links = links.exclude(
+            case__status__in=[CaseStatus.CLOSED_SOLVED, CaseStatus.CLOSED_UNSOLVED]
+        )
+        # CrimeSeverity counts down (CRITICAL=0), so max(Di) = 4 - min(severity)
+        min_severity = Subquery(
+            links.order_by("case__crime_severity").values("case__crime_severity")[:1]
+        )
+        return self.annotate(
+            current_days_wanted=Case(
+                When(
+                    Exists(open_links), wanted_since__isnull=False,
+                    then=Greatest(DaysSince(F("wanted_since"), now), Value(0)),
+                ),
+                default=Value(0),
+                output_field=models.IntegerField(),
+            ),
+            current_severity=Coalesce(
+                Value(4) - min_severity, Value(0), output_field=models.IntegerField()
+            ),
+            current_rank=F("current_days_wanted") * F("current_severity"),
+            current_reward=ExpressionWrapper(
+                F("current_rank") * Value(REWARD_PER_RANK_POINT),
+                output_field=models.BigIntegerField(),
+            ),
+        )
+
+    def recompute_ranks(self):
+        """
+        Refresh the stored rank columns of these suspects from with_rank(),
+        in one UPDATE of the rows whose values changed. Returns the number
+        of suspects updated.
+        """
+        now = timezone.now()
+        suspects = self.model.objects.filter(pk__in=self.values("pk")).with_rank(now)
+        stale = suspects.exclude(
+            max_crime_severity=F("current_severity"),
+            most_wanted_rank=F("current_rank"),
+            reward_amount=F("current_reward"),
+        )
+        return self.model.objects.filter(pk__in=stale.values("pk")).with_rank(now).update(
+            max_crime_severity=F("current_severity"),
+            most_wanted_rank=F("current_rank"),
+            reward_amount=F("current_reward"),
+            updated_at=now,
+        )
+
+    def start_pursuit(self):
+        """
+        Set-based authorize_pursuit()/mark_wanted(): suspects of this queryset
+        in a source state become UNDER_PURSUIT with wanted_since = now, and
+        their user accounts are flagged is_suspect, one UPDATE each. Suspects
+        in other states are left alone. Returns the number of suspects moved.
+        """
+        from django.contrib.auth import get_user_model
+        now = timezone.now()
+        with transaction.atomic():
+            pending = list(
+                self.model.objects.filter(
+                    pk__in=self.values("pk"), status__in=PURSUIT_SOURCES
+                ).select_for_update().values_list("pk", "user_id")
+            )
+            if not pending:
+                return 0
+            ids = [pk for pk, _ in pending]
+            moved = self.model.objects.filter(
+                pk__in=ids, status__in=PURSUIT_SOURCES
+            ).update(status=SuspectStatus.UNDER_PURSUIT, wanted_since=now, updated_at=now)
+            user_ids = [user_id for _, user_id in pending if user_id is not None]
+            if user_ids:
+                get_user_model().objects.filter(pk__in=user_ids, is_suspect=False).update(
+                    is_suspect=True, updated_at=now
+                )
+            self.model.objects.filter(pk__in=ids).recompute_ranks()
+        return moved
+
+    def promote_most_wanted(self):
+        """Move suspects under pursuit for MOST_WANTED_AFTER_DAYS+ days to Most Wanted."""
+        now = timezone.now()
+        return self.filter(
+            status=SuspectStatus.UNDER_PURSUIT,
+            wanted_since__lte=now - timedelta(days=MOST_WANTED_AFTER_DAYS),
+        ).update(status=SuspectStatus.MOST_WANTED, updated_at=now)
+
+
 class Suspect(TimeStampedModel):
     """
     Suspect model with status tracking and Most Wanted ranking.
@@ -31,8 +187,15 @@ class Suspect(TimeStampedModel):
     
     Reward Formula:
     - Reward = max(Lj) * max(Di) * 20,000,000 Rials
+
+    Rank, severity and reward are stored columns: recomputed when the suspect
+    is saved, when its case links or their cases change (apps.suspects.signals)
+    and by `manage.py promote_most_wanted` as days pass.
+    Suspect.objects.with_rank() computes the same values in SQL as of now.
     """
     
+    objects = SuspectQuerySet.as_manager()
+
     status = FSMField(
         default=SuspectStatus.IDENTIFIED,
         choices=SuspectStatus.choices,
@@ -43,6 +206,8 @@ class Suspect(TimeStampedModel):
     full_name = models.CharField(max_length=255)
     aliases = models.CharField(max_length=500, blank=True)
     photo = models.ImageField(upload_to="suspects/", null=True, blank=True)
+    # Thumbnail names, see apps.common.thumbnails
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True)
     
     # Link to user if suspect has an account
@@ -58,6 +223,8 @@ class Suspect(TimeStampedModel):
     wanted_since = models.DateTimeField(null=True, blank=True)
     arrested_at = models.DateTimeField(null=True, blank=True)
     last_known_location = models.CharField(max_length=255, blank=True)
+    # Maintained by a database trigger, see apps.common.search
+    search_vector = SearchVectorField(null=True, editable=False)
     
     # Investigation scores (1-10)
     detective_guilt_score = models.PositiveSmallIntegerField(
@@ -77,8 +244,18 @@ class Suspect(TimeStampedModel):
         help_text="Chief's decision for critical cases"
     )
 
+    # Most Wanted ranking (see rank_values)
+    max_crime_severity = models.PositiveSmallIntegerField(default=0, editable=False)
+    most_wanted_rank = models.PositiveIntegerField(default=0, editable=False)
+    reward_amount = models.BigIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["status", "-most_wanted_rank"]),
+            models.Index(fields=["max_crime_severity"]),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.get_status_display()})"
@@ -95,53 +272,25 @@ class Suspect(TimeStampedModel):
         """Check if suspect should be moved to Most Wanted (after 30 days)."""
         return (
             self.status == SuspectStatus.UNDER_PURSUIT and
-            self.days_wanted >= 30
-        )
-
-    @property
-    def max_crime_severity(self) -> int:
-        """
-        Get maximum crime severity from all linked cases (open or closed).
-        Converts CrimeSeverity (CRITICAL=0..LEVEL_3=3) to doc scale (1..4).
-        """
-        links = self.case_links.select_related("case").all()
-        if not links:
-            return 0
-        min_severity = min(link.case.crime_severity for link in links)
-        # Convert: CRITICAL(0)→4, LEVEL_1(1)→3, LEVEL_2(2)→2, LEVEL_3(3)→1
-        return 4 - min_severity
-
-    @property
-    def max_days_wanted_for_case(self) -> int:
-        """
-        Maximum days wanted for any single OPEN case (per doc formula).
-        Only considers cases that are not closed.
-        """
-        if not self.wanted_since:
-            return 0
-        from apps.cases.models import CaseStatus
-        open_cases = self.case_links.select_related("case").exclude(
-            case__status__in=[CaseStatus.CLOSED_SOLVED, CaseStatus.CLOSED_UNSOLVED]
+            self.days_wanted >= MOST_WANTED_AFTER_DAYS
         )
-        if not open_cases.exists():
-            return 0
-        return self.days_wanted
-
-    @property
-    def most_wanted_rank(self) -> int:
-        """
-        Calculate Most Wanted rank.
-        Rank = max(Lj) * max(Di)
-        """
-        return self.max_days_wanted_for_case * self.max_crime_severity
 
-    @property
-    def reward_amount(self) -> int:
-        """
-        Calculate reward amount in Rials.
-        Reward = max(Lj) * max(Di) * 20,000,000
-        """
-        return self.most_wanted_rank * 20_000_000
+    def save(self, *args, **kwargs):
+        # Status and wanted_since feed the rank; links are read from the DB
+        min_severity = open_cases = None
+        if self.pk:
+            inputs = (
+                Suspect.objects.filter(pk=self.pk).with_rank_inputs()
+                .values("min_case_severity", "open_cases").first()
+            )
+            if inputs:
+                min_severity, open_cases = inputs["min_case_severity"], inputs["open_cases"]
+        values = rank_values(self.wanted_since, min_severity, open_cases, timezone.now())
+        for field, value in zip(RANK_FIELDS, values):
+            setattr(self, field, value)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], *RANK_FIELDS}
+        super().save(*args, **kwargs)
 
     # State transitions
     @transition(
@@ -233,6 +382,70 @@ class Suspect(TimeStampedModel):
         pass
 
 
+class SuspectNameKey(models.Model):
+    """
+    One normalized name of a suspect (full name or an alias) with its
+    phonetic key; the identity index searched by apps.suspects.identity.
+    """
+
+    suspect = models.ForeignKey(
+        Suspect,
+        on_delete=models.CASCADE,
+        related_name="name_keys",
+    )
+    name = models.CharField(max_length=500)
+    phonetic = models.CharField(max_length=500)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["phonetic"]),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class PhotoHash(TimeStampedModel):
+    """
+    Perceptual hashes (64-bit pHash and dHash, stored signed) of a suspect
+    photo or an image evidence attachment; loaded into the in-memory index
+    of apps.suspects.photo_index.
+    """
+
+    suspect = models.OneToOneField(
+        Suspect,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="photo_hash",
+    )
+    attachment = models.OneToOneField(
+        "evidence.EvidenceAttachment",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="photo_hash",
+    )
+    # Name of the file the hashes were computed from
+    source = models.CharField(max_length=255)
+    phash = models.BigIntegerField()
+    dhash = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at"]),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(suspect__isnull=True) ^ Q(attachment__isnull=True),
+                name="photo_hash_one_source",
+            ),
+        ]
+
+    def __str__(self):
+        return f"PhotoHash #{self.pk} ({self.source})"
+
+
 class CaseSuspect(TimeStampedModel):
     """Link between cases and suspects with role information."""
     
@@ -301,3 +514,44 @@ class Interrogation(TimeStampedModel):
 
     def __str__(self):
         return f"Interrogation of {self.suspect.full_name} - {self.started_at}"
+
+
+class SuspectMerge(TimeStampedModel):
+    """
+    Undo record of folding suspects into a survivor (apps.suspects.merge).
+    `snapshot` holds the absorbed suspects, the rows re-pointed from each of
+    them, the case links dropped as duplicates and the survivor fields the
+    merge changed.
+    """
+
+    # No constraint: the survivor may itself be absorbed later, and undoing
+    # that merge restores it under the same id.
+    survivor = models.ForeignKey(
+        Suspect,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="merges",
+    )
+    merged_ids = models.JSONField(default=list)
+    snapshot = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    merged_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="suspect_merges",
+    )
+    undone_at = models.DateTimeField(null=True, blank=True)
+    undone_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="suspect_merges_undone",
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Merge #{self.pk}: {self.merged_ids} into suspect #{self.survivor_id}"
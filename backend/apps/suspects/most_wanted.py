@@ -0,0 +1,60 @@
+"""
+Public Most Wanted list.
+
+The list is one query over the Most Wanted suspects, ranked and rendered
+with the with_rank() values, serialized once and kept in the cache for
+MOST_WANTED_CACHE_SECONDS. Changes to suspects, their case links and
+linked cases drop the snapshot (apps.suspects.signals);
+`manage.py promote_most_wanted` promotes suspects and refreshes the
+stored, day-based ranks on a schedule. Paginated requests skip the cache
+but rank the same way.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Suspect, SuspectStatus
+
+MOST_WANTED_CACHE_KEY = "suspects:most_wanted"
+# Query parameters that switch the endpoint to database pagination
+PAGINATION_PARAMS = ("page", "pagination", "cursor")
+
+
+def invalidate():
+    """Drop the cached list once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(MOST_WANTED_CACHE_KEY))
+
+
+def ranked():
+    """
+    Most Wanted suspects, best current rank first (also keyset-paginatable).
+    Ordered by the with_rank() annotation rather than the stored rank, which
+    trails it until the promote_most_wanted job next runs.
+    """
+    return (
+        Suspect.objects.filter(status=SuspectStatus.MOST_WANTED)
+        .with_rank()
+        .order_by("-current_rank", "id")
+    )
+
+
+def snapshot():
+    """Serialized Most Wanted list, best current rank first."""
+    data = cache.get(MOST_WANTED_CACHE_KEY)
+    if data is None:
+        from .serializers import MostWantedSerializer
+        data = list(MostWantedSerializer(ranked(), many=True).data)
+        cache.set(MOST_WANTED_CACHE_KEY, data, settings.MOST_WANTED_CACHE_SECONDS)
+    return data
+
+
+def refresh():
+    """
+    Promote suspects under pursuit for long enough and recompute the ranks
+    of everyone wanted. Returns (promoted, re-ranked) counts.
+    """
+    with transaction.atomic():
+        promoted = Suspect.objects.promote_most_wanted()
+        ranked = Suspect.objects.filter(wanted_since__isnull=False).recompute_ranks()
+    cache.delete(MOST_WANTED_CACHE_KEY)
+    return promoted, ranked
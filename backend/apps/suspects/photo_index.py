@@ -0,0 +1,266 @@
+"""
+Near-duplicate photo lookup over suspect photos and image evidence.
+
+Each suspect photo and image EvidenceAttachment gets a 64-bit pHash (DCT of
+a 32x32 grayscale copy) and dHash (gradient of a 9x8 copy), computed after
+the upload commits (on the apps.common.thumbnails pool) and stored in
+PhotoHash.
+
+Searches run against an in-memory multi-index hash table: each pHash is
+split into four 16-bit chunks, each chunk value keyed to the images having
+it. Two hashes within Hamming distance r agree to within r // 4 bits on at
+least one chunk, so a search probes, per chunk, the values at most r // 4
+bits away and checks the full distance of the images found there. That
+touches a few thousand buckets instead of every image. The dHash distance
+is reported alongside and breaks ties.
+
+The table is loaded per process on the first search and then caught up
+with the PhotoHash rows updated since, at most every
+PHOTO_INDEX_SYNC_SECONDS. Deleted rows linger until the next process
+start, so results are re-read from the database.
+"""
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from apps.common import thumbnails
+
+from .models import PhotoHash, Suspect
+
+SUSPECT, ATTACHMENT = 0, 1
+CHUNKS, CHUNK_BITS = 4, 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+DEFAULT_RADIUS = 8
+# Largest radius that keeps a search of a million photos well under 50 ms
+# on one core (r // 4 = 2 probes as many buckets as the default)
+MAX_RADIUS = 10
+# Rows written in a transaction that commits after a sync are picked up by
+# the next one
+SYNC_OVERLAP = timedelta(minutes=1)
+
+# cos((2x + 1) u pi / 64) for the 8 lowest frequencies of a 32-point DCT-II
+_DCT = [[math.cos((2 * x + 1) * u * math.pi / 64) for x in range(32)] for u in range(8)]
+
+
+def image_hashes(fp):
+    """(pHash, dHash) of an image file as unsigned 64-bit ints."""
+    image = Image.open(fp)
+    image.draft("L", (128, 128))
+    image = ImageOps.exif_transpose(image).convert("L")
+
+    pixels = image.resize((32, 32), Image.LANCZOS).tobytes()
+    rows = [
+        [sum(c * p for c, p in zip(cos, pixels[y * 32:y * 32 + 32])) for cos in _DCT]
+        for y in range(32)
+    ]
+    low = [sum(cos[y] * rows[y][u] for y in range(32)) for cos in _DCT for u in range(8)]
+    median = sorted(low)[32]
+    phash = sum(1 << i for i, value in enumerate(low) if value > median)
+
+    pixels = image.resize((9, 8), Image.LANCZOS).tobytes()
+    dhash = sum(
+        1 << (y * 8 + x)
+        for y in range(8) for x in range(8)
+        if pixels[y * 9 + x + 1] > pixels[y * 9 + x]
+    )
+    return phash, dhash
+
+
+def to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def _masks(bits):
+    """16-bit masks with at most `bits` bits set, fewest first."""
+    masks = [mask for mask in range(1 << CHUNK_BITS) if mask.bit_count() <= bits]
+    return sorted(masks, key=int.bit_count)
+
+
+class PhotoIndex:
+    """
+    Multi-index hash table of 64-bit pHashes. Keys are ints
+    (pk << 1 | SUSPECT/ATTACHMENT) to keep a million entries compact.
+    """
+
+    _probe_masks = {}
+
+    def __init__(self):
+        self._hashes = {}  # key -> phash << 64 | dhash
+        self._chunks = [{} for _ in range(CHUNKS)]
+
+    def __len__(self):
+        return len(self._hashes)
+
+    @staticmethod
+    def _split(phash):
+        return [(phash >> (i * CHUNK_BITS)) & CHUNK_MASK for i in range(CHUNKS)]
+
+    def add(self, key, phash, dhash):
+        self.discard(key)
+        self._hashes[key] = phash << 64 | dhash
+        for table, chunk in zip(self._chunks, self._split(phash)):
+            table.setdefault(chunk, []).append(key)
+
+    def discard(self, key):
+        packed = self._hashes.pop(key, None)
+        if packed is None:
+            return
+        for table, chunk in zip(self._chunks, self._split(packed >> 64)):
+            bucket = table[chunk]
+            bucket.remove(key)
+            if not bucket:
+                del table[chunk]
+
+    def search(self, phash, dhash, radius):
+        """[(key, pHash distance, dHash distance)] within `radius`, closest first."""
+        sub = radius // CHUNKS
+        masks = self._probe_masks.get(sub)
+        if masks is None:
+            masks = self._probe_masks[sub] = _masks(sub)
+        hashes, found = self._hashes, {}
+        for table, chunk in zip(self._chunks, self._split(phash)):
+            get = table.get
+            for mask in masks:
+                bucket = get(chunk ^ mask)
+                if bucket is None:
+                    continue
+                for key in bucket:
+                    if key in found:
+                        continue
+                    packed = hashes[key]
+                    distance = ((packed >> 64) ^ phash).bit_count()
+                    if distance <= radius:
+                        found[key] = (distance, ((packed & ((1 << 64) - 1)) ^ dhash).bit_count())
+                    else:
+                        found[key] = None
+        results = [(key, *distances) for key, distances in found.items() if distances]
+        return sorted(results, key=lambda row: (row[1], row[2], row[0]))
+
+
+_index = None
+_synced_at = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _load(rows, index):
+    for suspect_id, attachment_id, phash, dhash in rows:
+        key = suspect_id << 1 | SUSPECT if suspect_id else attachment_id << 1 | ATTACHMENT
+        index.add(key, to_unsigned(phash), to_unsigned(dhash))
+
+
+def get_index():
+    """This process' index, loaded or caught up as needed."""
+    global _index, _synced_at, _checked_at
+    with _lock:
+        if _index is not None and time.monotonic() - _checked_at < settings.PHOTO_INDEX_SYNC_SECONDS:
+            return _index
+        started = timezone.now()
+        rows = PhotoHash.objects.order_by()
+        if _index is None:
+            index = PhotoIndex()
+        else:
+            index, rows = _index, rows.filter(updated_at__gte=_synced_at - SYNC_OVERLAP)
+        _load(
+            rows.values_list("suspect_id", "attachment_id", "phash", "dhash").iterator(chunk_size=10_000),
+            index,
+        )
+        _index, _synced_at, _checked_at = index, started, time.monotonic()
+        return _index
+
+
+def reset():
+    global _index, _synced_at
+    with _lock:
+        _index = _synced_at = None
+
+
+def _remember(key, phash=None, dhash=None):
+    with _lock:
+        if _index is None:
+            return
+        if phash is None:
+            _index.discard(key)
+        else:
+            _index.add(key, phash, dhash)
+
+
+def index_file(kind, pk, name, storage):
+    """Store the hashes of `name` for one suspect/attachment (none when name is blank)."""
+    column = "suspect_id" if kind == SUSPECT else "attachment_id"
+    key = pk << 1 | kind
+    existing = PhotoHash.objects.filter(**{column: pk}).first()
+    if not name:
+        if existing:
+            existing.delete()
+            _remember(key)
+        return
+    if existing and existing.source == name:
+        return
+    with storage.open(name, "rb") as f:
+        phash, dhash = image_hashes(f)
+    PhotoHash.objects.update_or_create(
+        **{column: pk},
+        defaults={"source": name, "phash": to_signed(phash), "dhash": to_signed(dhash)},
+    )
+    _remember(key, phash, dhash)
+
+
+def index_suspect(pk):
+    name = Suspect.objects.filter(pk=pk).values_list("photo", flat=True).first()
+    index_file(SUSPECT, pk, name or "", Suspect._meta.get_field("photo").storage)
+
+
+def index_attachment(pk):
+    from apps.evidence.models import EvidenceAttachment
+    row = EvidenceAttachment.objects.filter(pk=pk).values_list("file", "attachment_type").first()
+    name = row[0] if row and row[1] == EvidenceAttachment.AttachmentType.IMAGE else ""
+    index_file(ATTACHMENT, pk, name, EvidenceAttachment._meta.get_field("file").storage)
+
+
+def schedule_suspect(pk):
+    thumbnails.run_after_commit(index_suspect, pk)
+
+
+def schedule_attachment(pk):
+    thumbnails.run_after_commit(index_attachment, pk)
+
+
+def rebuild(stdout=None):
+    """Hash every suspect photo and image attachment not hashed yet. Returns (hashed, failed)."""
+    from apps.evidence.models import EvidenceAttachment
+    jobs = [
+        (index_suspect, Suspect.objects.exclude(photo="").exclude(photo__isnull=True)),
+        (
+            index_attachment,
+            EvidenceAttachment.objects.filter(
+                attachment_type=EvidenceAttachment.AttachmentType.IMAGE
+            ),
+        ),
+    ]
+    hashed = failed = 0
+    for job, rows in jobs:
+        for pk in rows.filter(photo_hash__isnull=True).values_list("pk", flat=True).iterator():
+            try:
+                job(pk)
+                hashed += 1
+            except Exception as e:
+                failed += 1
+                if stdout:
+                    stdout.write(f"{job.__name__}({pk}) failed: {e}")
+    return hashed, failed
+
+
+def search(phash, dhash, radius=DEFAULT_RADIUS, limit=20):
+    """[(SUSPECT/ATTACHMENT, pk, pHash distance, dHash distance)], closest first."""
+    matches = get_index().search(phash, dhash, radius)[:limit]
+    return [(key & 1, key >> 1, distance, ddistance) for key, distance, ddistance in matches]
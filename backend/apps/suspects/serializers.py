@@ -2,11 +2,29 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from apps.accounts.serializers import UserSerializer
+from apps.common.thumbnails import ThumbnailField, ThumbnailSetField
+from . import photo_index
 from .models import CaseSuspect, Interrogation, Suspect, SuspectStatus
 
 User = get_user_model()
 
 
+class RankField(serializers.IntegerField):
+    """
+    A ranking value: the with_rank() annotation when the queryset carries
+    it, else the stored column of the same meaning.
+    """
+
+    def __init__(self, annotation, **kwargs):
+        self.annotation = annotation
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        value = getattr(instance, self.annotation, None)
+        return super().get_attribute(instance) if value is None else value
+
+
 class CaseSuspectSerializer(serializers.ModelSerializer):
     added_by = UserSerializer(read_only=True)
     suspect_detail = serializers.SerializerMethodField()
@@ -59,15 +77,17 @@ class SuspectSerializer(serializers.ModelSerializer):
     
     # Computed fields
     days_wanted = serializers.IntegerField(read_only=True)
-    most_wanted_rank = serializers.IntegerField(read_only=True)
-    reward_amount = serializers.IntegerField(read_only=True)
-    max_crime_severity = serializers.IntegerField(read_only=True)
+    most_wanted_rank = RankField("current_rank")
+    reward_amount = RankField("current_reward")
+    max_crime_severity = RankField("current_severity")
+    photo_thumb = ThumbnailField(source="photo_variants")
+    photo_variants = ThumbnailSetField()
 
     class Meta:
         model = Suspect
         fields = [
-            "id", "full_name", "aliases", "photo", "description",
-            "status", "user", "user_id",
+            "id", "full_name", "aliases", "photo", "photo_thumb", "photo_variants",
+            "description", "status", "user", "user_id",
             "wanted_since", "arrested_at", "last_known_location",
             "detective_guilt_score", "sergeant_guilt_score",
             "captain_decision", "chief_decision",
@@ -77,17 +97,27 @@ class SuspectSerializer(serializers.ModelSerializer):
         ]
 
 
+# Relation paths (from a suspect) whose rows SuspectSerializer renders; used
+# for conditional GET validators. Linked cases feed the computed rank fields.
+SUSPECT_SERIALIZER_RELATED = (
+    "user",
+    "case_links", "case_links__case", "case_links__added_by",
+    "interrogations", "interrogations__conducted_by",
+)
+
+
 class SuspectListSerializer(serializers.ModelSerializer):
     """Simplified serializer for list views."""
     
     days_wanted = serializers.IntegerField(read_only=True)
-    most_wanted_rank = serializers.IntegerField(read_only=True)
-    reward_amount = serializers.IntegerField(read_only=True)
+    most_wanted_rank = RankField("current_rank")
+    reward_amount = RankField("current_reward")
+    photo_thumb = ThumbnailField(source="photo_variants")
 
     class Meta:
         model = Suspect
         fields = [
-            "id", "full_name", "aliases", "photo", "status",
+            "id", "full_name", "aliases", "photo", "photo_thumb", "status",
             "wanted_since", "last_known_location",
             "days_wanted", "most_wanted_rank", "reward_amount",
         ]
@@ -97,20 +127,73 @@ class MostWantedSerializer(serializers.ModelSerializer):
     """Serializer for public Most Wanted page."""
     
     days_wanted = serializers.IntegerField(read_only=True)
-    most_wanted_rank = serializers.IntegerField(read_only=True)
-    reward_amount = serializers.IntegerField(read_only=True)
-    max_crime_severity = serializers.IntegerField(read_only=True)
+    most_wanted_rank = RankField("current_rank")
+    reward_amount = RankField("current_reward")
+    max_crime_severity = RankField("current_severity")
+    photo_thumb = ThumbnailField(source="photo_variants")
+    photo_variants = ThumbnailSetField()
 
     class Meta:
         model = Suspect
         fields = [
-            "id", "full_name", "aliases", "photo", "description",
-            "last_known_location", "wanted_since",
+            "id", "full_name", "aliases", "photo", "photo_thumb", "photo_variants",
+            "description", "last_known_location", "wanted_since",
             "days_wanted", "most_wanted_rank", "reward_amount",
             "max_crime_severity",
         ]
 
 
+class SuspectBulkArrestSerializer(serializers.Serializer):
+    """Serializer for arresting many suspects at once."""
+
+    MAX_SUSPECTS = 500
+
+    suspect_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_SUSPECTS,
+    )
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class SuspectMergeSerializer(serializers.Serializer):
+    """Serializer for folding duplicate suspects into one."""
+
+    MAX_SUSPECTS = 100
+
+    suspect_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_SUSPECTS,
+    )
+
+
+class PhotoSearchSerializer(serializers.Serializer):
+    """Serializer for near-duplicate photo searches: an upload or an evidence image."""
+
+    MAX_RESULTS = 50
+
+    photo = serializers.ImageField(required=False)
+    attachment_id = serializers.IntegerField(required=False, min_value=1)
+    radius = serializers.IntegerField(
+        required=False, min_value=0, max_value=photo_index.MAX_RADIUS,
+        default=photo_index.DEFAULT_RADIUS,
+        help_text="Largest pHash Hamming distance (of 64 bits) to return",
+    )
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_RESULTS, default=20)
+
+    def validate(self, attrs):
+        if ("photo" in attrs) == ("attachment_id" in attrs):
+            raise serializers.ValidationError("Provide either photo or attachment_id.")
+        return attrs
+
+
+class SuspectUnmergeSerializer(serializers.Serializer):
+    """Serializer for undoing a merge."""
+
+    merge_id = serializers.IntegerField(min_value=1)
+
+
 class GuildScoreSerializer(serializers.Serializer):
     """Serializer for submitting guilt scores."""
     
@@ -0,0 +1,67 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.common import thumbnails
+from . import identity, most_wanted, photo_index
+from .models import RANK_FIELDS, CaseSuspect, Suspect
+
+
+@receiver(post_save, sender=CaseSuspect)
+@receiver(post_delete, sender=CaseSuspect)
+def rerank_linked_suspect(sender, instance, **kwargs):
+    """A new or removed case link changes the suspect's severity and open cases."""
+    if Suspect.objects.filter(pk=instance.suspect_id).recompute_ranks():
+        most_wanted.invalidate()
+        # Keep the caller's suspect object in step with its row
+        if CaseSuspect.suspect.is_cached(instance):
+            instance.suspect.refresh_from_db(fields=RANK_FIELDS)
+
+
+@receiver(post_save, sender="cases.Case")
+def rerank_case_suspects(sender, instance, created, **kwargs):
+    """Severity and open/closed status of a case feed the rank of its suspects."""
+    if created:
+        return
+    if Suspect.objects.filter(case_links__case=instance).recompute_ranks():
+        most_wanted.invalidate()
+
+
+@receiver(post_save, sender=Suspect)
+@receiver(post_delete, sender=Suspect)
+def invalidate_most_wanted(sender, instance, **kwargs):
+    most_wanted.invalidate()
+
+
+@receiver(post_save, sender=Suspect)
+def index_suspect_names(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the identity index in step with full_name and aliases."""
+    if raw or (update_fields is not None and not {"full_name", "aliases"} & set(update_fields)):
+        return
+    identity.sync_name_keys(instance)
+
+
+@receiver(pre_save, sender=Suspect)
+def keep_photo_variants(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        thumbnails.keep_variants(instance, "photo", "photo_variants", update_fields)
+
+
+@receiver(post_save, sender=Suspect)
+def make_photo_thumbnails(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Thumbnails and photo hashes are made after commit; the public list is
+    refreshed once the thumbnails exist.
+    """
+    if raw:
+        return
+    if thumbnails.schedule(
+        instance, "photo", "photo_variants", done=most_wanted.invalidate, created=created
+    ):
+        photo_index.schedule_suspect(instance.pk)
+
+
+@receiver(post_save, sender="evidence.EvidenceAttachment")
+def hash_attachment_image(sender, instance, raw=False, **kwargs):
+    """Image evidence joins the photo search index (other types are skipped by the job)."""
+    if not raw:
+        photo_index.schedule_attachment(instance.pk)
@@ -1,13 +1,36 @@
-from django.test import TestCase
+import io
+import random
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from PIL import Image, ImageDraw
 from datetime import timedelta
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 
-from .models import Suspect, SuspectStatus, Interrogation
-from apps.cases.models import Case, CaseStatus
+from . import identity, photo_index
+from .merge import merge_suspects, undo_merge
+from .models import (
+    CaseSuspect, Interrogation, PhotoHash, Suspect, SuspectMerge, SuspectNameKey,
+    SuspectStatus,
+)
+from apps.cases.models import Case, CaseHistory, CaseStatus
+from apps.bail.models import Bail
 from apps.common.models import CrimeSeverity
+from apps.common import thumbnails
+from apps.common.pagination import KeysetPagination
+from apps.evidence.models import Evidence, EvidenceAttachment
+from apps.rewards.models import Tip
 
 User = get_user_model()
 
@@ -313,6 +336,7 @@ class MostWantedPublicListTestCase(APITestCase):
     """Test Most Wanted public endpoint."""
     
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         
         self.detective = User.objects.create_user(
@@ -372,6 +396,745 @@ class MostWantedPublicListTestCase(APITestCase):
                     self.assertIsNotNone(suspects[i])
 
 
+class MostWantedRankColumnsTestCase(APITestCase):
+    """Stored rank columns, the promotion job and the cached public list."""
+
+    URL = '/api/v1/suspects/most_wanted/'
+
+    def setUp(self):
+        cache.clear()
+        self.detective = User.objects.create_user(username='detective', password='pass123')
+        self.case = Case.objects.create(
+            case_number="CASE-RANK-1",
+            title="Robbery",
+            created_by=self.detective,
+            crime_severity=CrimeSeverity.LEVEL_2,
+            status=CaseStatus.INVESTIGATION,
+        )
+        self.suspect = Suspect.objects.create(
+            full_name="Long Wanted",
+            status=SuspectStatus.UNDER_PURSUIT,
+            wanted_since=timezone.now() - timedelta(days=40),
+        )
+
+    def reload(self, suspect):
+        return Suspect.objects.get(pk=suspect.pk)
+
+    def test_linking_a_case_computes_rank(self):
+        self.assertEqual(self.suspect.most_wanted_rank, 0)
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+
+        suspect = self.reload(self.suspect)
+        self.assertEqual(suspect.max_crime_severity, 2)
+        self.assertEqual(suspect.most_wanted_rank, 40 * 2)
+        self.assertEqual(suspect.reward_amount, 40 * 2 * 20_000_000)
+
+    def test_case_severity_and_closing_rerank_suspects(self):
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+
+        self.case.crime_severity = CrimeSeverity.CRITICAL
+        self.case.save()
+        self.assertEqual(self.reload(self.suspect).most_wanted_rank, 40 * 4)
+
+        Case.objects.filter(pk=self.case.pk).update(status=CaseStatus.CLOSED_SOLVED)
+        Case.objects.get(pk=self.case.pk).save()
+        suspect = self.reload(self.suspect)
+        self.assertEqual(suspect.max_crime_severity, 4)
+        self.assertEqual(suspect.most_wanted_rank, 0)
+
+    def test_promotion_job(self):
+        recent = Suspect.objects.create(
+            full_name="Recently Wanted",
+            status=SuspectStatus.UNDER_PURSUIT,
+            wanted_since=timezone.now() - timedelta(days=5),
+        )
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+        # Ranks grow with the days wanted; the job brings stored values up to date
+        Suspect.objects.filter(pk=self.suspect.pk).update(most_wanted_rank=1)
+
+        out = StringIO()
+        call_command("promote_most_wanted", stdout=out)
+
+        suspect = self.reload(self.suspect)
+        self.assertEqual(suspect.status, SuspectStatus.MOST_WANTED)
+        self.assertEqual(suspect.most_wanted_rank, 80)
+        self.assertEqual(self.reload(recent).status, SuspectStatus.UNDER_PURSUIT)
+        self.assertIn("Promoted 1 suspect(s)", out.getvalue())
+
+    def test_public_list_is_ranked_and_cached(self):
+        minor_case = Case.objects.create(
+            case_number="CASE-RANK-2",
+            title="Pickpocketing",
+            created_by=self.detective,
+            crime_severity=CrimeSeverity.LEVEL_3,
+            status=CaseStatus.INVESTIGATION,
+        )
+        low = Suspect.objects.create(
+            full_name="Minor Offender",
+            status=SuspectStatus.MOST_WANTED,
+            wanted_since=timezone.now() - timedelta(days=40),
+        )
+        CaseSuspect.objects.create(case=minor_case, suspect=low, added_by=self.detective)
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+        Suspect.objects.filter(pk=self.suspect.pk).update(status=SuspectStatus.MOST_WANTED)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data], [self.suspect.pk, low.pk])
+        self.assertEqual([row["most_wanted_rank"] for row in response.data], [80, 40])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.URL)
+        self.assertEqual(cached.data, response.data)
+
+    def test_public_list_orders_by_current_rank(self):
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+        newer = Suspect.objects.create(
+            full_name="Newly Wanted",
+            status=SuspectStatus.MOST_WANTED,
+            wanted_since=timezone.now() - timedelta(days=31),
+        )
+        CaseSuspect.objects.create(case=self.case, suspect=newer, added_by=self.detective)
+        Suspect.objects.filter(pk=self.suspect.pk).update(status=SuspectStatus.MOST_WANTED)
+        # Stored ranks lag until the job runs; the list follows today's ranks
+        Suspect.objects.filter(pk=self.suspect.pk).update(most_wanted_rank=1)
+
+        response = self.client.get(self.URL)
+        self.assertEqual([row["id"] for row in response.data], [self.suspect.pk, newer.pk])
+        self.assertEqual([row["most_wanted_rank"] for row in response.data], [80, 62])
+
+    def test_suspect_changes_drop_the_cached_list(self):
+        Suspect.objects.filter(pk=self.suspect.pk).update(status=SuspectStatus.MOST_WANTED)
+        self.assertEqual(len(self.client.get(self.URL).data), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect = self.reload(self.suspect)
+            suspect.arrest()
+            suspect.save()
+        self.assertEqual(self.client.get(self.URL).data, [])
+
+    def test_with_rank_matches_stored_columns(self):
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+        # Stored values lag behind until the job runs; the annotation does not
+        Suspect.objects.filter(pk=self.suspect.pk).update(most_wanted_rank=1)
+
+        suspect = Suspect.objects.with_rank().get(pk=self.suspect.pk)
+        self.assertEqual(suspect.current_days_wanted, 40)
+        self.assertEqual(suspect.current_severity, 2)
+        self.assertEqual(suspect.current_rank, 80)
+        self.assertEqual(suspect.current_reward, 80 * 20_000_000)
+
+        unlinked = Suspect.objects.create(
+            full_name="No Cases", wanted_since=timezone.now() - timedelta(days=10)
+        )
+        ranked = Suspect.objects.with_rank().filter(current_rank__gt=0).order_by("-current_rank")
+        self.assertEqual(list(ranked), [self.suspect])
+        self.assertEqual(Suspect.objects.with_rank().get(pk=unlinked.pk).current_rank, 0)
+
+        Suspect.objects.filter(pk=self.suspect.pk).recompute_ranks()
+        self.assertEqual(self.reload(self.suspect).most_wanted_rank, 80)
+
+    def test_public_list_paginates_in_the_database(self):
+        CaseSuspect.objects.create(case=self.case, suspect=self.suspect, added_by=self.detective)
+        for days in (35, 50):
+            suspect = Suspect.objects.create(
+                full_name=f"Wanted {days}",
+                status=SuspectStatus.UNDER_PURSUIT,
+                wanted_since=timezone.now() - timedelta(days=days),
+            )
+            CaseSuspect.objects.create(case=self.case, suspect=suspect, added_by=self.detective)
+        call_command("promote_most_wanted", stdout=StringIO())
+
+        response = self.client.get(self.URL, {"page": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [row["most_wanted_rank"] for row in response.data["results"]], [100, 80, 70]
+        )
+
+        first = self.client.get(self.URL, {"pagination": "cursor"})
+        self.assertEqual(len(first.data["results"]), 3)
+        self.assertIsNone(first.data["next"])
+
+        # Stored ranks lag until the job runs; both modes follow today's ranks
+        Suspect.objects.filter(pk=self.suspect.pk).update(most_wanted_rank=1)
+        response = self.client.get(self.URL, {"page": 1})
+        self.assertEqual(
+            [row["most_wanted_rank"] for row in response.data["results"]], [100, 80, 70]
+        )
+        with mock.patch.object(KeysetPagination, "page_size", 2):
+            first = self.client.get(self.URL, {"pagination": "cursor"})
+            second = self.client.get(first.data["next"])
+        self.assertEqual([row["most_wanted_rank"] for row in first.data["results"]], [100, 80])
+        self.assertEqual([row["most_wanted_rank"] for row in second.data["results"]], [70])
+        self.assertIsNone(second.data["next"])
+
+
+class BulkArrestTestCase(APITestCase):
+    """POST /suspects/bulk_arrest/ and the case cascade."""
+
+    URL = '/api/v1/suspects/bulk_arrest/'
+
+    def setUp(self):
+        self.sergeant = User.objects.create_user(
+            username='sergeant', email='sergeant@example.com', password='pass123'
+        )
+        self.sergeant.add_role('Sergeant')
+        self.client.force_authenticate(user=self.sergeant)
+
+        self.raid_case = self.make_case("CASE-RAID-1")
+        self.shared_case = self.make_case("CASE-RAID-2")
+        self.first, self.second, self.at_large = (
+            Suspect.objects.create(full_name=name, status=SuspectStatus.UNDER_PURSUIT)
+            for name in ("First", "Second", "At Large")
+        )
+        self.identified = Suspect.objects.create(full_name="Identified")
+        for suspect in (self.first, self.second):
+            CaseSuspect.objects.create(case=self.raid_case, suspect=suspect)
+        for suspect in (self.second, self.at_large, self.identified):
+            CaseSuspect.objects.create(case=self.shared_case, suspect=suspect)
+
+    def make_case(self, number):
+        return Case.objects.create(
+            case_number=number, title=number, created_by=self.sergeant,
+            status=CaseStatus.SUSPECT_IDENTIFIED,
+        )
+
+    def test_bulk_arrest_moves_fully_arrested_cases(self):
+        ids = [self.first.pk, self.second.pk, self.identified.pk, 999999]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.URL, {"suspect_ids": ids}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["succeeded"], 2)
+        self.assertEqual(response.data["failed"], 2)
+        self.assertEqual(
+            [row["success"] for row in response.data["results"]], [True, True, False, False]
+        )
+        self.assertEqual(response.data["cases_in_interrogation"], [self.raid_case.pk])
+
+        arrested = Suspect.objects.filter(status=SuspectStatus.ARRESTED)
+        self.assertEqual(set(arrested), {self.first, self.second})
+        self.assertFalse(arrested.filter(arrested_at__isnull=True).exists())
+        self.assertEqual(
+            dict(Case.objects.values_list("pk", "status")),
+            {
+                self.raid_case.pk: CaseStatus.INTERROGATION,
+                self.shared_case.pk: CaseStatus.SUSPECT_IDENTIFIED,
+            },
+        )
+        history = CaseHistory.objects.get()
+        self.assertEqual(history.case_id, self.raid_case.pk)
+        self.assertEqual(history.to_status, CaseStatus.INTERROGATION)
+        self.assertEqual(history.changed_by, self.sergeant)
+
+    def test_queries_do_not_grow_with_suspects(self):
+        def arrest(suspects):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(
+                    self.URL, {"suspect_ids": [s.pk for s in suspects]}, format='json'
+                )
+            self.assertEqual(response.data["succeeded"], len(suspects))
+            return len(ctx.captured_queries)
+
+        one = arrest([self.first])
+        self.assertEqual(arrest([self.second, self.at_large]), one)
+
+    def test_only_sergeants(self):
+        officer = User.objects.create_user(
+            username='officer', email='officer@example.com', password='pass123'
+        )
+        self.client.force_authenticate(user=officer)
+        response = self.client.post(self.URL, {"suspect_ids": [self.first.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SuspectIdentityTestCase(APITestCase):
+    """Name normalization, the SuspectNameKey index and GET /suspects/match/."""
+
+    URL = '/api/v1/suspects/match/'
+
+    def setUp(self):
+        self.detective = User.objects.create_user(
+            username='detective', email='detective@example.com', password='pass123'
+        )
+        self.detective.add_role('Detective')
+        self.client.force_authenticate(user=self.detective)
+        self.case = Case.objects.create(
+            case_number="CASE-ID-1", title="Identity", created_by=self.detective,
+            lead_detective=self.detective,
+        )
+
+    def test_normalize_name_folds_script_variants(self):
+        # Arabic yeh/kaf, ZWNJ, diacritics and Persian digits
+        self.assertEqual(
+            identity.normalize_name("\u0639\u0644\u064a \u0643\u0631\u064a\u0645\u064a"),
+            identity.normalize_name("\u0639\u0644\u06cc \u06a9\u0631\u06cc\u0645\u06cc"),
+        )
+        self.assertEqual(
+            identity.normalize_name("\u0645\u06cc\u200c\u0631\u0636\u0627"),
+            "\u0645\u06cc\u0631\u0636\u0627",
+        )
+        self.assertEqual(
+            identity.normalize_name("\u0645\u064f\u062d\u064e\u0645\u0651\u062f"),
+            "\u0645\u062d\u0645\u062f",
+        )
+        self.assertEqual(identity.normalize_name("  Agent-\u06f4\u06f7 "), "agent 47")
+
+    def test_phonetic_key(self):
+        self.assertEqual(identity.phonetic_key("ali rezaei"), identity.phonetic_key("ali rezai"))
+        self.assertEqual(identity.phonetic_key("robert"), "r163")
+        # se/sad/sin sound alike
+        self.assertEqual(
+            identity.phonetic_key("\u062b\u0627\u0628\u062a"),
+            identity.phonetic_key("\u0633\u0627\u0628\u062a"),
+        )
+
+    def test_name_keys_follow_name_and_aliases(self):
+        suspect = Suspect.objects.create(full_name="Ali Rezaei", aliases="Scarface, The Fox")
+
+        def names():
+            return set(SuspectNameKey.objects.filter(suspect=suspect).values_list("name", flat=True))
+
+        self.assertEqual(names(), {"ali rezaei", "scarface", "the fox"})
+
+        suspect.aliases = "Scarface"
+        suspect.save()
+        self.assertEqual(names(), {"ali rezaei", "scarface"})
+
+        Suspect.objects.filter(pk=suspect.pk).update(full_name="Reza Alavi")
+        self.assertEqual(identity.rebuild_name_keys(), 2)
+        self.assertEqual(names(), {"reza alavi", "scarface"})
+
+    def test_match_ranks_suspects(self):
+        exact = Suspect.objects.create(full_name="Ali Rezaei")
+        alias = Suspect.objects.create(full_name="Hamid Karimi", aliases="Ali Rezai")
+        Suspect.objects.create(full_name="Someone Else")
+
+        response = self.client.get(self.URL, {"name": "ali rezaei"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["suspect"]["id"] for row in response.data], [exact.pk, alias.pk])
+        self.assertEqual(response.data[0]["score"], 1.0)
+        self.assertEqual(response.data[1]["matched_name"], "ali rezai")
+
+        response = self.client.get(self.URL, {"name": "ali rezaei", "limit": 1})
+        self.assertEqual(len(response.data), 1)
+
+    def test_match_validation_and_access(self):
+        self.assertEqual(self.client.get(self.URL).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.URL, {"name": "x", "limit": "many"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        citizen = User.objects.create_user(
+            username='citizen', email='citizen@example.com', password='pass123'
+        )
+        self.client.force_authenticate(user=citizen)
+        response = self.client.get(self.URL, {"name": "ali"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_add_suspect_links_existing_suspect(self):
+        existing = Suspect.objects.create(full_name="Ali Rezaei")
+        url = f'/api/v1/cases/{self.case.pk}/add_suspect/'
+
+        # Linking another case's suspect takes the capability /suspects/match/ needs
+        with mock.patch("apps.cases.views.has_capability", return_value=False):
+            response = self.client.post(url, {"suspect_id": existing.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            response = self.client.post(
+                url, {"full_name": "Ali Rezai", "link_match": True}, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Suspect.objects.count(), 1)
+
+        response = self.client.post(url, {"suspect_id": existing.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], existing.pk)
+        self.assertNotIn("description", response.data)
+        response = self.client.post(url, {"suspect_id": existing.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {"suspect_id": 999999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {"suspect_id": "abc"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("suspect_id", response.data)
+        response = self.client.post(url, {"role": "primary"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other_case = Case.objects.create(
+            case_number="CASE-ID-2", title="Identity 2", created_by=self.detective,
+            lead_detective=self.detective,
+        )
+        url = f'/api/v1/cases/{other_case.pk}/add_suspect/'
+        response = self.client.post(url, {"full_name": "Ali Rezai", "link_match": True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], existing.pk)
+
+        response = self.client.post(url, {"full_name": "Reza Alavi", "link_match": True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Suspect.objects.count(), 2)
+        self.assertEqual(CaseSuspect.objects.filter(suspect=existing).count(), 2)
+
+    def test_staff_can_link_existing_suspects(self):
+        existing = Suspect.objects.create(full_name="Ali Rezaei")
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass123', is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+
+        url = f'/api/v1/cases/{self.case.pk}/add_suspect/'
+        response = self.client.post(url, {"suspect_id": existing.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], existing.pk)
+
+        other_case = Case.objects.create(
+            case_number="CASE-ID-2", title="Identity 2", created_by=self.detective,
+            lead_detective=self.detective,
+        )
+        url = f'/api/v1/cases/{other_case.pk}/add_suspect/'
+        response = self.client.post(url, {"full_name": "Ali Rezai", "link_match": True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], existing.pk)
+        self.assertEqual(Suspect.objects.count(), 1)
+
+
+class SuspectMergeTestCase(APITestCase):
+    """POST /suspects/{id}/merge/ and unmerge/, and the merge_suspects command."""
+
+    def setUp(self):
+        self.sergeant = User.objects.create_user(
+            username='sergeant', email='sergeant@example.com', password='pass123'
+        )
+        self.sergeant.add_role('Sergeant')
+        self.client.force_authenticate(user=self.sergeant)
+        self.shared_case = Case.objects.create(
+            case_number="CASE-MERGE-1", title="Shared", created_by=self.sergeant,
+            status=CaseStatus.SUSPECT_IDENTIFIED,
+            crime_severity=CrimeSeverity.LEVEL_3,
+        )
+        self.other_case = Case.objects.create(
+            case_number="CASE-MERGE-2", title="Other", created_by=self.sergeant,
+            status=CaseStatus.SUSPECT_IDENTIFIED,
+            crime_severity=CrimeSeverity.CRITICAL,
+        )
+        self.survivor = Suspect.objects.create(
+            full_name="Ali Rezaei", status=SuspectStatus.UNDER_PURSUIT,
+            wanted_since=timezone.now() - timedelta(days=2),
+        )
+        self.duplicate = Suspect.objects.create(
+            full_name="Ali Rezai", aliases="Scarface", description="Scar on left cheek",
+            status=SuspectStatus.ARRESTED, wanted_since=timezone.now() - timedelta(days=10),
+        )
+        self.survivor_link = CaseSuspect.objects.create(
+            case=self.shared_case, suspect=self.survivor, notes="survivor"
+        )
+        CaseSuspect.objects.create(case=self.shared_case, suspect=self.duplicate, notes="dup")
+        self.moved_link = CaseSuspect.objects.create(case=self.other_case, suspect=self.duplicate)
+        self.interrogation = Interrogation.objects.create(
+            suspect=self.duplicate, case=self.other_case, started_at=timezone.now()
+        )
+        self.tip = Tip.objects.create(
+            submitted_by=self.sergeant, suspect=self.duplicate, title="Seen", description="x"
+        )
+        self.bail = Bail.objects.create(suspect=self.duplicate, amount=1000)
+
+    def merge(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f'/api/v1/suspects/{self.survivor.pk}/merge/',
+                {"suspect_ids": [self.duplicate.pk]}, format='json',
+            )
+
+    def test_merge_repoints_rows_and_reranks(self):
+        response = self.merge()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["merged_ids"], [self.duplicate.pk])
+        self.assertEqual(response.data["dropped"], 1)
+        self.assertEqual(response.data["relinked"]["suspects.CaseSuspect"], 1)
+
+        self.assertFalse(Suspect.objects.filter(pk=self.duplicate.pk).exists())
+        self.assertEqual(
+            set(CaseSuspect.objects.filter(suspect=self.survivor).values_list("pk", flat=True)),
+            {self.survivor_link.pk, self.moved_link.pk},
+        )
+        for row in (self.interrogation, self.tip, self.bail):
+            row.refresh_from_db()
+            self.assertEqual(row.suspect_id, self.survivor.pk)
+
+        survivor = Suspect.objects.get(pk=self.survivor.pk)
+        self.assertEqual(survivor.status, SuspectStatus.UNDER_PURSUIT)
+        self.assertEqual(survivor.aliases, "Ali Rezai, Scarface")
+        self.assertEqual(survivor.description, "Scar on left cheek")
+        # Earliest wanted_since, and the critical case now counts (4 x 10 days)
+        self.assertEqual(survivor.max_crime_severity, 4)
+        self.assertEqual(survivor.most_wanted_rank, 40)
+        self.assertEqual(response.data["suspect"]["most_wanted_rank"], 40)
+        self.assertEqual(
+            [m[0] for m in identity.find_matches("scarface")], [self.survivor.pk]
+        )
+
+    def test_unmerge_restores_suspects_and_rows(self):
+        merge_id = self.merge().data["merge_id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/v1/suspects/{self.survivor.pk}/unmerge/',
+                {"merge_id": merge_id}, format='json',
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["restored_ids"], [self.duplicate.pk])
+
+        duplicate = Suspect.objects.get(pk=self.duplicate.pk)
+        self.assertEqual(duplicate.status, SuspectStatus.ARRESTED)
+        self.assertEqual(duplicate.aliases, "Scarface")
+        self.assertEqual(
+            set(CaseSuspect.objects.filter(suspect=duplicate).values_list("notes", flat=True)),
+            {"dup", ""},
+        )
+        for row in (self.interrogation, self.tip, self.bail):
+            row.refresh_from_db()
+            self.assertEqual(row.suspect_id, duplicate.pk)
+        survivor = Suspect.objects.get(pk=self.survivor.pk)
+        self.assertEqual((survivor.aliases, survivor.description), ("", ""))
+        self.assertEqual(survivor.most_wanted_rank, 2)
+        self.assertIsNotNone(SuspectMerge.objects.get(pk=merge_id).undone_at)
+
+        response = self.client.post(
+            f'/api/v1/suspects/{self.survivor.pk}/unmerge/', {"merge_id": merge_id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_merge_validation_and_access(self):
+        url = f'/api/v1/suspects/{self.survivor.pk}/merge/'
+        response = self.client.post(url, {"suspect_ids": [self.survivor.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {"suspect_ids": [999999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        detective = User.objects.create_user(
+            username='detective', email='detective@example.com', password='pass123'
+        )
+        detective.add_role('Detective')
+        self.client.force_authenticate(user=detective)
+        response = self.client.post(url, {"suspect_ids": [self.duplicate.pk]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Suspect.objects.filter(pk=self.duplicate.pk).exists())
+
+    def test_merge_command(self):
+        out = StringIO()
+        call_command('merge_suspects', self.survivor.pk, self.duplicate.pk, stdout=out)
+        self.assertIn("dropped 1 duplicates", out.getvalue())
+        merge = SuspectMerge.objects.get()
+        call_command('merge_suspects', '--undo', merge.pk, stdout=out)
+        self.assertTrue(Suspect.objects.filter(pk=self.duplicate.pk).exists())
+
+
+class SuspectPhotoThumbnailTestCase(APITestCase):
+    """Thumbnails of Suspect.photo (apps.common.thumbnails)."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def upload(self, name="face.png", size=(1200, 800), mode="RGBA"):
+        out = io.BytesIO()
+        Image.new(mode, size, (200, 30, 30, 128)[:len(mode)]).save(out, "PNG")
+        return SimpleUploadedFile(name, out.getvalue(), content_type="image/png")
+
+    def test_variants_made_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect = Suspect.objects.create(
+                full_name="Photographed", photo=self.upload(),
+                status=SuspectStatus.MOST_WANTED,
+            )
+        suspect = Suspect.objects.get(pk=suspect.pk)
+        variants = suspect.photo_variants
+        self.assertEqual(variants["source"], suspect.photo.name)
+        self.assertEqual(set(variants["widths"]), {"160", "480"})
+        small = variants["widths"]["160"]
+        self.assertRegex(small["webp"], r"^suspects/face\.[0-9a-f]{16}\.160w\.webp$")
+        storage = suspect.photo.storage
+        with storage.open(small["jpeg"]) as f:
+            self.assertEqual(Image.open(f).size, (160, 107))
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/v1/suspects/most_wanted/')
+        self.assertTrue(response.data[0]["photo_thumb"].endswith(small["webp"]))
+        self.assertEqual(set(response.data[0]["photo_variants"]), {"160w", "480w"})
+
+        # Served by the web server in production; with DEBUG, by thumbnails.serve
+        self.assertNotEqual(self.client.get(f'/media/{small["webp"]}').status_code, status.HTTP_200_OK)
+        response = thumbnails.serve(RequestFactory().get(f'/media/{small["webp"]}'), small["webp"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_stale_instance_keeps_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect = Suspect.objects.create(full_name="Stale", photo=self.upload())
+        self.assertEqual(suspect.photo_variants, {})  # written by the job, not on this object
+        with mock.patch("apps.common.thumbnails.render") as render:
+            with self.captureOnCommitCallbacks(execute=True):
+                suspect.description = "updated"
+                suspect.save()
+        render.assert_not_called()
+        self.assertEqual(
+            Suspect.objects.get(pk=suspect.pk).photo_variants["source"], suspect.photo.name
+        )
+
+        suspect.photo = None
+        suspect.save()
+        self.assertEqual(Suspect.objects.get(pk=suspect.pk).photo_variants, {})
+
+    def test_generate_thumbnails_command(self):
+        suspect = Suspect.objects.create(full_name="Imported", photo=self.upload(mode="RGB"))
+        self.assertEqual(Suspect.objects.get(pk=suspect.pk).photo_variants, {})
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn("1 images", out.getvalue())
+        self.assertEqual(
+            Suspect.objects.get(pk=suspect.pk).photo_variants["source"], suspect.photo.name
+        )
+
+
+class PhotoSearchTestCase(APITestCase):
+    """Perceptual hashes, the in-memory index and POST /suspects/photo_search/."""
+
+    URL = '/api/v1/suspects/photo_search/'
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        photo_index.reset()
+        self.addCleanup(photo_index.reset)
+
+        self.detective = User.objects.create_user(
+            username='detective', email='detective@example.com', password='pass123'
+        )
+        self.detective.add_role('Detective')
+        self.client.force_authenticate(user=self.detective)
+
+    def image(self, seed=1, size=(400, 300), fmt="PNG", name="photo.png"):
+        """A scene of seeded random ellipses, resized to `size`."""
+        rng = random.Random(seed)
+        scene = Image.new("RGB", (400, 300), "white")
+        draw = ImageDraw.Draw(scene)
+        for _ in range(12):
+            x, y = rng.randrange(400), rng.randrange(300)
+            w, h = rng.randrange(30, 150), rng.randrange(30, 150)
+            draw.ellipse([x, y, x + w, y + h], fill=tuple(rng.randrange(256) for _ in range(3)))
+        out = io.BytesIO()
+        scene.resize(size).save(out, fmt)
+        return SimpleUploadedFile(name, out.getvalue(), content_type=f"image/{fmt.lower()}")
+
+    def test_hashes_survive_rescaling_and_recompression(self):
+        original = photo_index.image_hashes(self.image())
+        resized = photo_index.image_hashes(self.image(size=(123, 97), fmt="JPEG"))
+        other = photo_index.image_hashes(self.image(seed=2))
+
+        def distance(a, b):
+            return (a ^ b).bit_count()
+
+        self.assertLessEqual(distance(original[0], resized[0]), 4)
+        self.assertGreater(distance(original[0], other[0]), photo_index.MAX_RADIUS)
+
+    def test_index_search_radius(self):
+        index = photo_index.PhotoIndex()
+        base = 0x0123456789ABCDEF
+        index.add(2, base, 0)
+        index.add(4, base ^ 0b111, 0)         # 3 bits away, same chunks otherwise
+        index.add(6, base ^ (1 << 63 | 1), 0)  # 2 bits away, in two chunks
+        index.add(8, ~base & (1 << 64) - 1, 0)
+        self.assertEqual([key for key, _, _ in index.search(base, 0, 2)], [2, 6])
+        self.assertEqual([key for key, _, _ in index.search(base, 0, 8)], [2, 6, 4])
+        index.discard(6)
+        self.assertEqual([key for key, _, _ in index.search(base, 0, 8)], [2, 4])
+
+    def test_photo_search_finds_suspects_and_evidence(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect = Suspect.objects.create(full_name="Pictured", photo=self.image())
+            Suspect.objects.create(full_name="Other", photo=self.image(seed=2))
+            case = Case.objects.create(
+                case_number="CASE-PHOTO-1", title="Photo", created_by=self.detective
+            )
+            evidence = Evidence.objects.create(
+                case=case, evidence_type="other", title="CCTV", description="still",
+                collected_by=self.detective,
+            )
+            attachment = EvidenceAttachment.objects.create(
+                evidence=evidence, file=self.image(fmt="JPEG", name="cctv.jpg"),
+                attachment_type=EvidenceAttachment.AttachmentType.IMAGE,
+            )
+        self.assertEqual(PhotoHash.objects.count(), 3)
+
+        response = self.client.post(self.URL, {"photo": self.image(size=(200, 150))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["suspect"]["id"], suspect.pk)
+        self.assertEqual(results[0]["distance"], 0)
+        self.assertEqual(results[1]["attachment"]["id"], attachment.pk)
+
+        # By evidence image: the attachment itself is left out
+        response = self.client.post(self.URL, {"attachment_id": attachment.pk}, format='json')
+        self.assertEqual(
+            [row["suspect"]["id"] for row in response.data["results"]], [suspect.pk]
+        )
+
+        # A removed photo leaves the index
+        with self.captureOnCommitCallbacks(execute=True):
+            suspect.photo = None
+            suspect.save()
+        response = self.client.post(self.URL, {"attachment_id": attachment.pk}, format='json')
+        self.assertEqual(response.data["results"], [])
+
+    def test_photo_search_validation_and_access(self):
+        response = self.client.post(self.URL, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.URL, {"attachment_id": 999999}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        citizen = User.objects.create_user(
+            username='citizen', email='citizen@example.com', password='pass123'
+        )
+        self.client.force_authenticate(user=citizen)
+        response = self.client.post(self.URL, {"photo": self.image()})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_merge_carries_photo_thumbnails_and_hash(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            survivor = Suspect.objects.create(full_name="No Photo")
+            duplicate = Suspect.objects.create(full_name="No Photo 2", photo=self.image())
+        variants = Suspect.objects.get(pk=duplicate.pk).photo_variants
+        self.assertTrue(variants["widths"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            merge = merge_suspects(survivor.pk, [duplicate.pk])
+        survivor = Suspect.objects.get(pk=survivor.pk)
+        self.assertEqual(survivor.photo.name, variants["source"])
+        self.assertEqual(survivor.photo_variants, variants)
+        self.assertTrue(PhotoHash.objects.filter(suspect=survivor).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            undo_merge(merge.pk)
+        self.assertFalse(Suspect.objects.get(pk=survivor.pk).photo)
+        self.assertEqual(Suspect.objects.get(pk=survivor.pk).photo_variants, {})
+        self.assertEqual(
+            list(PhotoHash.objects.values_list("suspect_id", flat=True)), [duplicate.pk]
+        )
+
+    def test_rebuild_command(self):
+        suspect = Suspect.objects.create(full_name="Imported", photo=self.image())
+        self.assertFalse(PhotoHash.objects.filter(suspect=suspect).exists())
+        call_command('rebuild_photo_index', stdout=StringIO())
+        self.assertTrue(PhotoHash.objects.filter(suspect=suspect).exists())
+
+
 class SuspectAccessControlTestCase(APITestCase):
     """Test access control for suspect operations."""
     
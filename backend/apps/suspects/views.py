@@ -1,36 +1,65 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django_fsm import TransitionNotAllowed
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from apps.suspects.models import CaseSuspect
 from apps.cases.models import CaseStatus
 
+from apps.accounts.models import Capability
+from apps.accounts.policy import capability_required
 from apps.cases.models import Case
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.pagination import OptInKeysetPagination
+from . import identity, most_wanted, photo_index
+from .merge import MergeError, merge_suspects, undo_merge
 from .models import CaseSuspect, Interrogation, Suspect, SuspectStatus
 from .serializers import (
+    SUSPECT_SERIALIZER_RELATED,
     CaptainDecisionSerializer,
     CaseSuspectSerializer,
     GuildScoreSerializer,
     InterrogationSerializer,
     LinkSuspectToCaseSerializer,
     MostWantedSerializer,
+    PhotoSearchSerializer,
+    SuspectBulkArrestSerializer,
     SuspectListSerializer,
+    SuspectMergeSerializer,
     SuspectSerializer,
+    SuspectUnmergeSerializer,
 )
 
 User = get_user_model()
 
+MAX_MATCHES = 50
 
-class SuspectViewSet(viewsets.ModelViewSet):
+
+class SuspectViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = SuspectSerializer
     permission_classes = [IsAuthenticated]
-    filterset_fields = ["status"]
+    pagination_class = OptInKeysetPagination
+    filterset_fields = ["status", "max_crime_severity"]
     search_fields = ["full_name", "aliases", "description", "last_known_location"]
-    ordering_fields = ["created_at", "wanted_since"]
+    ordering_fields = ["created_at", "wanted_since", "most_wanted_rank", "current_rank"]
+    conditional_related = {
+        "list": ["case_links", "case_links__case"],
+        "retrieve": SUSPECT_SERIALIZER_RELATED,
+    }
+
+    def get_conditional_salt(self):
+        # days_wanted / rank / reward grow with the date
+        return timezone.localdate().isoformat()
 
     def get_queryset(self):
+        # Rank, severity and reward as of today (see SuspectQuerySet.with_rank)
+        return self.get_visible_suspects().with_rank()
+
+    def get_visible_suspects(self):
         user = self.request.user
         if user.is_staff:
             return Suspect.objects.all()
@@ -77,31 +106,126 @@ class SuspectViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], permission_classes=[AllowAny])
     def most_wanted(self, request):
         """
-        Public Most Wanted list.
-        Auto-promotes suspects under pursuit for 30+ days to Most Wanted.
-        Returns suspects ranked by formula: max(Lj) * max(Di).
+        Public Most Wanted list, ranked by max(Lj) * max(Di).
+        Served from the cached snapshot; with `?page=` (or
+        `?pagination=cursor`) the list is paginated in the database instead.
+        Promotion to Most Wanted runs in `manage.py promote_most_wanted`.
         """
-        # Auto-promote eligible suspects (under pursuit > 30 days)
-        eligible = Suspect.objects.filter(status=SuspectStatus.UNDER_PURSUIT)
-        for suspect in eligible:
-            if suspect.is_most_wanted_eligible:
-                suspect.mark_most_wanted()
-                suspect.save()
+        if not any(param in request.query_params for param in most_wanted.PAGINATION_PARAMS):
+            return Response(most_wanted.snapshot())
+        page = self.paginate_queryset(most_wanted.ranked())
+        serializer = MostWantedSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
 
-        suspects = Suspect.objects.filter(
-            status = SuspectStatus.MOST_WANTED
-        )
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.POLICE_STAFF, "Only police staff can look up suspect identities."
+            ),
+        ],
+    )
+    def match(self, request):
+        """
+        Suspects across all cases whose name or an alias probably matches
+        `?name=` (spelling, script and phonetic variants), best first.
+        """
+        name = request.query_params.get("name", "").strip()
+        if not name:
+            return Response(
+                {"error": "The name query parameter is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), MAX_MATCHES)
+        except ValueError:
+            return Response(
+                {"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        matches = identity.find_matches(name, limit=limit)
+        suspects = Suspect.objects.with_rank().in_bulk([suspect_id for suspect_id, _, _ in matches])
+        return Response([
+            {
+                "score": score,
+                "matched_name": variant,
+                "suspect": SuspectListSerializer(suspects[suspect_id]).data,
+            }
+            for suspect_id, score, variant in matches
+            if suspect_id in suspects
+        ])
 
-        # Sort by rank (computed property)
-        suspects_with_rank = [
-            (s, s.most_wanted_rank) for s in suspects
-        ]
-        suspects_with_rank.sort(key=lambda x: x[1], reverse=True)
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[MultiPartParser, FormParser, JSONParser],
+        permission_classes=[
+            IsAuthenticated,
+            capability_required(
+                Capability.POLICE_STAFF, "Only police staff can search suspect photos."
+            ),
+        ],
+    )
+    def photo_search(self, request):
+        """
+        Suspect photos and image evidence that are near-duplicates of an
+        uploaded `photo` or of evidence image `attachment_id`, closest first.
+        """
+        from apps.evidence.models import EvidenceAttachment
+        from apps.evidence.serializers import EvidenceAttachmentSerializer
 
-        sorted_suspects = [s[0] for s in suspects_with_rank]
+        serializer = PhotoSearchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        query_key = None
+        try:
+            if "photo" in data:
+                phash, dhash = photo_index.image_hashes(data["photo"])
+            else:
+                attachment = EvidenceAttachment.objects.filter(pk=data["attachment_id"]).first()
+                if attachment is None:
+                    return Response(
+                        {"error": "Attachment not found."}, status=status.HTTP_404_NOT_FOUND
+                    )
+                with attachment.file.open("rb") as f:
+                    phash, dhash = photo_index.image_hashes(f)
+                query_key = (photo_index.ATTACHMENT, attachment.pk)
+        except (OSError, SyntaxError, ValueError):
+            return Response(
+                {"error": "The image could not be read."}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        serializer = MostWantedSerializer(sorted_suspects, many=True)
-        return Response(serializer.data)
+        # One extra in case the queried attachment is among the results
+        matches = [
+            match for match in photo_index.search(phash, dhash, data["radius"], data["limit"] + 1)
+            if match[:2] != query_key
+        ][:data["limit"]]
+        ids = {
+            kind: [pk for k, pk, _, _ in matches if k == kind]
+            for kind in (photo_index.SUSPECT, photo_index.ATTACHMENT)
+        }
+        suspects = Suspect.objects.with_rank().in_bulk(ids[photo_index.SUSPECT])
+        attachments = (
+            EvidenceAttachment.objects.select_related("uploaded_by")
+            .in_bulk(ids[photo_index.ATTACHMENT])
+        )
+        results = []
+        for kind, pk, distance, dhash_distance in matches:
+            row = {"distance": distance, "dhash_distance": dhash_distance}
+            if kind == photo_index.SUSPECT and pk in suspects:
+                row["suspect"] = SuspectListSerializer(
+                    suspects[pk], context={"request": request}
+                ).data
+            elif kind == photo_index.ATTACHMENT and pk in attachments:
+                row["attachment"] = EvidenceAttachmentSerializer(
+                    attachments[pk], context={"request": request}
+                ).data
+                row["attachment"]["evidence"] = attachments[pk].evidence_id
+            else:
+                continue  # deleted since the index was loaded
+            results.append(row)
+        return Response({"radius": data["radius"], "results": results})
 
     @action(detail=True, methods=["post"])
     def start_investigation(self, request, pk=None):
@@ -152,17 +276,162 @@ class SuspectViewSet(viewsets.ModelViewSet):
         suspect = self.get_object()
         
         try:
-            suspect.arrest()
-            suspect.save()
-            # When all suspects of a case are arrested, case enters interrogation
-            for link in CaseSuspect.objects.filter(suspect=suspect).select_related("case"):
-                case = link.case
-                case.maybe_start_interrogation()
-                case.save()
+            with transaction.atomic():
+                suspect.arrest()
+                suspect.save()
+                # When all suspects of a case are arrested, case enters interrogation
+                Case.objects.filter(suspect_links__suspect=suspect).start_interrogations(
+                    request.user
+                )
             return Response(SuspectSerializer(suspect).data)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=True, methods=["post"])
+    def merge(self, request, pk=None):
+        """
+        Fold duplicate suspects (`suspect_ids`) into this one. Their case
+        links, interrogations, tips, bails and sentences move here and they
+        are deleted; the returned `merge_id` can be passed to unmerge.
+        """
+        user_roles = request.user.get_roles()
+        if not request.user.is_staff and "Sergeant" not in user_roles:
+            return Response(
+                {"error": "Only Sergeant can merge suspects."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        survivor = self.get_object()
+        serializer = SuspectMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        suspect_ids = list(dict.fromkeys(serializer.validated_data["suspect_ids"]))
+        visible = set(
+            self.get_visible_suspects().filter(pk__in=suspect_ids).values_list("pk", flat=True)
+        )
+        missing = [pk for pk in suspect_ids if pk not in visible]
+        if missing:
+            return Response(
+                {"error": f"Suspects not found: {', '.join(map(str, missing))}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            record = merge_suspects(survivor.pk, suspect_ids, merged_by=request.user)
+        except MergeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        relinked = {
+            label: sum(len(pks) for pks in rows["rows"].values())
+            for label, rows in record.snapshot["relinked"].items()
+        }
+        return Response({
+            "merge_id": record.pk,
+            "merged_ids": record.merged_ids,
+            "relinked": relinked,
+            "dropped": len(record.snapshot["dropped"]),
+            "suspect": SuspectSerializer(Suspect.objects.with_rank().get(pk=survivor.pk)).data,
+        })
+
+    @action(detail=True, methods=["post"])
+    def unmerge(self, request, pk=None):
+        """Undo a merge into this suspect (`merge_id`), restoring the absorbed suspects."""
+        user_roles = request.user.get_roles()
+        if not request.user.is_staff and "Sergeant" not in user_roles:
+            return Response(
+                {"error": "Only Sergeant can undo suspect merges."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        survivor = self.get_object()
+        serializer = SuspectUnmergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        merge_id = serializer.validated_data["merge_id"]
+        if not survivor.merges.filter(pk=merge_id).exists():
+            return Response({"error": "Merge not found."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            record = undo_merge(merge_id, undone_by=request.user)
+        except MergeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "merge_id": record.pk,
+            "restored_ids": record.merged_ids,
+            "suspect": SuspectSerializer(Suspect.objects.with_rank().get(pk=survivor.pk)).data,
+        })
+
+    @action(detail=False, methods=["post"])
+    def bulk_arrest(self, request):
+        """
+        Arrest many suspects in one transaction (coordinated raids). Cases
+        whose suspects are then all arrested move to INTERROGATION. Suspects
+        locked by another request are skipped and reported, and each
+        suspect succeeds or fails on its own.
+        """
+        user_roles = request.user.get_roles()
+        if not request.user.is_staff and "Sergeant" not in user_roles:
+            return Response(
+                {"error": "Only Sergeant can arrest suspects."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        serializer = SuspectBulkArrestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        suspect_ids = list(dict.fromkeys(serializer.validated_data["suspect_ids"]))
+        notes = serializer.validated_data.get("notes") or "All suspects arrested"
+
+        results = {}
+        with transaction.atomic():
+            visible = Suspect.objects.filter(
+                pk__in=self.get_visible_suspects().filter(pk__in=suspect_ids).values("pk")
+            )
+            suspects = {s.pk: s for s in visible.select_for_update(skip_locked=True)}
+            missing = [pk for pk in suspect_ids if pk not in suspects]
+            locked = set(
+                visible.filter(pk__in=missing).values_list("pk", flat=True)
+            ) if missing else set()
+            for pk in missing:
+                results[pk] = {
+                    "id": pk,
+                    "success": False,
+                    "error": "Suspect is being updated by another request." if pk in locked
+                    else "Suspect not found.",
+                }
+
+            now = timezone.now()
+            arrested = []
+            for pk in suspect_ids:
+                suspect = suspects.get(pk)
+                if suspect is None:
+                    continue
+                from_status = suspect.status
+                try:
+                    suspect.arrest()
+                except TransitionNotAllowed:
+                    results[pk] = {
+                        "id": pk,
+                        "success": False,
+                        "error": f"Cannot arrest a suspect in status '{from_status}'.",
+                    }
+                    continue
+                suspect.arrested_at = suspect.updated_at = now
+                arrested.append(suspect)
+                results[pk] = {
+                    "id": pk,
+                    "success": True,
+                    "from_status": from_status,
+                    "to_status": suspect.status,
+                }
+
+            cases = []
+            if arrested:
+                Suspect.objects.bulk_update(arrested, ["status", "arrested_at", "updated_at"])
+                most_wanted.invalidate()
+                cases = Case.objects.filter(
+                    pk__in=CaseSuspect.objects.filter(suspect__in=arrested).values("case_id")
+                ).start_interrogations(request.user, notes)
+
+        return Response({
+            "succeeded": len(arrested),
+            "failed": len(suspect_ids) - len(arrested),
+            "results": [results[pk] for pk in suspect_ids],
+            "cases_in_interrogation": sorted(cases),
+        })
+
     @action(detail=True, methods=["post"])
     def clear(self, request, pk=None):
         """Clear suspect of suspicion."""
@@ -289,12 +558,13 @@ class SuspectViewSet(viewsets.ModelViewSet):
         return Response(CaseSuspectSerializer(link).data, status=status.HTTP_201_CREATED)
 
 
-class InterrogationViewSet(viewsets.ModelViewSet):
+class InterrogationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Interrogation.objects.all()
     serializer_class = InterrogationSerializer
     permission_classes = [IsAuthenticated]
     filterset_fields = ["suspect", "case", "conducted_by"]
     ordering_fields = ["started_at"]
+    conditional_related = {"list": ["conducted_by"], "retrieve": ["conducted_by"]}
 
     def perform_create(self, serializer):
         serializer.save(conducted_by=self.request.user)
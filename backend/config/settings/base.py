@@ -21,6 +21,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 THIRD_PARTY_APPS = [
@@ -90,6 +91,22 @@ DATABASES = {
     }
 }
 
+# Cache (shared across workers when REDIS_URL is set, per-process otherwise)
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 # Custom User Model
 AUTH_USER_MODEL = "accounts.User"
 
@@ -127,14 +144,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.accounts.authentication.RoleClaimJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "apps.common.search.FullTextSearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
@@ -149,8 +166,50 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_REFRESH_SERIALIZER": "apps.accounts.serializers.CustomTokenRefreshSerializer",
 }
 
+# Login password verification pool (apps.accounts.password_pool).
+# 0 verifies inline; otherwise hashes are checked in this many processes
+# per web worker, with at most PASSWORD_POOL_QUEUE_SIZE more waiting.
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", "0"))
+PASSWORD_POOL_QUEUE_SIZE = int(os.getenv("PASSWORD_POOL_QUEUE_SIZE", "32"))
+PASSWORD_POOL_TIMEOUT = float(os.getenv("PASSWORD_POOL_TIMEOUT", "10"))
+
+# Case/complaint history writer (apps.common.audit). 0 writes history right
+# after commit; a positive interval batches it in the background, flushing
+# early once AUDIT_BUFFER_SIZE events are pending.
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0"))
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "200"))
+AUDIT_SPOOL_DIR = os.getenv("AUDIT_SPOOL_DIR", str(BASE_DIR / "audit-spool"))
+
+# Case event streams (apps.cases.events, GET /cases/{id}/events/). The last
+# CASE_EVENT_LOG_SIZE events of each case are kept for Last-Event-ID resume.
+# Streams poll the log every CASE_EVENT_POLL_SECONDS for events written by
+# other processes and end after CASE_EVENT_STREAM_SECONDS (clients reconnect).
+CASE_EVENT_LOG_SIZE = int(os.getenv("CASE_EVENT_LOG_SIZE", "500"))
+CASE_EVENT_POLL_SECONDS = float(os.getenv("CASE_EVENT_POLL_SECONDS", "2"))
+CASE_EVENT_HEARTBEAT_SECONDS = float(os.getenv("CASE_EVENT_HEARTBEAT_SECONDS", "15"))
+CASE_EVENT_STREAM_SECONDS = float(os.getenv("CASE_EVENT_STREAM_SECONDS", "300"))
+CASE_EVENT_RETRY_MS = int(os.getenv("CASE_EVENT_RETRY_MS", "3000"))
+
+# Photo/avatar thumbnails (apps.common.thumbnails): encoder threads per
+# process; 0 makes them inline right after the upload commits.
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+# Photo search index (apps.suspects.photo_index): how often a process
+# picks up photo hashes written by other processes.
+PHOTO_INDEX_SYNC_SECONDS = float(os.getenv("PHOTO_INDEX_SYNC_SECONDS", "5"))
+
+# Resumable evidence uploads (apps.evidence.uploads): largest file
+# accepted, and how long an unfinished upload is kept after its last chunk
+# (manage.py purge_attachment_uploads).
+ATTACHMENT_UPLOAD_MAX_SIZE = int(os.getenv("ATTACHMENT_UPLOAD_MAX_SIZE", str(50 * 1024 ** 3)))
+ATTACHMENT_UPLOAD_EXPIRY_HOURS = int(os.getenv("ATTACHMENT_UPLOAD_EXPIRY_HOURS", "72"))
+
+# Public Most Wanted list snapshot (apps.suspects.most_wanted)
+MOST_WANTED_CACHE_SECONDS = int(os.getenv("MOST_WANTED_CACHE_SECONDS", "300"))
+
 # DRF Spectacular (Swagger/OpenAPI)
 SPECTACULAR_SETTINGS = {
     "TITLE": "Police Department Management API",
@@ -9,4 +9,10 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.common import thumbnails
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -29,5 +30,13 @@ urlpatterns = [
 ]
 
 if settings.DEBUG:
+    # Content-hashed thumbnails, cached for a year (the web server's job in production)
+    urlpatterns += [
+        re_path(
+            rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>{thumbnails.VARIANT_PATTERN})$",
+            thumbnails.serve,
+            name="thumbnail",
+        ),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
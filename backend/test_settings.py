@@ -10,6 +10,18 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# No audit spool files from the test run
+AUDIT_SPOOL_DIR = None
+
+# Thumbnails inline, on the test database connection
+THUMBNAIL_WORKERS = 0
+
 # Disable migrations for faster tests
 class DisableMigrations:
     def __contains__(self, item):